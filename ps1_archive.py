@@ -0,0 +1,222 @@
+"""Leitura de discos dentro de arquivos compactados (.zip, .tar.gz, .7z) sem extração.
+
+O .cue é lido e interpretado direto do arquivo compactado, e os .bin que ele
+referencia são descompactados em fluxo, bloco a bloco, por quem converte: nada
+é extraído para disco e o uso de memória não depende do tamanho do disco.
+
+.zip e .tar/.tar.gz/.tgz usam a biblioteca padrão. Para .7z é usado o
+executável do 7-Zip (7z, 7za ou 7zz) no PATH, que descompacta para a saída
+padrão; outros formatos (ou outra implementação de .7z) podem ser plugados com
+`register_handler`.
+"""
+import io
+import os
+import posixpath
+import shutil
+import subprocess
+import tarfile
+import zipfile
+
+from ps1_cue import decode_cue_text, parse_cue_text
+
+class ArchiveError(ValueError):
+    """Arquivo compactado ilegível ou sem um disco BIN/CUE utilizável."""
+
+# -----------------------------
+# Formatos
+class ZipArchive:
+    """Membros de um .zip (zipfile descompacta cada membro em fluxo)."""
+
+    def __init__(self, path):
+        try:
+            self._zip = zipfile.ZipFile(path)
+        except zipfile.BadZipFile as e:
+            raise ArchiveError(f"{os.path.basename(path)}: .zip inválido ({e})") from e
+
+    def members(self):
+        return {info.filename: info.file_size for info in self._zip.infolist() if not info.is_dir()}
+
+    def open(self, name):
+        return self._zip.open(name)
+
+    def close(self):
+        self._zip.close()
+
+class TarArchive:
+    """Membros de um .tar, .tar.gz ou .tgz."""
+
+    def __init__(self, path):
+        try:
+            self._tar = tarfile.open(path, 'r:*')
+        except tarfile.TarError as e:
+            raise ArchiveError(f"{os.path.basename(path)}: .tar inválido ({e})") from e
+
+    def members(self):
+        return {member.name: member.size for member in self._tar.getmembers() if member.isfile()}
+
+    def open(self, name):
+        return self._tar.extractfile(name)
+
+    def close(self):
+        self._tar.close()
+
+class _ProcessStream(io.RawIOBase):
+    """Saída padrão de um processo como fluxo somente leitura."""
+
+    def __init__(self, process, name):
+        super().__init__()
+        self._process = process
+        self._name = name
+        self._finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._process.stdout.readinto(buffer)
+        if not count and not self._finished:
+            self._finished = True
+            if self._process.wait() != 0:
+                raise OSError(f"7-Zip falhou ao descompactar {self._name} (código {self._process.returncode})")
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._process.stdout.close()
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+        super().close()
+
+class SevenZipArchive:
+    """Membros de um .7z, descompactados em fluxo pelo executável do 7-Zip (`7z e -so`)."""
+
+    EXECUTABLES = ("7z", "7za", "7zz")
+
+    def __init__(self, path):
+        self._exe = next(filter(None, map(shutil.which, self.EXECUTABLES)), None)
+        if self._exe is None:
+            raise ArchiveError("Arquivos .7z exigem o 7-Zip (7z, 7za ou 7zz) no PATH "
+                               "ou um handler registrado com ps1_archive.register_handler().")
+        self._path = path
+        listing = subprocess.run([self._exe, "l", "-slt", path], capture_output=True, text=True, errors="replace")
+        if listing.returncode != 0:
+            raise ArchiveError(f"{os.path.basename(path)}: .7z inválido ({listing.stderr.strip()})")
+        self._members = {}
+        # Com -slt, cada membro é um bloco "Chave = valor" depois da linha "----------"
+        entry = None
+        for line in listing.stdout.split("----------", 1)[-1].splitlines() + [""]:
+            key, _, value = line.partition(" = ")
+            if key == "Path":
+                entry = {"Path": value}
+            elif entry is not None and key:
+                entry[key] = value
+            elif entry is not None:
+                if not entry.get("Attributes", "").startswith("D") and entry.get("Folder") != "+":
+                    self._members[entry["Path"].replace("\\", "/")] = int(entry.get("Size") or 0)
+                entry = None
+
+    def members(self):
+        return dict(self._members)
+
+    def open(self, name):
+        process = subprocess.Popen([self._exe, "e", "-so", self._path, name],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return io.BufferedReader(_ProcessStream(process, name), 1024 * 1024)
+
+    def close(self):
+        pass
+
+# Sufixos -> fábrica(caminho); os registrados por último têm prioridade
+_HANDLERS = []
+
+def register_handler(suffixes, factory):
+    """Registra um leitor para os `suffixes` dados (ex.: (".7z",)).
+
+    `factory(path)` deve retornar um objeto com `members()` (nome -> tamanho),
+    `open(nome)` (fluxo binário somente leitura) e `close()`.
+    """
+    _HANDLERS.insert(0, (tuple(suffix.lower() for suffix in suffixes), factory))
+
+register_handler((".zip",), ZipArchive)
+register_handler((".tar", ".tar.gz", ".tgz"), TarArchive)
+register_handler((".7z",), SevenZipArchive)
+
+def _handler_for(path):
+    name = str(path).lower()
+    for suffixes, factory in _HANDLERS:
+        for suffix in suffixes:
+            if name.endswith(suffix):
+                return suffix, factory
+    return None, None
+
+def is_archive(path):
+    """Indica se `path` tem a extensão de um formato compactado suportado."""
+    return _handler_for(path)[1] is not None
+
+def archive_base_name(path):
+    """Nome base do disco: o nome do arquivo compactado sem a extensão (jogo.tar.gz -> jogo)."""
+    suffix, _ = _handler_for(path)
+    name = os.path.basename(path)
+    return name[:-len(suffix)] if suffix else os.path.splitext(name)[0]
+
+# -----------------------------
+# Disco dentro de um arquivo compactado
+class ArchiveDisc:
+    """O .cue de um arquivo compactado e acesso em fluxo aos arquivos que ele referencia."""
+
+    def __init__(self, path):
+        _, factory = _handler_for(path)
+        if factory is None:
+            raise ArchiveError(f"Formato compactado não suportado: {os.path.basename(path)}")
+        self.path = str(path)
+        self.base_name = archive_base_name(path)
+        self._archive = factory(path)
+        try:
+            self._members = self._archive.members()
+            # Busca sem diferenciar maiúsculas, já que muitos .cue vêm do Windows
+            self._folded = {name.lower(): name for name in self._members}
+            cues = sorted(name for name in self._members if name.lower().endswith(".cue"))
+            if not cues:
+                raise ArchiveError(f"Nenhum .cue encontrado em {os.path.basename(path)}.")
+            if len(cues) > 1:
+                raise ArchiveError(f"{os.path.basename(path)} contém mais de um .cue: {', '.join(cues)}")
+            self.cue_member = cues[0]
+            with self._archive.open(self.cue_member) as stream:
+                text = decode_cue_text(stream.read())
+            self.sheet = parse_cue_text(text, f"{self.path}/{self.cue_member}")
+        except Exception:
+            self._archive.close()
+            raise
+
+    def member(self, name):
+        """Nome do membro referenciado pelo .cue como `name` (relativo à pasta do .cue), ou None."""
+        joined = posixpath.normpath(posixpath.join(posixpath.dirname(self.cue_member), name.replace("\\", "/")))
+        if joined in self._members:
+            return joined
+        return self._folded.get(joined.lower())
+
+    def has(self, name):
+        return self.member(name) is not None
+
+    def size(self, name):
+        member = self.member(name)
+        if member is None:
+            raise FileNotFoundError(f"{name} não encontrado em {os.path.basename(self.path)}")
+        return self._members[member]
+
+    def open(self, name):
+        """Fluxo binário do arquivo `name`, descompactado sob demanda."""
+        member = self.member(name)
+        if member is None:
+            raise FileNotFoundError(f"{name} não encontrado em {os.path.basename(self.path)}")
+        return self._archive.open(member)
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
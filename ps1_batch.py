@@ -0,0 +1,182 @@
+"""Agendador de conversões em lote.
+
+Executa vários `convert_pair` ao mesmo tempo em um pool de threads (o trabalho
+é dominado por E/S, então threads bastam), limitando opcionalmente quantos
+trabalhos usam o mesmo dispositivo ao mesmo tempo.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ps1_engine import convert_pair
+from ps1_manifest import output_files_for, output_options, source_fingerprint
+from ps1_progress import PHASE_DONE, PHASE_IMAGE, PROGRESS_INTERVAL, BatchProgress, ProgressEvent, Throttle
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# -----------------------------
+# Limite de concorrência por dispositivo
+def device_of(path):
+    """Retorna o identificador do dispositivo (st_dev) onde está `path`, ou None."""
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+class DeviceLimiter:
+    """Mantém um semáforo por dispositivo, criado sob demanda."""
+
+    def __init__(self, per_device):
+        self.per_device = per_device
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, device):
+        with self._lock:
+            if device not in self._semaphores:
+                self._semaphores[device] = threading.BoundedSemaphore(self.per_device)
+            return self._semaphores[device]
+
+    def acquire(self, paths):
+        """Reserva os dispositivos de `paths` e retorna a lista de semáforos obtidos."""
+        if not self.per_device:
+            return []
+        # Ordem fixa evita deadlock entre trabalhos que compartilham dispositivos
+        devices = sorted({device for device in map(device_of, paths) if device is not None})
+        held = []
+        for device in devices:
+            semaphore = self._semaphore(device)
+            semaphore.acquire()
+            held.append(semaphore)
+        return held
+
+    @staticmethod
+    def release(held):
+        for semaphore in reversed(held):
+            semaphore.release()
+
+# -----------------------------
+# Execução do lote
+def run_batch(pairs, output_folder, workers=DEFAULT_WORKERS, per_device=None, on_progress=None, convert=convert_pair, manifest=None,
+              progress_interval=PROGRESS_INTERVAL, **options):
+    """Converte os pares (bin, cue) em paralelo e retorna [(sucesso, mensagem), ...] na ordem dada.
+
+    `per_device` limita quantos trabalhos leem ou escrevem no mesmo dispositivo
+    ao mesmo tempo. `on_progress(state)` recebe um `BatchProgress` com o
+    progresso geral do lote (média dos trabalhos, taxa e ETA) no máximo a cada
+    `progress_interval` segundos, mais um por disco concluído e um final com
+    `finished=True`; pode ser chamado de várias threads, mas nunca em
+    paralelo. A falha de um disco não interrompe os demais. `options` são
+    repassadas para `convert`.
+
+    Com um `manifest` (`ps1_manifest.Manifest`), discos já convertidos com as
+    mesmas opções e sem alterações são pulados, e conversões interrompidas são
+    retomadas; o manifesto é gravado de novo ao fim do lote, mesmo se ele falhar. Com `verify` ou `dat_index` nenhum disco é pulado: os hashes só
+    são calculados durante a conversão.
+
+    Dois discos que gerariam os mesmos arquivos de saída (ex.: `a/jogo.cue` e
+    `b/jogo.cue`) nunca rodam juntos: só o primeiro é convertido e os demais
+    falham com uma mensagem explicando o conflito.
+    """
+    pairs = list(pairs)
+    total = len(pairs)
+    if not total:
+        return []
+    percents = [0.0] * total
+    # Peso de cada disco no progresso geral: tamanho das origens (o ETA fica proporcional aos bytes)
+    weights = [sum(entry[0] for entry in (source_fingerprint(cue_file) or {}).values()) or 1 for _, cue_file in pairs]
+    total_weight = sum(weights)
+    image_bytes = [0] * total
+    finished_discs = [False] * total
+    progress_lock = threading.Lock()
+    limiter = DeviceLimiter(per_device)
+    conversion_options = output_options(options)
+    # A verificação é o objetivo da execução: não dá para pular discos já convertidos
+    skip_done = not options.get("verify") and options.get("dat_index") is None
+    throttle = Throttle(on_progress, progress_interval, phase_changes=False) if on_progress else None
+    started = time.monotonic()
+    state = BatchProgress(total)
+
+    def snapshot(index, event, finished=False):
+        elapsed = time.monotonic() - started
+        percent = sum(p * w for p, w in zip(percents, weights)) / total_weight
+        bytes_done = sum(image_bytes)
+        rate = bytes_done / elapsed if elapsed > 0 else 0.0
+        eta = max(total_weight - bytes_done, 0) / rate if rate > 0 and not finished else None
+        return BatchProgress(total, state.discs_done, percent, bytes_done, rate, eta, index + 1, event, finished)
+
+    def report(index, event):
+        with progress_lock:
+            percents[index] = event.percent
+            if event.phase == PHASE_IMAGE:
+                image_bytes[index] = event.bytes_done
+            if event.result is not None and not finished_discs[index]:
+                finished_discs[index] = True
+                state.discs_done += 1
+            state.index, state.current = index, event
+            if throttle:
+                throttle(snapshot(index, event))
+
+    def finish(index, result):
+        report(index, ProgressEvent(PHASE_DONE, os.path.splitext(os.path.basename(pairs[index][1]))[0], 100.0, result=result))
+        return result
+
+    def duplicate_outputs():
+        # Índice do disco -> índice do primeiro disco que já gera os mesmos arquivos
+        owners = {}
+        duplicates = {}
+        for index, (_, cue_file) in enumerate(pairs):
+            paths = output_files_for(cue_file, output_folder, options.get("output_format", "img"), options.get("compression"))
+            keys = [os.path.normcase(os.path.abspath(path)) for path in paths]
+            owner = next((owners[key] for key in keys if key in owners), None)
+            if owner is not None:
+                duplicates[index] = owner
+                continue
+            for key in keys:
+                owners[key] = index
+        return duplicates
+
+    def job(index, bin_file, cue_file):
+        held = limiter.acquire([os.path.dirname(os.path.abspath(cue_file)), output_folder])
+        try:
+            job_options = options
+            if manifest is not None:
+                outputs = output_files_for(cue_file, output_folder, options.get("output_format", "img"), options.get("compression"))
+                fingerprint = manifest.fingerprint(cue_file)
+                manifest_state = manifest.status(cue_file, fingerprint, outputs, conversion_options)
+                if manifest_state == "done" and skip_done:
+                    msg = f"Sem alterações desde a última conversão, pulando: {os.path.basename(cue_file)}"
+                    return finish(index, (True, msg))
+                manifest.mark_started(cue_file, fingerprint, conversion_options)
+                job_options = dict(options, resume=manifest_state == "partial")
+            success, msg = convert(bin_file, cue_file, output_folder, lambda event: report(index, event), **job_options)
+            if success and manifest is not None:
+                manifest.mark_done(cue_file, fingerprint, outputs, conversion_options)
+            return success, msg
+        except Exception as e:
+            return finish(index, (False, f"Erro durante a conversão: {e}"))
+        finally:
+            limiter.release(held)
+            with progress_lock:
+                percents[index] = 100.0
+
+    results = [None] * total
+    duplicates = duplicate_outputs()
+    for i, owner in duplicates.items():
+        msg = (f"Saída duplicada: {os.path.basename(pairs[i][1])} geraria os mesmos arquivos que "
+               f"{pairs[owner][1]}; renomeie um deles ou use outra pasta de saída.")
+        results[i] = finish(i, (False, msg))
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {i: executor.submit(job, i, bin_file, cue_file)
+                       for i, (bin_file, cue_file) in enumerate(pairs) if i not in duplicates}
+            for i, future in futures.items():
+                results[i] = future.result()
+    finally:
+        if manifest is not None:
+            manifest.flush()  # O manifesto acumula as alterações; grava o que faltar
+    if throttle:
+        with progress_lock:
+            on_progress(snapshot(state.index, state.current, finished=True))
+    return results
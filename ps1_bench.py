@@ -0,0 +1,334 @@
+"""Benchmarks da conversão sobre um corpus sintético de discos BIN/CUE.
+
+Gera discos parecidos com os de PS1 (faixa de dados Mode2/2352 com
+sync/cabeçalho/EDC/ECC válidos e N faixas de áudio, em um .bin por faixa ou
+num .bin único), mede `parse_cue_file`, `validate_bin_cue` e
+`convert_to_img_ccd_sub` com cada backend de cópia e formato de saída, e grava
+MB/s, pico de RSS e a latência de cada fase em JSON comparável entre execuções.
+
+Uso:
+    python ps1_bench.py --sizes 1,64,800 --audio-tracks 3 -o bench.json
+    python ps1_bench.py --sizes 64 --backends buffered,copy_file_range --compare bench.json
+
+Cada caso roda num processo Python separado, para que o pico de RSS seja só
+daquele caso. Gerar o corpus requer NumPy.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from ps1_ecc import MODE2_FORM1, regenerate, require_numpy
+from ps1_io import AUTO_ORDER
+from ps1_sectors import LBA_OFFSET, SECTOR_SIZE, msf_bcd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_VERSION = 1
+DEFAULT_SIZES = (1, 64, 800)  # MB
+DEFAULT_AUDIO_TRACKS = 3
+DATA_FRACTION = 0.7  # Parte do disco ocupada pela faixa de dados
+PREGAP_FRAMES = 150  # INDEX 00 -> INDEX 01 das faixas de áudio (2 s)
+GENERATE_BATCH = 4096  # setores por lote na geração
+
+# -----------------------------
+# Corpus sintético
+def _data_sectors(first_lba, count, rng):
+    """Setores Mode2 Form1 com sync, cabeçalho MSF, subheader, EDC e ECC válidos."""
+    np = require_numpy()
+    sectors = np.zeros((count, SECTOR_SIZE), dtype=np.uint8)
+    sectors[:, 12], sectors[:, 13], sectors[:, 14] = msf_bcd(np.arange(first_lba, first_lba + count) + LBA_OFFSET)
+    sectors[:, 0x10:0x18] = [0, 0, 0x08, 0, 0, 0, 0x08, 0]  # subheader de dados (Form 1), repetido
+    # Metade dos setores com conteúdo aleatório e metade com padrões repetitivos, como num jogo real
+    user = sectors[:, 0x18:0x818]
+    noisy = rng.random(count) < 0.5
+    user[noisy] = rng.integers(0, 256, (int(noisy.sum()), 0x800), dtype=np.uint8)
+    user[~noisy] = (np.arange(0x800, dtype=np.uint8) & 0x3F)[None, :]
+    return regenerate(sectors, MODE2_FORM1)
+
+def _audio_sectors(first_lba, count, rng):
+    """PCM 16 bits estéreo: senoide com ruído (pouco compressível, como áudio real)."""
+    np = require_numpy()
+    samples = np.arange(first_lba * 588, (first_lba + count) * 588)
+    wave = 8000 * np.sin(samples * (2 * np.pi * 440 / 44100)) + rng.normal(0, 600, len(samples))
+    pcm = np.repeat(wave.astype("<i2")[:, None], 2, axis=1)
+    return pcm.view(np.uint8).reshape(count, SECTOR_SIZE)
+
+def _write_sectors(f, first_lba, count, make, rng):
+    for start in range(0, count, GENERATE_BATCH):
+        batch = min(GENERATE_BATCH, count - start)
+        f.write(make(first_lba + start, batch, rng).tobytes())
+
+def generate_disc(folder, name, size_mb, audio_tracks=DEFAULT_AUDIO_TRACKS, multi_file=True, seed=0):
+    """Gera `name`.cue e os .bin de um disco de ~`size_mb` MB e retorna o caminho do .cue.
+
+    Discos já gerados com os mesmos parâmetros são reaproveitados.
+    """
+    np = require_numpy("gerar o corpus do benchmark")
+    os.makedirs(folder, exist_ok=True)
+    cue_path = os.path.join(folder, f"{name}.cue")
+    params_path = os.path.join(folder, f"{name}.json")
+    params = {"size_mb": size_mb, "audio_tracks": audio_tracks, "multi_file": multi_file, "seed": seed}
+    try:
+        with open(params_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == params and os.path.exists(cue_path):
+                return cue_path
+    except (OSError, ValueError):
+        pass
+
+    rng = np.random.default_rng(seed)
+    total = size_mb * 1024 * 1024 // SECTOR_SIZE
+    data_count = max(int(total * DATA_FRACTION) if audio_tracks else total, 16)
+    # Cada faixa de áudio precisa caber o pregap e ao menos 1 s de áudio
+    audio_count = max((total - data_count) // audio_tracks, PREGAP_FRAMES + 75) if audio_tracks else 0
+    tracks = [("MODE2/2352", data_count, _data_sectors)] + [("AUDIO", audio_count, _audio_sectors)] * audio_tracks
+
+    lines = []
+    single = None
+    if not multi_file:
+        single = open(os.path.join(folder, f"{name}.bin"), 'wb')
+        lines.append(f'FILE "{name}.bin" BINARY')
+    try:
+        lba = 0
+        file_lba = 0
+        for number, (mode, count, make) in enumerate(tracks, 1):
+            if multi_file:
+                bin_name = f"{name} (Track {number:02d}).bin"
+                lines.append(f'FILE "{bin_name}" BINARY')
+                file_lba = lba
+            lines.append(f"  TRACK {number:02d} {mode}")
+            if mode == "AUDIO":
+                lines.append(f"    INDEX 00 {_msf(lba - file_lba)}")
+                lines.append(f"    INDEX 01 {_msf(lba - file_lba + PREGAP_FRAMES)}")
+            else:
+                lines.append(f"    INDEX 01 {_msf(lba - file_lba)}")
+            if multi_file:
+                with open(os.path.join(folder, bin_name), 'wb') as f:
+                    _write_sectors(f, lba, count, make, rng)
+            else:
+                _write_sectors(single, lba, count, make, rng)
+            lba += count
+    finally:
+        if single:
+            single.close()
+    with open(cue_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    with open(params_path, 'w', encoding='utf-8') as f:
+        json.dump(params, f)
+    return cue_path
+
+def _msf(frames):
+    return f"{frames // (60 * 75):02d}:{(frames // 75) % 60:02d}:{frames % 75:02d}"
+
+# -----------------------------
+# Execução de um caso (no processo filho)
+def _peak_rss_mb():
+    # No Linux, ru_maxrss herda o pico do processo pai (o fork acontece depois de gerar o corpus);
+    # VmHWM conta só a memória do próprio processo
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_case(cue_file, backend="auto", variant="img", generate_sub=False):
+    """Mede parse, validação e conversão de um disco e retorna o resultado (dict)."""
+    from ps1_cue import clear_cache
+    from ps1_engine import convert_pair, find_bin_for_cue, parse_cue_file, validate_bin_cue
+    from ps1_metrics import Metrics
+
+    output_format, _, compression = variant.partition(".")
+    result = {"disc": os.path.basename(cue_file), "backend": backend, "variant": variant}
+    clear_cache()  # Mede a interpretação do .cue a frio, sem o cache LRU
+    started = time.perf_counter()
+    bin_files, tracks, error = parse_cue_file(cue_file)
+    result["parse_s"] = time.perf_counter() - started
+    cue_dir = os.path.dirname(cue_file)
+    result["size_bytes"] = sum(os.path.getsize(os.path.join(cue_dir, name)) for name in bin_files)
+    result["tracks"] = len(tracks)
+    result["files"] = len(bin_files)
+
+    started = time.perf_counter()
+    is_valid, error = validate_bin_cue(find_bin_for_cue(cue_file), cue_file)
+    result["validate_s"] = time.perf_counter() - started
+    if not is_valid:
+        result["error"] = error
+        return result
+
+    # Latência de cada fase: do primeiro evento da fase até o primeiro da fase seguinte
+    phase_starts = []
+
+    def on_progress(event):
+        if not phase_starts or phase_starts[-1][0] != event.phase:
+            phase_starts.append((event.phase, time.perf_counter()))
+
+    metrics = Metrics()
+    output_folder = tempfile.mkdtemp(prefix="ps1_bench_", dir=os.path.dirname(cue_file))
+    try:
+        started = time.perf_counter()
+        success, msg = convert_pair(find_bin_for_cue(cue_file), cue_file, output_folder, on_progress, progress_interval=0,
+                                    copy_backend=backend, output_format=output_format, compression=compression or None,
+                                    generate_sub=generate_sub, metrics=metrics)
+        elapsed = time.perf_counter() - started
+        result["output_bytes"] = sum(entry.stat().st_size for entry in os.scandir(output_folder))
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+    if not success:
+        result["error"] = msg
+        return result
+    phase_starts.insert(0, ("start", started))
+    result["phases"] = {phase: round(phase_starts[i + 1][1] - at, 6)
+                        for i, (phase, at) in enumerate(phase_starts[:-1]) if phase != "start"}
+    # Tempo, bytes e blocos registrados pelo próprio motor, sem o custo de quem consome os eventos
+    result["metrics"] = metrics.to_dict()["phases"]
+    result["convert_s"] = elapsed
+    result["mb_s"] = result["size_bytes"] / (1024 * 1024) / elapsed if elapsed > 0 else None
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+def _run_isolated(cue_file, backend, variant, generate_sub):
+    """Roda `run_case` num processo novo e retorna o resultado."""
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", json.dumps([cue_file, backend, variant, generate_sub])]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        return {"disc": os.path.basename(cue_file), "backend": backend, "variant": variant,
+                "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"código {completed.returncode}"}
+    return json.loads(completed.stdout)
+
+def _drop_caches():
+    """Esvazia o page cache (só como root no Linux), para medir leituras a frio."""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", 'w') as f:
+            f.write("3")
+        return True
+    except OSError:
+        return False
+
+# -----------------------------
+# Suíte e comparação
+def run_suite(cue_files, backends=("auto",), variants=("img",), repeat=1, cold=False, generate_sub=False, on_case=None):
+    """Roda todos os casos (disco x backend x variante) e retorna o relatório (dict).
+
+    Com `repeat` > 1, fica o resultado com a menor duração de conversão.
+    """
+    cases = []
+    for cue_file in cue_files:
+        for backend in backends:
+            for variant in variants:
+                runs = []
+                for _ in range(max(1, repeat)):
+                    dropped = _drop_caches() if cold else False
+                    run = _run_isolated(cue_file, backend, variant, generate_sub)
+                    run["cold_cache"] = dropped
+                    runs.append(run)
+                ok = [run for run in runs if "error" not in run]
+                case = min(ok, key=lambda run: run["convert_s"]) if ok else runs[-1]
+                cases.append(case)
+                if on_case:
+                    on_case(case)
+    return {
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": _numpy_version(),
+        "cases": cases,
+    }
+
+def _numpy_version():
+    try:
+        return require_numpy().__version__
+    except RuntimeError:
+        return None
+
+def _case_key(case):
+    return (case["disc"], case["backend"], case["variant"])
+
+def compare(baseline, current, threshold=10.0):
+    """Compara MB/s de cada caso com a linha de base; retorna [(caso, antes, depois, variação %, regressão)]."""
+    before = {_case_key(case): case for case in baseline.get("cases", [])}
+    rows = []
+    for case in current.get("cases", []):
+        old = before.get(_case_key(case))
+        if not old or not old.get("mb_s") or not case.get("mb_s"):
+            continue
+        change = (case["mb_s"] - old["mb_s"]) / old["mb_s"] * 100
+        rows.append((case, old["mb_s"], case["mb_s"], change, change < -threshold))
+    return rows
+
+def _format_case(case):
+    if "error" in case:
+        return f"{case['disc']:<28} {case['backend']:<16} {case['variant']:<10} ERRO: {case['error']}"
+    phases = " ".join(f"{phase}={seconds * 1000:.0f}ms" for phase, seconds in case["phases"].items())
+    return (f"{case['disc']:<28} {case['backend']:<16} {case['variant']:<10} {case['mb_s']:8.1f} MB/s "
+            f"RSS {case['peak_rss_mb']} MB  parse={case['parse_s'] * 1000:.2f}ms "
+            f"validate={case['validate_s'] * 1000:.2f}ms {phases}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ps1-bench", description="Benchmarks da conversão BIN/CUE sobre um corpus sintético.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "ps1_bench_corpus"), help="pasta do corpus (reaproveitada entre execuções)")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="tamanhos dos discos, em MB (ex.: 1,64,800)")
+    parser.add_argument("--audio-tracks", type=int, default=DEFAULT_AUDIO_TRACKS, help="faixas de áudio por disco")
+    parser.add_argument("--single-file", action="store_true", help="um .bin único por disco, em vez de um por faixa")
+    parser.add_argument("--backends", default="auto", help=f"backends de cópia separados por vírgula ({', '.join(['auto'] + AUTO_ORDER)})")
+    parser.add_argument("--variants", default="img", help="formatos de saída separados por vírgula (ex.: img,ecm,ecm.zstd,img.zlib)")
+    parser.add_argument("--generate-sub", action="store_true", help="inclui a geração do .sub sintético (fase sub)")
+    parser.add_argument("--repeat", type=int, default=1, help="repetições por caso (fica a mais rápida)")
+    parser.add_argument("--cold", action="store_true", help="esvazia o page cache antes de cada caso (requer root)")
+    parser.add_argument("-o", "--output", help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--compare", help="relatório JSON anterior para comparar MB/s")
+    parser.add_argument("--threshold", type=float, default=10.0, help="queda de MB/s (em %%) considerada regressão")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.run_case:
+        print(json.dumps(run_case(*json.loads(args.run_case))))
+        return 0
+
+    layout = "single" if args.single_file else "multi"
+    cue_files = []
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        name = f"bench_{size}mb_{args.audio_tracks}a_{layout}"
+        print(f"Gerando {name}...", file=sys.stderr)
+        cue_files.append(generate_disc(os.path.join(args.corpus, name), name, size, args.audio_tracks, not args.single_file))
+
+    report = run_suite(cue_files, args.backends.split(","), args.variants.split(","), args.repeat, args.cold, args.generate_sub,
+                       on_case=lambda case: print(_format_case(case), file=sys.stderr))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            rows = compare(json.load(f), report, args.threshold)
+        for case, before, after, change, regression in rows:
+            flag = "REGRESSÃO" if regression else "ok"
+            print(f"{case['disc']:<28} {case['backend']:<16} {case['variant']:<10} {before:8.1f} -> {after:8.1f} MB/s "
+                  f"({change:+.1f}%) {flag}", file=sys.stderr)
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Contêiner comprimido em blocos (.ps1z) com índice para acesso aleatório.
+
+Layout:
+    cabeçalho  "<4sBBHI": b"PS1Z", versão, codec, reservado, tamanho do bloco
+    blocos     cada bloco de `chunk_size` bytes comprimido de forma independente
+    índice     "<QI" por bloco: offset no arquivo e tamanho comprimido
+    rodapé     "<QQI4s": offset do índice, tamanho descomprimido, nº de blocos, b"PS1Z"
+
+Os blocos são comprimidos em um pool de threads (zlib, lzma e zstd liberam o
+GIL) enquanto quem escreve continua lendo a entrada; no máximo
+`2 * workers` blocos ficam em memória ao mesmo tempo.
+"""
+import io
+import lzma
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional
+    zstandard = None
+
+MAGIC = b"PS1Z"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI")
+INDEX_ENTRY = struct.Struct("<QI")
+FOOTER = struct.Struct("<QQI4s")
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+CODECS = {"store": 0, "zlib": 1, "lzma": 2, "zstd": 3}
+CODEC_NAMES = {value: name for name, value in CODECS.items()}
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("O pacote 'zstandard' é necessário para o codec zstd (pip install zstandard).")
+
+def _compressor(codec):
+    if codec == "store":
+        return bytes
+    if codec == "zlib":
+        return lambda data: zlib.compress(data, 6)
+    if codec == "lzma":
+        return lambda data: lzma.compress(data, preset=6)
+    if codec == "zstd":
+        _require_zstd()
+        return lambda data: zstandard.ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Codec desconhecido: {codec}")
+
+def _decompressor(codec):
+    if codec == "store":
+        return bytes
+    if codec == "zlib":
+        return zlib.decompress
+    if codec == "lzma":
+        return lzma.decompress
+    if codec == "zstd":
+        _require_zstd()
+        return lambda data: zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Codec desconhecido: {codec}")
+
+# -----------------------------
+# Escrita
+class ChunkWriter:
+    """Objeto tipo arquivo (write/close) que grava o contêiner em `file_obj`."""
+
+    def __init__(self, file_obj, codec="zlib", chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+        self._file = file_obj
+        self._codec = codec
+        self._compress = _compressor(codec)
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._max_pending = max(1, workers) * 2
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._index = []
+        self._total = 0
+        self._file.write(HEADER.pack(MAGIC, VERSION, CODECS[codec], 0, chunk_size))
+        self._offset = HEADER.size
+
+    def write(self, data):
+        self._buffer += data
+        self._total += len(data)
+        while len(self._buffer) >= self._chunk_size:
+            chunk = bytes(self._buffer[:self._chunk_size])
+            del self._buffer[:self._chunk_size]
+            self._submit(chunk)
+        return len(data)
+
+    def _submit(self, chunk):
+        self._pending.append(self._executor.submit(self._compress, chunk))
+        while len(self._pending) >= self._max_pending:
+            self._write_next()
+
+    def _write_next(self):
+        compressed = self._pending.popleft().result()
+        self._file.write(compressed)
+        self._index.append((self._offset, len(compressed)))
+        self._offset += len(compressed)
+
+    def close(self):
+        if self._executor is None:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+        finally:
+            self._executor.shutdown()
+            self._executor = None
+        for offset, size in self._index:
+            self._file.write(INDEX_ENTRY.pack(offset, size))
+        self._file.write(FOOTER.pack(self._offset, self._total, len(self._index), MAGIC))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# -----------------------------
+# Leitura
+class ChunkReader(io.RawIOBase):
+    """Leitor do contêiner, com leitura sequencial (`read`) e aleatória (`read_at`).
+
+    É um `io.RawIOBase`, então pode ser envolvido em `io.BufferedReader`.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self._file = open(path, 'rb')
+        try:
+            magic, version, codec, _, self.chunk_size = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} não é um contêiner .ps1z válido")
+            self._file.seek(-FOOTER.size, os.SEEK_END)
+            index_offset, self.size, count, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: rodapé do contêiner corrompido")
+            self._file.seek(index_offset)
+            raw_index = self._file.read(count * INDEX_ENTRY.size)
+            self._index = [INDEX_ENTRY.unpack_from(raw_index, i * INDEX_ENTRY.size) for i in range(count)]
+            self.codec = CODEC_NAMES[codec]
+            self._decompress = _decompressor(self.codec)
+        except Exception:
+            self._file.close()
+            raise
+        self._position = 0
+        self._cached = (None, b"")
+
+    def _chunk(self, number):
+        if self._cached[0] != number:
+            offset, size = self._index[number]
+            self._file.seek(offset)
+            self._cached = (number, self._decompress(self._file.read(size)))
+        return self._cached[1]
+
+    def read_at(self, offset, size):
+        """Lê `size` bytes a partir de `offset` descomprimindo só os blocos necessários."""
+        size = max(0, min(size, self.size - offset))
+        parts = []
+        while size > 0:
+            number, start = divmod(offset, self.chunk_size)
+            piece = self._chunk(number)[start:start + size]
+            if not piece:
+                break
+            parts.append(piece)
+            offset += len(piece)
+            size -= len(piece)
+        return b"".join(parts)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.read_at(self._position, len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
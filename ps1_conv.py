@@ -0,0 +1,269 @@
+"""Linha de comando do conversor BIN/CUE -> IMG/CCD/SUB.
+
+Uso:
+    python ps1_conv.py jogo.cue -o saida
+    python ps1_conv.py "discos/*.cue" -o saida --json
+    python ps1_conv.py jogo.cue -o saida --format ecm --compress zstd
+    python ps1_conv.py saida/jogo.img.ecm.ps1z -o restaurado --decode
+    python ps1_conv.py --scan /nas/ps1 --index biblioteca.json --failure-report falhas.txt
+    python ps1_conv.py --index biblioteca.json --select "*Final Fantasy*" -o saida
+    python ps1_conv.py "discos/*.cue" -o saida --metrics-json metricas.json --metrics-prom ps1.prom
+    python ps1_conv.py "discos/*.cue" --check --error-map erros.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from ps1_engine import validate_bin_cue, find_bin_for_cue
+from ps1_batch import run_batch, DEFAULT_WORKERS
+from ps1_container import CODECS
+from ps1_ecm import unpack_file
+from ps1_integrity import CHECK_WORKERS, check_disc, describe_flags, write_error_map
+from ps1_library import SCAN_WORKERS, LibraryIndex, write_failure_report
+from ps1_metrics import NULL_DISC, PHASE_PARSE, Metrics
+from ps1_io import BACKENDS, BUFFER_SIZE, PIPELINE_BUFFERS, PipelineOptions
+from ps1_progress import PROGRESS_INTERVAL
+from ps1_verify import DatIndex, write_report
+from ps1_manifest import Manifest
+
+# -----------------------------
+# Expansão de entradas (globs em lote)
+def expand_inputs(patterns):
+    """Expande globs e retorna a lista de arquivos .cue, sem repetições e na ordem dada."""
+    cue_files = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for cue_file in matches:
+            key = os.path.abspath(cue_file)
+            if key not in seen:
+                seen.add(key)
+                cue_files.append(cue_file)
+    return cue_files
+
+# -----------------------------
+# Conversão em lote
+def convert_batch(cue_files, output_folder, on_progress=None, workers=DEFAULT_WORKERS, per_device=None, **options):
+    """Valida e converte cada .cue, retornando uma lista de resultados (dicts).
+
+    Com `metrics` em `options`, a validação (que lê o .cue) entra na fase "parse" de cada disco.
+    """
+    results = []
+    pending = []
+    metrics = options.get("metrics")
+    for cue_file in cue_files:
+        bin_file = find_bin_for_cue(cue_file)
+        recorder = metrics.disc(cue_file) if metrics else NULL_DISC
+        with recorder.phase(PHASE_PARSE) as stats:
+            is_valid, error_msg = validate_bin_cue(bin_file, cue_file)
+        if not is_valid:
+            stats.fail()
+            recorder.finish((False, error_msg))
+        result = {"cue": cue_file, "bin": bin_file, "success": is_valid, "message": error_msg}
+        results.append(result)
+        if is_valid:
+            pending.append(result)
+
+    outcomes = run_batch([(r["bin"], r["cue"]) for r in pending], output_folder, workers, per_device, on_progress, **options)
+    for result, (success, msg) in zip(pending, outcomes):
+        result["success"], result["message"] = success, msg
+    return results
+
+def decode_batch(packed_files, output_folder, on_progress=None):
+    """Restaura a .img de cada .img.ecm/.ps1z, retornando uma lista de resultados (dicts).
+
+    `on_progress(msg)` recebe uma linha de texto a cada bloco restaurado.
+    """
+    results = []
+    for number, packed_file in enumerate(packed_files, 1):
+        def report(written, name=os.path.basename(packed_file)):
+            if on_progress:
+                on_progress(f"[{number}/{len(packed_files)}] Restaurando {name}... {written / (1024 * 1024):.0f} MB")
+        try:
+            output_path = unpack_file(packed_file, output_folder, report)
+            result = {"input": packed_file, "output": output_path, "success": True, "message": f"Imagem restaurada: {output_path}"}
+        except Exception as e:
+            result = {"input": packed_file, "output": None, "success": False, "message": f"Erro ao restaurar: {e}"}
+        results.append(result)
+    return results
+
+# -----------------------------
+# Verificação de setores
+def check_discs(cue_files, workers=CHECK_WORKERS, on_progress=None):
+    """Verifica sync, cabeçalho, EDC e ECC dos setores de dados de cada disco.
+
+    Retorna (resultados, relatórios); `on_progress(msg)` recebe uma linha de texto por lote verificado.
+    """
+    results = []
+    reports = []
+    for number, cue_file in enumerate(cue_files, 1):
+        def report(done, total, name=os.path.basename(cue_file)):
+            if on_progress:
+                on_progress(f"[{number}/{len(cue_files)}] Verificando setores de {name}... {done / max(total, 1) * 100:.1f}%")
+        try:
+            check = check_disc(cue_file, workers, report)
+        except Exception as e:
+            results.append({"cue": cue_file, "success": False, "message": f"Erro ao verificar os setores: {e}"})
+            continue
+        reports.append(check)
+        if check["status"] == "ok":
+            message = f"{check['sectors_checked']} setores de dados íntegros."
+        else:
+            kinds = ", ".join(f"{name}: {count}" for name, count in check["summary"].items())
+            message = f"{check['bad_sectors']} setores danificados ({kinds})"
+            if check["errors"]:
+                lba, count, flags = check["errors"][0]
+                message += f"; primeiro no LBA {lba} ({describe_flags(flags)})"
+            if check["sectors_missing"]:
+                message += f"; {check['sectors_missing']} setores faltando no .bin"
+        results.append({"cue": cue_file, "success": check["status"] == "ok", "message": message, "integrity": check})
+    return results, reports
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ps1-conv", description="Converte BIN/CUE para IMG/CCD/SUB.")
+    parser.add_argument("inputs", nargs="*", help="arquivos .cue, arquivos compactados (.zip, .tar.gz, .7z) ou globs "
+                                                  "(ex.: 'discos/*.cue'); com --decode, arquivos .ecm/.ps1z")
+    parser.add_argument("-o", "--output", help="pasta de saída (obrigatória para converter)")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS, help="conversões simultâneas")
+    parser.add_argument("--per-device", type=int, default=None, help="máximo de conversões simultâneas por dispositivo")
+    parser.add_argument("--copy-backend", choices=["auto"] + list(BACKENDS), default="auto", help="backend de cópia do .img/.sub")
+    parser.add_argument("--buffer-size", type=float, default=BUFFER_SIZE / (1024 * 1024), help="tamanho de cada buffer de leitura, em MB")
+    parser.add_argument("--buffers", type=int, default=PIPELINE_BUFFERS, help="buffers do pipeline de leitura (1 = sem sobreposição)")
+    parser.add_argument("--fadvise", action="store_true", help="leitura sequencial e descarte do page cache já copiado (lotes grandes)")
+    parser.add_argument("--direct", action="store_true", help="lê a origem com O_DIRECT, sem passar pelo page cache")
+    parser.add_argument("--sparse", action="store_true", help="pré-aloca o .img e grava os blocos zerados como buracos (economiza espaço)")
+    parser.add_argument("--verify", action="store_true", help="calcula CRC32/MD5/SHA-1 durante a conversão")
+    parser.add_argument("--dat", help="DAT Redump/No-Intro (XML) para conferir os hashes (implica --verify)")
+    parser.add_argument("--verify-report", help="grava o relatório de verificação em JSON neste arquivo")
+    parser.add_argument("--generate-sub", action="store_true", help="gera um .sub sintético (P/Q) quando a origem não tem .sub; requer NumPy")
+    parser.add_argument("--format", choices=["img", "ecm"], default="img", help="formato da imagem: .img ou .img.ecm (ECM requer NumPy)")
+    parser.add_argument("--compress", choices=list(CODECS), default=None, help="grava a imagem em um contêiner .ps1z comprimido em blocos")
+    parser.add_argument("--compress-workers", type=int, default=None, help="threads de compressão por disco (padrão: nº de CPUs)")
+    parser.add_argument("--check", action="store_true", help="verifica sync/cabeçalho/EDC/ECC de cada setor de dados; "
+                                                            "com -o, só converte os discos íntegros")
+    parser.add_argument("--check-workers", type=int, default=CHECK_WORKERS, help="threads da verificação de setores")
+    parser.add_argument("--error-map", help="grava o mapa de setores danificados (JSON) neste arquivo")
+    parser.add_argument("--decode", action="store_true", help="restaura a .img original de arquivos .img.ecm/.ps1z")
+    parser.add_argument("--scan", action="append", default=[], metavar="PASTA", help="varre a pasta recursivamente e atualiza o índice da biblioteca")
+    parser.add_argument("--index", help="índice da biblioteca (padrão: o ps1_library.json da primeira pasta de --scan, se existir; senão, um no cache do usuário)")
+    parser.add_argument("--select", action="append", default=[], metavar="PADRÃO", help="converte os discos válidos do índice cujo nome/caminho casa com o glob")
+    parser.add_argument("--scan-workers", type=int, default=SCAN_WORKERS, help="threads da varredura")
+    parser.add_argument("--failure-report", help="grava os discos com falha na varredura (.json ou texto)")
+    parser.add_argument("--force", action="store_true", help="reconverte tudo, ignorando o manifesto da pasta de saída")
+    parser.add_argument("--hash-inputs", action="store_true", help="inclui o CRC32 dos arquivos de origem no manifesto")
+    parser.add_argument("--metrics-json", help="grava tempo, bytes, blocos e erros por disco e por fase neste JSON")
+    parser.add_argument("--metrics-prom", help="grava as métricas no formato textfile do Prometheus (node_exporter)")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON na saída padrão")
+    parser.add_argument("-q", "--quiet", action="store_true", help="não mostra o progresso")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    last_shown = 0.0
+
+    def show(msg, force=False):
+        # Linha de status sobrescrita no stderr, no máximo a cada PROGRESS_INTERVAL
+        nonlocal last_shown
+        now = time.monotonic()
+        if force or now - last_shown >= PROGRESS_INTERVAL:
+            last_shown = now
+            print(f"\r{msg:<100}", end="", file=sys.stderr, flush=True)
+
+    def on_progress(state):
+        # Os eventos do lote já chegam limitados e agregados; só o estado mais recente é mostrado
+        show(state.describe(), force=True)
+
+    cue_files = expand_inputs(args.inputs)
+    if args.scan or args.index or args.select:
+        if not args.index and not args.scan:
+            parser.error("--select requer --index ou --scan")
+        library = LibraryIndex(args.index) if args.index else LibraryIndex.for_folder(args.scan[0])
+        if args.scan:
+            def on_scanned(done, total, path):
+                show(f"Verificando [{done}/{total}] {os.path.basename(path)}", force=done == total)
+            failures = library.scan(args.scan, args.scan_workers, None if args.quiet else on_scanned)
+            if not args.quiet:
+                print(file=sys.stderr)
+            print(f"{len(library)} discos no índice {library.path}; {len(failures)} com falha nesta varredura.", file=sys.stderr)
+            if library.save_error:
+                print(f"Aviso: não foi possível gravar o índice ({library.save_error}); a varredura vale só para esta execução.",
+                      file=sys.stderr)
+            if args.failure_report:
+                write_failure_report(failures, args.failure_report)
+            elif failures and not args.quiet:
+                for entry in failures:
+                    print(f"[FALHA] {entry['path']}: {entry['message']}", file=sys.stderr)
+        if args.select or (args.scan and args.output):
+            cue_files += [entry["path"] for entry in library.select(args.select)]
+        if not args.output and not args.inputs:
+            return 0  # Só varredura
+    damaged = []
+    if args.check and not args.decode:
+        checked, check_reports = check_discs(cue_files, args.check_workers, None if args.quiet else show)
+        if args.error_map:
+            write_error_map(check_reports, args.error_map)
+        if not args.output:
+            return _print_results(checked, args)  # Só verificação
+        damaged = [result for result in checked if not result["success"]]
+        bad = {result["cue"] for result in damaged}
+        cue_files = [cue_file for cue_file in cue_files if cue_file not in bad]
+    if not args.output:
+        parser.error("-o/--output é obrigatório para converter")
+    if not cue_files and damaged:
+        return _print_results(damaged, args)
+    if not cue_files:
+        print("Nenhum arquivo de entrada encontrado." if args.decode else "Nenhum arquivo .cue encontrado.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    if args.decode:
+        return _print_results(decode_batch(cue_files, args.output, None if args.quiet else show), args)
+
+    dat_index = DatIndex.load(args.dat) if args.dat else None
+    metrics = Metrics() if args.metrics_json or args.metrics_prom else None
+    reports = {}
+
+    def on_verified(report):
+        reports[report["cue"]] = report
+
+    results = convert_batch(cue_files, args.output, None if args.quiet else on_progress, args.workers, args.per_device,
+                            copy_backend=args.copy_backend, verify=args.verify or bool(args.verify_report),
+                            dat_index=dat_index, on_verified=on_verified, generate_sub=args.generate_sub,
+                            output_format=args.format, compression=args.compress, compress_workers=args.compress_workers, sparse=args.sparse,
+                            pipeline=PipelineOptions(int(args.buffer_size * 1024 * 1024), args.buffers, args.fadvise, args.direct),
+                            manifest=None if args.force else Manifest.for_folder(args.output, args.hash_inputs),
+                            metrics=metrics)
+    results = damaged + results
+    for result in results:
+        if result["cue"] in reports:
+            result["verification"] = reports[result["cue"]]
+    if args.verify_report:
+        write_report(list(reports.values()), args.verify_report)
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+    return _print_results(results, args)
+
+def _print_results(results, args):
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    if args.json:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for result in results:
+            status = "OK" if result["success"] else "FALHA"
+            print(f"[{status}] {result.get('cue', result.get('input'))}: {result['message']}")
+            if "status" in result.get("verification", {}):
+                print(f"        Verificação DAT: {result['verification']['status']}")
+    return 0 if all(result["success"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, Listbox
-from PIL import Image, ImageTk
 import os
 from pathlib import Path
-import pygame
 import threading
 import queue
-import shutil
-import re
+import fnmatch
+from ps1_progress import LatestValue
+
+# A janela abre antes de qualquer import pesado: PIL só é importado quando um
+# ícone não está no cache, pygame só quando a música é usada e o motor de
+# conversão (leitores de .zip/.tar, backends de cópia, hashes, compressores e
+# o pool de threads) é importado em segundo plano logo após a abertura; o NumPy
+# só é carregado se uma conversão precisar dele
+pygame = None
 
 # -----------------------------
 # Função para criar pastas necessárias
@@ -20,6 +25,45 @@ def create_required_folders():
 # Cria as pastas necessárias ao iniciar o programa
 create_required_folders()
 
+# -----------------------------
+# Cache de ícones redimensionados
+ICON_CACHE = Path("images") / ".cache"
+
+def load_icon(path, width, height=None):
+    """Retorna o PhotoImage de `path` redimensionado (altura proporcional se `height` for None), ou None.
+
+    O resultado fica em ICON_CACHE como PNG, com o mtime da origem no nome: nas
+    próximas aberturas o Tk lê o PNG direto, sem PIL nem LANCZOS, e trocar a
+    imagem de origem invalida o cache.
+    """
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    size_key = f"{width}x{height}" if height else f"{width}w"
+    cached = ICON_CACHE / f"{path.stem}-{size_key}-{mtime}.png"
+    if cached.exists():
+        try:
+            return tk.PhotoImage(file=str(cached))
+        except tk.TclError:
+            pass  # Cache corrompido: gera de novo
+    from PIL import Image, ImageTk
+    image = Image.open(path).convert("RGBA")
+    if height is None:
+        height = int(width * image.height / image.width)
+    image = image.resize((width, height), Image.Resampling.LANCZOS)
+    try:
+        ICON_CACHE.mkdir(parents=True, exist_ok=True)
+        for stale in ICON_CACHE.glob(f"{path.stem}-{size_key}-*.png"):
+            stale.unlink(missing_ok=True)
+        tmp_path = cached.with_suffix(".tmp")
+        image.save(tmp_path, "PNG")
+        os.replace(tmp_path, cached)
+    except OSError:
+        pass  # Sem cache (pasta sem permissão): só perde a aceleração
+    return ImageTk.PhotoImage(image)
+
 # -----------------------------
 # Funções de controle de música
 music_folder = Path("audio")  # Caminho relativo para maior portabilidade
@@ -27,17 +71,60 @@ music_list = []
 current_music_index = -1
 music_paused = False
 
-def load_music_list():
-    """Carrega a lista de arquivos .mp3 da pasta especificada."""
-    global music_list
-    music_list = []
-    if music_folder.exists():
-        music_list = list(music_folder.glob("*.mp3"))
-        if not music_list:
-            print(f"Nenhum arquivo .mp3 encontrado em {music_folder}")
-    else:
+def get_mixer():
+    """Importa o pygame e inicializa o mixer no primeiro uso; retorna pygame.mixer (ou None se falhar)."""
+    global pygame
+    try:
+        if pygame is None:
+            import pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+    except Exception as e:
+        print(f"Falha ao iniciar o áudio: {e}")
+        return None
+    return pygame.mixer
+
+def mixer_active():
+    """Indica se o mixer já foi inicializado (sem importar o pygame)."""
+    return pygame is not None and pygame.mixer.get_init()
+
+def find_music():
+    """Lista os arquivos .mp3 da pasta de áudio."""
+    if not music_folder.exists():
         print(f"Pasta de áudio não encontrada: {music_folder}")
-    update_music_label()
+        return []
+    found = sorted(music_folder.glob("*.mp3"))
+    if not found:
+        print(f"Nenhum arquivo .mp3 encontrado em {music_folder}")
+    return found
+
+def load_music_in_background():
+    """Procura as músicas (e importa o pygame, se houver músicas) fora da thread da GUI e toca a primeira."""
+    results = queue.Queue()
+
+    def run_scan():
+        found = find_music()
+        if found:
+            try:
+                import pygame  # Só aquece o import; o mixer é inicializado na thread da GUI
+            except Exception:
+                pass
+        results.put(found)
+
+    def check_scan():
+        global music_list, current_music_index
+        try:
+            music_list = results.get_nowait()
+        except queue.Empty:
+            root.after(50, check_scan)
+            return
+        update_music_label()
+        if music_list and current_music_index < 0:
+            current_music_index = 0
+            play_music()
+
+    threading.Thread(target=run_scan, daemon=True).start()
+    root.after(50, check_scan)
 
 def select_music():
     """Abre uma janela para selecionar uma música da lista."""
@@ -73,16 +160,17 @@ def play_music():
     if music_list and current_music_index >= 0:
         music_file = music_list[current_music_index]
         if music_file.exists():
+            mixer = get_mixer()
+            if mixer is None:
+                return
             try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
                 if music_paused:
-                    pygame.mixer.music.unpause()
+                    mixer.music.unpause()
                     music_paused = False
                     play_pause_button.config(text="Pausar")
                 else:
-                    pygame.mixer.music.load(str(music_file))
-                    pygame.mixer.music.play(loops=-1)
+                    mixer.music.load(str(music_file))
+                    mixer.music.play(loops=-1)
                     play_pause_button.config(text="Pausar")
                     update_music_label()
             except Exception as e:
@@ -93,7 +181,7 @@ def play_music():
 def toggle_play_pause():
     """Alterna entre pausar e resumir a música."""
     global music_paused
-    if pygame.mixer.get_init() and pygame.mixer.music.get_busy():
+    if mixer_active() and pygame.mixer.music.get_busy():
         if music_paused:
             pygame.mixer.music.unpause()
             music_paused = False
@@ -122,7 +210,7 @@ def previous_music():
 def stop_music():
     """Para a reprodução de música."""
     global music_paused
-    if pygame.mixer.get_init():
+    if mixer_active():
         pygame.mixer.music.stop()
         music_paused = False
         play_pause_button.config(text="Tocar")
@@ -134,165 +222,88 @@ def update_music_label():
     else:
         music_label.config(text="Nenhuma música selecionada")
 
-# -----------------------------
-# Função para parsear o arquivo .cue
-def parse_cue_file(cue_file):
-    """Lê o arquivo .cue e retorna uma lista de arquivos .bin e informações de faixas."""
-    try:
-        bin_files = []
-        tracks = []
-        current_track = None
-        with open(cue_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('FILE'):
-                    bin_name = line.split('"')[1]
-                    bin_files.append(bin_name)
-                elif line.startswith('TRACK'):
-                    track_num = int(re.search(r'\d+', line).group())
-                    track_type = line.split()[-1]
-                    current_track = {'number': track_num, 'type': track_type, 'indexes': []}
-                    tracks.append(current_track)
-                elif line.startswith('INDEX') and current_track:
-                    index_num, timestamp = re.search(r'INDEX\s+(\d+)\s+(\d+:\d+:\d+)', line).groups()
-                    current_track['indexes'].append({'number': int(index_num), 'timestamp': timestamp})
-        # Valida índices de faixas
-        for i, track in enumerate(tracks):
-            if track['indexes']:
-                timestamp = track['indexes'][0]['timestamp']
-                min, sec, frame = map(int, timestamp.split(':'))
-                total_frames = (min * 60 + sec) * 75 + frame
-                if total_frames < 0 or (i > 0 and total_frames <= tracks[i-1]['indexes'][0]['total_frames']):
-                    return [], [], "Erro: Índices de faixas inválidos ou fora de ordem"
-                track['indexes'][0]['total_frames'] = total_frames
-        return bin_files, tracks, ""
-    except FileNotFoundError:
-        return [], [], "Erro: Arquivo .cue não encontrado."
-    except Exception as e:
-        return [], [], f"Erro ao parsear o arquivo .cue: {e}"
-
-# -----------------------------
-# Função para validar arquivos .bin e .cue
-def validate_bin_cue(bin_file, cue_file):
-    """Valida se os arquivos .bin e .cue são compatíveis e se os .bin referenciados existem."""
-    if not bin_file or not cue_file:
-        return False, "Selecione pelo menos um arquivo .bin e .cue."
-    
-    bin_base = os.path.splitext(os.path.basename(bin_file))[0]
-    cue_base = os.path.splitext(os.path.basename(cue_file))[0]
-    if bin_base != cue_base:
-        return False, "Os arquivos .bin e .cue devem ter o mesmo nome base."
-    
-    bin_files, tracks, error = parse_cue_file(cue_file)
-    if error:
-        return False, error
-    
-    if not bin_files:
-        return False, "Nenhum arquivo .bin encontrado no .cue."
-    
-    cue_dir = Path(os.path.dirname(cue_file))
-    for bin_name in bin_files:
-        bin_path = cue_dir / bin_name
-        if not bin_path.exists():
-            return False, f"O arquivo .bin referenciado no .cue ('{bin_name}') não foi encontrado."
-    
-    return True, ""
-
-# -----------------------------
-# Função para converter .bin/.cue para .img, .ccd e, se disponível, .sub
-def convert_to_img_ccd_sub(bin_file, cue_file, output_folder):
-    """Converte o arquivo .bin/.cue para .img, .ccd e, se existir, copia .sub."""
-    try:
-        cue_dir = Path(os.path.dirname(cue_file))
-        base_name = os.path.splitext(os.path.basename(cue_file))[0]
-        output_img = Path(output_folder) / f"{base_name}.img"
-        output_ccd = Path(output_folder) / f"{base_name}.ccd"
-        output_sub = Path(output_folder) / f"{base_name}.sub"
-        
-        # Parseia o .cue
-        bin_files, tracks, error = parse_cue_file(cue_file)
-        if error:
-            return False, error
-        
-        # Concatena .bin em .img
-        total_size = sum(os.path.getsize(cue_dir / bin_name) for bin_name in bin_files)
-        chunk_size = 1024 * 1024  # 1 MB
-        copied_size = 0
-        
-        with open(output_img, 'wb') as img_file:
-            for bin_name in bin_files:
-                bin_path = cue_dir / bin_name
-                with open(bin_path, 'rb') as bin_f:
-                    while True:
-                        chunk = bin_f.read(chunk_size)
-                        if not chunk:
-                            break
-                        img_file.write(chunk)
-                        copied_size += len(chunk)
-                        yield (copied_size / total_size * 50.0, f"Convertendo {base_name}.img... {(copied_size / total_size * 100):.1f}%")
-        
-        # Gera o .ccd
-        yield (50.0, f"Gerando {base_name}.ccd...")
-        with open(output_ccd, 'w', encoding='utf-8') as ccd_file:
-            ccd_file.write("[CloneCD]\n")
-            ccd_file.write("Version=3\n")
-            ccd_file.write("[Disc]\n")
-            ccd_file.write(f"TocEntries={len(tracks)}\n")
-            ccd_file.write("Sessions=1\n")
-            ccd_file.write("DataTracksScrambled=0\n")
-            ccd_file.write("CDTextLength=0\n")
-            
-            for track in tracks:
-                ccd_file.write(f"[Entry {track['number']-1}]\n")
-                ccd_file.write(f"Session=1\n")
-                ccd_file.write(f"Point={track['number']}\n")
-                ccd_file.write(f"ADR=1\n")
-                ccd_file.write(f"Control=4\n")
-                ccd_file.write(f"TrackNo=0\n")
-                ccd_file.write(f"AMin=0\n")
-                ccd_file.write(f"ASec=0\n")
-                ccd_file.write(f"AFrame=0\n")
-                ccd_file.write(f"ALBA=-150\n")
-                ccd_file.write(f"Zero=0\n")
-                ccd_file.write(f"PMin={track['indexes'][0]['timestamp'].split(':')[0]}\n")
-                ccd_file.write(f"PSec={track['indexes'][0]['timestamp'].split(':')[1]}\n")
-                ccd_file.write(f"PFrame={track['indexes'][0]['timestamp'].split(':')[2]}\n")
-                ccd_file.write(f"PLBA=0\n")
-        
-        # Copia o .sub, se existir
-        sub_file = cue_dir / f"{base_name}.sub"
-        if sub_file.exists():
-            yield (75.0, f"Copiando {base_name}.sub...")
-            shutil.copyfile(sub_file, output_sub)
-            yield (100, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd}, {output_sub}")
-            return True, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd}, {output_sub}"
-        else:
-            yield (100, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd} (nenhum .sub encontrado)")
-            return True, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd} (nenhum .sub encontrado)"
-    
-    except PermissionError:
-        return False, "Erro: Permissão negada ao escrever arquivos na pasta de saída."
-    except FileNotFoundError:
-        return False, "Erro: Arquivo .bin ou .cue não encontrado."
-    except Exception as e:
-        return False, f"Erro durante a conversão: {e}"
-
 # -----------------------------
 # Funções do conversor
 def select_bin_cue_files():
     """Permite selecionar múltiplos arquivos .cue e associa os .bin correspondentes."""
-    cue_files = filedialog.askopenfilenames(title="Selecione arquivos .cue", filetypes=[("CUE files", "*.cue")])
-    valid_pairs = []
+    from ps1_engine import validate_bin_cue, find_bin_for_cue
+    cue_files = filedialog.askopenfilenames(title="Selecione arquivos .cue", filetypes=[
+        ("CUE files", "*.cue"), ("Arquivos compactados", "*.zip *.7z *.tar *.tar.gz *.tgz")])
+    entries = []
+    failures = []
     for cue_file in cue_files:
-        cue_base = os.path.splitext(os.path.basename(cue_file))[0]
-        cue_dir = os.path.dirname(cue_file)
-        bin_file = os.path.join(cue_dir, f"{cue_base}.bin")
+        bin_file = find_bin_for_cue(cue_file)
         is_valid, error_msg = validate_bin_cue(bin_file, cue_file)
         if is_valid:
-            valid_pairs.append((bin_file, cue_file))
+            entries.append({"path": cue_file, "name": os.path.basename(cue_file)})
         else:
-            messagebox.showwarning("Aviso", f"Falha ao validar {cue_file}: {error_msg}")
-    bin_cue_pairs.set(valid_pairs)
+            failures.append({"path": cue_file, "message": error_msg})
+    library_entries[:] = entries
+    apply_filter()
+    if failures:
+        report_failures(failures)
+
+def scan_library_folder():
+    """Varre uma pasta (e subpastas) em segundo plano usando o índice da biblioteca."""
+    folder = filedialog.askdirectory(title="Selecione a pasta da biblioteca")
+    if not folder:
+        return
+    scan_button.config(state="disabled")
+    file_listbox.delete(0, tk.END)
+    file_listbox.insert(tk.END, "Varrendo a biblioteca...")
+    results = queue.Queue()
+
+    def run_scan():
+        try:
+            from ps1_library import LibraryIndex
+            library = LibraryIndex.for_folder(folder)
+            failures = library.scan([folder])
+            results.put((library.select(), failures, library.path.parent, None))
+        except Exception as e:
+            results.put(([], [], None, e))
+
+    def check_scan():
+        try:
+            entries, failures, report_folder, error = results.get_nowait()
+        except queue.Empty:
+            root.after(100, check_scan)
+            return
+        scan_button.config(state="normal")
+        if error:
+            file_listbox.delete(0, tk.END)
+            messagebox.showerror("Erro", f"Falha ao varrer {folder}: {error}")
+            return
+        library_entries[:] = entries
+        apply_filter()
+        if failures:
+            report_failures(failures, report_folder)
+
+    threading.Thread(target=run_scan, daemon=True).start()
+    root.after(100, check_scan)
+
+def report_failures(failures, report_folder=None):
+    """Mostra um único resumo das falhas de validação (e grava o relatório completo, se houver pasta)."""
+    lines = [f"{os.path.basename(entry['path'])}: {entry['message']}" for entry in failures[:10]]
+    if len(failures) > 10:
+        lines.append(f"... e mais {len(failures) - 10}")
+    if report_folder is not None:
+        from ps1_library import write_failure_report
+        report_path = Path(report_folder) / "ps1_library_falhas.txt"
+        try:
+            write_failure_report(failures, report_path)
+            lines.append(f"\nRelatório completo: {report_path}")
+        except OSError:
+            pass
+    messagebox.showwarning("Aviso", f"{len(failures)} disco(s) falharam na validação:\n\n" + "\n".join(lines))
+
+def apply_filter(*_):
+    """Mostra (e seleciona para conversão) só os discos cujo nome contém o filtro (aceita curingas)."""
+    from ps1_engine import find_bin_for_cue
+    pattern = filter_text.get().strip().lower()
+    entries = library_entries
+    if pattern:
+        entries = [entry for entry in entries if fnmatch.fnmatchcase(entry["name"].lower(), f"*{pattern}*")]
+    bin_cue_pairs.set([(find_bin_for_cue(entry["path"]), entry["path"]) for entry in entries])
     update_file_list()
 
 def update_file_list():
@@ -320,59 +331,68 @@ def convert():
     
     loading = tk.Toplevel(root)
     loading.title("Convertendo...")
-    loading.geometry("400x100")
-    loading_label = tk.Label(loading, text="Iniciando conversão...", font=("Arial", 12))
+    loading.geometry("400x120")
+    loading_label = tk.Label(loading, text="Iniciando conversão...", font=("Arial", 12), wraplength=380)
     loading_label.pack(pady=10)
     progress = ttk.Progressbar(loading, orient="horizontal", length=300, mode="determinate")
     progress.pack(pady=10)
     
-    progress_queue = queue.Queue()
     total_files = len(pairs)
-    converted_files = 0
+    latest = LatestValue()  # Só o estado mais recente do lote; a GUI nunca fica atrasada
+    outcome = {}
 
     def run_conversion():
-        nonlocal converted_files
         try:
-            for i, (bin_file, cue_file) in enumerate(pairs, 1):
-                for percent, msg in convert_to_img_ccd_sub(bin_file, cue_file, out_folder):
-                    adjusted_percent = (converted_files + percent / 100) / total_files * 100
-                    progress_queue.put((adjusted_percent, f"[{i}/{total_files}] {msg}"))
-                success, final_msg = progress_queue.get()
-                progress_queue.put((success and (converted_files + 1) / total_files * 100 or converted_files / total_files * 100, final_msg))
-                if success:
-                    converted_files += 1
+            from ps1_batch import run_batch
+            from ps1_manifest import Manifest
+            outcome["results"] = run_batch(pairs, out_folder, on_progress=latest.publish, manifest=Manifest.for_folder(out_folder))
         except Exception as e:
-            progress_queue.put((converted_files / total_files * 100, f"Erro: {e}"))
-
-    def check_queue():
-        try:
-            percent, msg = progress_queue.get_nowait()
-            progress["value"] = percent
-            loading_label.config(text=msg)
-            if percent >= 100 or msg.startswith("Erro:"):
-                loading.destroy()
-                convert_button.config(state="normal")
-                if percent >= 100:
-                    messagebox.showinfo("Sucesso", f"Conversão concluída para {converted_files}/{total_files} arquivos!")
-                    if output_path.get():
-                        os.startfile(output_path.get())  # Abre a pasta de saída
-                else:
-                    messagebox.showerror("Erro", msg)
+            outcome["error"] = e
+
+    def check_progress():
+        state = latest.take()
+        if state is not None:
+            progress["value"] = min(state.percent, 99.9) if not state.finished else 100
+            loading_label.config(text=state.describe())
+        if not worker.is_alive():
+            loading.destroy()
+            convert_button.config(state="normal")
+            if "error" in outcome:
+                messagebox.showerror("Erro", f"Erro: {outcome['error']}")
+                return
+            results = outcome["results"]
+            converted_files = sum(1 for success, _ in results if success)
+            failed = [msg for success, msg in results if not success]
+            if failed:
+                messagebox.showwarning("Aviso", f"Conversão concluída para {converted_files}/{total_files} arquivos.\n\n" + "\n".join(failed[:10]))
             else:
-                root.after(100, check_queue)
-        except queue.Empty:
-            root.after(100, check_queue)
+                messagebox.showinfo("Sucesso", f"Conversão concluída para {converted_files}/{total_files} arquivos!")
+            if output_path.get():
+                os.startfile(output_path.get())  # Abre a pasta de saída
+            return
+        root.after(100, check_progress)
 
-    threading.Thread(target=run_conversion, daemon=True).start()
-    root.after(100, check_queue)
+    worker = threading.Thread(target=run_conversion, daemon=True)
+    worker.start()
+    root.after(100, check_progress)
 
 # -----------------------------
 # Cleanup ao fechar
 def on_closing():
     stop_music()
-    pygame.mixer.quit()
+    if mixer_active():
+        pygame.mixer.quit()
     root.destroy()
 
+def warm_up_imports():
+    """Importa o motor de conversão em segundo plano, para que o primeiro clique não espere por ele."""
+    def run():
+        try:
+            import ps1_batch, ps1_library, ps1_manifest
+        except Exception as e:
+            print(f"Falha ao carregar o motor de conversão: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
 # -----------------------------
 # GUI
 root = tk.Tk()
@@ -384,6 +404,9 @@ root.protocol("WM_DELETE_WINDOW", on_closing)
 # Variáveis de caminho
 bin_cue_pairs = tk.Variable()  # Lista de pares (bin, cue)
 output_path = tk.StringVar()
+library_entries = []  # Discos válidos selecionados ou vindos da varredura, antes do filtro
+filter_text = tk.StringVar()
+filter_text.trace_add("write", apply_filter)
 
 # Canvas para logo e texto animado
 canvas = tk.Canvas(root, width=600, height=200, bg="black", highlightthickness=0)
@@ -392,27 +415,26 @@ canvas.pack()
 # Carrega logo do PS1
 logo_path = Path("images/ps1_logo.png")
 try:
-    logo_img = Image.open(logo_path).convert("RGBA")
-    logo_img = logo_img.resize((150, int(150 * logo_img.height / logo_img.width)), Image.Resampling.LANCZOS)
-    global logo_tk
-    logo_tk = ImageTk.PhotoImage(logo_img)
+    logo_tk = load_icon(logo_path, 150)
+    if logo_tk is None:
+        raise FileNotFoundError(logo_path)
     canvas.create_image(300, 100, image=logo_tk)
 except Exception as e:
     print(f"Erro ao carregar imagem: {e}")
 
-# Texto animado
+# Texto animado: criado uma vez, só a cor muda
 logo_text = "Conversor de BIN/CUE para IMG/CCD/SUB"
 colors = ["#FFFFFF", "#FFD700", "#FFFF00"]
 color_index = 0
+logo_item = canvas.create_text(300, 180, text=logo_text, fill=colors[color_index], font=("Arial", 22, "bold"), tags="logo_text")
 
 def update_logo():
     global color_index
     color_index = (color_index + 1) % len(colors)
-    canvas.delete("logo_text")
-    canvas.create_text(300, 180, text=logo_text, fill=colors[color_index], font=("Arial", 22, "bold"), tags="logo_text")
+    canvas.itemconfig(logo_item, fill=colors[color_index])
     root.after(500, update_logo)
 
-update_logo()
+root.after(500, update_logo)
 
 # Interface de seleção de arquivos
 frame = tk.Frame(root, bg="black")
@@ -422,32 +444,25 @@ tk.Label(frame, text="Arquivos BIN/CUE:", fg="white", bg="black", font=("Arial",
 file_listbox = Listbox(frame, width=40, height=5, bg="black", fg="white", selectbackground="blue")
 file_listbox.grid(row=0, column=1, padx=5)
 # Ícone para botão de seleção
-select_icon_path = Path("images/select_icon.png")
-select_icon = None
-if select_icon_path.exists():
-    select_icon_img = Image.open(select_icon_path).resize((20, 20), Image.Resampling.LANCZOS)
-    select_icon = ImageTk.PhotoImage(select_icon_img)
+select_icon = load_icon("images/select_icon.png", 20, 20)
 select_button = ttk.Button(frame, text="Selecionar Arquivos", image=select_icon, compound="left", command=select_bin_cue_files)
 select_button.image = select_icon  # Evita garbage collection
 select_button.grid(row=0, column=2, padx=5)
 
 tk.Label(frame, text="Pasta de saída:", fg="white", bg="black", font=("Arial", 10)).grid(row=1, column=0, sticky="w", pady=5)
 tk.Entry(frame, textvariable=output_path, width=40).grid(row=1, column=1, padx=5)
-output_icon_path = Path("images/folder_icon.png")
-output_icon = None
-if output_icon_path.exists():
-    output_icon_img = Image.open(output_icon_path).resize((20, 20), Image.Resampling.LANCZOS)
-    output_icon = ImageTk.PhotoImage(output_icon_img)
+output_icon = load_icon("images/folder_icon.png", 20, 20)
 output_button = ttk.Button(frame, text="Selecionar Pasta", image=output_icon, compound="left", command=select_output_folder)
 output_button.image = output_icon
 output_button.grid(row=1, column=2, padx=5)
 
+tk.Label(frame, text="Filtro:", fg="white", bg="black", font=("Arial", 10)).grid(row=2, column=0, sticky="w")
+tk.Entry(frame, textvariable=filter_text, width=40).grid(row=2, column=1, padx=5)
+scan_button = ttk.Button(frame, text="Escanear Pasta", command=scan_library_folder)
+scan_button.grid(row=2, column=2, padx=5)
+
 # Botão de converter
-convert_icon_path = Path("images/convert_icon.png")
-convert_icon = None
-if convert_icon_path.exists():
-    convert_icon_img = Image.open(convert_icon_path).resize((20, 20), Image.Resampling.LANCZOS)
-    convert_icon = ImageTk.PhotoImage(convert_icon_img)
+convert_icon = load_icon("images/convert_icon.png", 20, 20)
 convert_button = ttk.Button(root, text="Converter", image=convert_icon, compound="left", command=convert)
 convert_button.image = convert_icon
 convert_button.pack(pady=10)
@@ -465,10 +480,8 @@ tk.Button(music_frame, text="Parar Música", command=stop_music, bg="red", fg="w
 music_label = tk.Label(music_frame, text="Nenhuma música selecionada", fg="white", bg="black", font=("Arial", 10))
 music_label.grid(row=1, column=0, columnspan=5, pady=5)
 
-# Carrega a lista de músicas e tenta tocar a primeira
-load_music_list()
-if music_list:
-    current_music_index = 0
-    play_music()
+# Com a janela já respondendo: procura as músicas (e toca a primeira) e carrega o motor em segundo plano
+root.after_idle(load_music_in_background)
+root.after_idle(warm_up_imports)
 
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Modelo de objetos de CUE sheet, com gramática pré-compilada e cache LRU.
+
+Suporta vários FILE, INDEX 00/01/.., PREGAP, POSTGAP e FLAGS. Os sheets
+carregados por `load_cue_sheet` são memorizados por (caminho, mtime, tamanho),
+então validar e depois converter o mesmo .cue só o lê uma vez.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+FRAMES_PER_SECOND = 75
+CACHE_SIZE = 4096
+
+# Tamanho do setor no .bin para cada modo de faixa
+SECTOR_SIZES = {
+    "AUDIO": 2352,
+    "CDG": 2448,
+    "MODE1/2048": 2048,
+    "MODE1/2352": 2352,
+    "MODE2/2336": 2336,
+    "MODE2/2352": 2352,
+    "CDI/2336": 2336,
+    "CDI/2352": 2352,
+}
+
+# -----------------------------
+# Gramática (compilada uma única vez)
+_MSF = r'(\d+):(\d{1,2}):(\d{1,2})'
+_FILE_RE = re.compile(r'FILE\s+(?:"([^"]*)"|(\S+))(?:\s+(\S+))?\s*$', re.IGNORECASE)
+_TRACK_RE = re.compile(r'TRACK\s+(\d+)\s+(\S+)\s*$', re.IGNORECASE)
+_INDEX_RE = re.compile(r'INDEX\s+(\d+)\s+' + _MSF + r'\s*$', re.IGNORECASE)
+_GAP_RE = re.compile(r'(PREGAP|POSTGAP)\s+' + _MSF + r'\s*$', re.IGNORECASE)
+_FLAGS_RE = re.compile(r'FLAGS\s+(.*)$', re.IGNORECASE)
+
+class CueError(ValueError):
+    """CUE sheet malformado ou inconsistente."""
+
+def msf_to_frames(minutes, seconds, frames):
+    return (minutes * 60 + seconds) * FRAMES_PER_SECOND + frames
+
+def frames_to_msf(frames):
+    """Converte frames em (minutos, segundos, frames)."""
+    minutes, rest = divmod(frames, 60 * FRAMES_PER_SECOND)
+    seconds, frames = divmod(rest, FRAMES_PER_SECOND)
+    return minutes, seconds, frames
+
+def format_msf(frames):
+    return "%02d:%02d:%02d" % frames_to_msf(frames)
+
+# -----------------------------
+# Modelo
+@dataclass(slots=True)
+class CueIndex:
+    number: int
+    frames: int  # Relativo ao início do FILE
+
+    @property
+    def timestamp(self):
+        return format_msf(self.frames)
+
+@dataclass(slots=True)
+class CueTrack:
+    number: int
+    mode: str
+    file_index: int  # Posição do FILE em `CueSheet.files`
+    indexes: list = field(default_factory=list)
+    pregap: int = 0  # Frames de PREGAP (não presentes no .bin)
+    postgap: int = 0  # Frames de POSTGAP (não presentes no .bin)
+    flags: tuple = ()
+
+    @property
+    def sector_size(self):
+        return SECTOR_SIZES.get(self.mode.upper(), 2352)
+
+    @property
+    def is_audio(self):
+        return self.mode.upper() == "AUDIO"
+
+    def index(self, number):
+        for index in self.indexes:
+            if index.number == number:
+                return index
+        return None
+
+    @property
+    def start(self):
+        """Frame (relativo ao FILE) do INDEX 01, onde a faixa começa de fato."""
+        index = self.index(1)
+        return index.frames if index else self.indexes[0].frames
+
+    @property
+    def first_frame(self):
+        """Frame do primeiro INDEX (00, se houver), onde os dados da faixa começam no .bin."""
+        return self.indexes[0].frames
+
+@dataclass(slots=True)
+class CueFile:
+    name: str
+    filetype: str
+    tracks: list = field(default_factory=list)
+
+@dataclass(slots=True)
+class CueSheet:
+    path: str
+    files: list = field(default_factory=list)
+    tracks: list = field(default_factory=list)
+
+    @property
+    def bin_files(self):
+        return [cue_file.name for cue_file in self.files]
+
+    def file_of(self, track):
+        return self.files[track.file_index]
+
+# -----------------------------
+# Parser
+def _read_text(cue_path):
+    with open(cue_path, 'rb') as f:
+        return decode_cue_text(f.read())
+
+def decode_cue_text(data):
+    """Decodifica o conteúdo bruto de um .cue (UTF-8, com ou sem BOM, ou latin-1)."""
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')  # .cue antigos costumam vir em codificação Windows
+
+def parse_cue_text(text, path=""):
+    """Monta um `CueSheet` a partir do texto do .cue; levanta `CueError` se inválido."""
+    sheet = CueSheet(path)
+    track = None
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line:
+            continue
+        keyword = line.split(None, 1)[0].upper()
+        if keyword == "FILE":
+            match = _FILE_RE.match(line)
+            if not match:
+                raise CueError(f"linha {line_number}: FILE inválido")
+            name = match.group(1) if match.group(1) is not None else match.group(2)
+            sheet.files.append(CueFile(name, (match.group(3) or "BINARY").upper()))
+            track = None
+        elif keyword == "TRACK":
+            match = _TRACK_RE.match(line)
+            if not match:
+                raise CueError(f"linha {line_number}: TRACK inválido")
+            if not sheet.files:
+                raise CueError(f"linha {line_number}: TRACK antes de FILE")
+            track = CueTrack(int(match.group(1)), match.group(2).upper(), len(sheet.files) - 1)
+            sheet.files[-1].tracks.append(track)
+            sheet.tracks.append(track)
+        elif keyword == "INDEX":
+            match = _INDEX_RE.match(line)
+            if not match or track is None:
+                raise CueError(f"linha {line_number}: INDEX inválido")
+            number, minutes, seconds, frames = map(int, match.groups())
+            if seconds >= 60 or frames >= FRAMES_PER_SECOND:
+                raise CueError(f"linha {line_number}: tempo MSF inválido")
+            track.indexes.append(CueIndex(number, msf_to_frames(minutes, seconds, frames)))
+        elif keyword in ("PREGAP", "POSTGAP"):
+            match = _GAP_RE.match(line)
+            if not match or track is None:
+                raise CueError(f"linha {line_number}: {keyword} inválido")
+            frames = msf_to_frames(*map(int, match.groups()[1:]))
+            if keyword == "PREGAP":
+                track.pregap = frames
+            else:
+                track.postgap = frames
+        elif keyword == "FLAGS" and track is not None:
+            track.flags = tuple(_FLAGS_RE.match(line).group(1).upper().split())
+        # REM, CATALOG, TITLE, PERFORMER, ISRC etc. não afetam a conversão
+    _validate(sheet)
+    return sheet
+
+def _validate(sheet):
+    previous_number = 0
+    for cue_file in sheet.files:
+        previous_frames = -1
+        for track in cue_file.tracks:
+            if track.number <= previous_number:
+                raise CueError(f"faixa {track.number} fora de ordem")
+            previous_number = track.number
+            if track.index(1) is None:
+                raise CueError(f"faixa {track.number} sem INDEX 01")
+            for index in track.indexes:
+                if index.frames <= previous_frames:
+                    raise CueError(f"índices da faixa {track.number} inválidos ou fora de ordem")
+                previous_frames = index.frames
+
+def parse_cue_sheet(cue_path):
+    """Lê e interpreta o .cue (sem cache)."""
+    return parse_cue_text(_read_text(cue_path), str(cue_path))
+
+# -----------------------------
+# Cache LRU chaveado por (caminho, mtime, tamanho)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def load_cue_sheet(cue_path):
+    """Versão memorizada de `parse_cue_sheet`; o resultado deve ser tratado como somente leitura."""
+    stat = os.stat(cue_path)
+    key = (os.path.abspath(cue_path), stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        sheet = _cache.get(key)
+        if sheet is not None:
+            _cache.move_to_end(key)
+            return sheet
+    sheet = parse_cue_sheet(cue_path)
+    with _cache_lock:
+        _cache[key] = sheet
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return sheet
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,240 @@
+"""EDC/ECC de setores de CD-ROM (Mode 1 e Mode 2 Form 1/2), vetorizados com NumPy.
+
+Todas as funções recebem lotes de setores como arrays `uint8` de forma
+(n, 2352) e calculam EDC/ECC de todos de uma vez, em vez de um setor por vez.
+`regenerate_sector` faz o mesmo que `regenerate` para um único setor, só com a
+biblioteca padrão, para quem precisa de poucos setores e não tem NumPy.
+"""
+import struct
+
+from ps1_sectors import SECTOR_SIZE, SYNC
+
+np = None  # Importado por require_numpy(): importar este módulo não carrega o NumPy
+
+# Tipos de setor (mesma numeração do ECM)
+RAW = 0
+MODE1 = 1
+MODE2_FORM1 = 2
+MODE2_FORM2 = 3
+
+def require_numpy(purpose="EDC/ECC"):
+    """Importa o NumPy na primeira chamada e o retorna; sem ele, erro citando `purpose`."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError(f"NumPy é necessário para {purpose} (pip install numpy).") from None
+        np = numpy
+    return np
+
+# -----------------------------
+# Tabelas
+_tables = None
+
+def _build_tables():
+    global _tables
+    if _tables is not None:
+        return _tables
+    require_numpy()
+    edc_lut = np.zeros((4, 256), dtype=np.uint32)
+    for i in range(256):
+        edc = i
+        for _ in range(8):
+            edc = (edc >> 1) ^ (0xD8018001 if edc & 1 else 0)
+        edc_lut[0, i] = edc
+    # Tabelas "slice-by-4": processam 4 bytes por iteração
+    for k in range(1, 4):
+        edc_lut[k] = (edc_lut[k - 1] >> 8) ^ edc_lut[0, edc_lut[k - 1] & 0xFF]
+    ecc_f = np.zeros(256, dtype=np.uint8)
+    ecc_b = np.zeros(256, dtype=np.uint8)
+    for i in range(256):
+        j = ((i << 1) ^ (0x11D if i & 0x80 else 0)) & 0xFF
+        ecc_f[i] = j
+        ecc_b[i ^ j] = i
+    # Posições lidas por cada palavra de paridade Q (52 maiores x 43 menores)
+    q_index = np.zeros((52, 43), dtype=np.int64)
+    for major in range(52):
+        index = (major >> 1) * 86 + (major & 1)
+        for minor in range(43):
+            q_index[major, minor] = index
+            index += 88
+            if index >= 2236:
+                index -= 2236
+    _tables = (edc_lut, ecc_f, ecc_b, q_index)
+    return _tables
+
+# -----------------------------
+# EDC
+def edc_tables():
+    """Tabelas slice-by-4 do EDC (4 x 256, uint32); a linha 0 é a tabela byte a byte."""
+    return _build_tables()[0]
+
+def edc(blocks):
+    """EDC (CRC-32 de polinômio 0xD8018001) de cada linha de `blocks` (n x L, L múltiplo de 4)."""
+    t0, t1, t2, t3 = _build_tables()[0]
+    # Palavras de 32 bits em ordem de coluna, para que cada passo leia memória contígua
+    words = np.ascontiguousarray(blocks).view("<u4").T.copy()
+    crc = np.zeros(len(blocks), dtype=np.uint32)
+    for word in words:
+        crc ^= word
+        crc = t3[crc & 0xFF] ^ t2[(crc >> 8) & 0xFF] ^ t1[(crc >> 16) & 0xFF] ^ t0[crc >> 24]
+    return crc
+
+def stored_edc(sectors, offset):
+    """EDC gravado em `offset` de cada setor (uint32)."""
+    return sectors[:, offset:offset + 4].copy().view("<u4").ravel()
+
+# -----------------------------
+# ECC (paridades P e Q, Reed-Solomon sobre GF(2^8))
+def _ecc_block(data, ecc_f, ecc_b):
+    """Paridade de `data` (menores x maiores x n): retorna (2*maiores x n)."""
+    _, majors, n = data.shape
+    ecc_a = np.zeros((majors, n), dtype=np.uint8)
+    ecc_x = np.zeros((majors, n), dtype=np.uint8)
+    for value in data:
+        ecc_a = ecc_f.take(ecc_a ^ value)
+        ecc_x ^= value
+    ecc_a = ecc_b.take(ecc_f.take(ecc_a) ^ ecc_x)
+    return np.concatenate([ecc_a, ecc_a ^ ecc_x])
+
+def ecc(sectors, zero_address=False):
+    """Paridades P+Q (276 bytes, offset 0x81C) calculadas para cada setor de `sectors`."""
+    _, ecc_f, ecc_b, q_index = _build_tables()
+    # Trabalha com os setores nas colunas, para que cada passo leia memória contígua
+    src = np.ascontiguousarray(sectors[:, 0x0C:0x81C].T)
+    if zero_address:
+        src[0:4] = 0
+    n = len(sectors)
+    # P: 86 palavras de 24 bytes, lidas com passo 86
+    p_parity = _ecc_block(src.reshape(24, 86, n), ecc_f, ecc_b)
+    # Q: 52 palavras de 43 bytes ao longo das diagonais, incluindo a paridade P
+    q_src = np.concatenate([src, p_parity])
+    q_parity = _ecc_block(np.take(q_src, q_index.T, axis=0), ecc_f, ecc_b)
+    return np.concatenate([p_parity, q_parity]).T
+
+# -----------------------------
+# Classificação e regeneração de setores
+def as_sectors(data):
+    """View (n x 2352) de um buffer com tamanho múltiplo de 2352 bytes (sem cópia)."""
+    require_numpy()
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, SECTOR_SIZE)
+
+def classify(sectors):
+    """Tipo de cada setor: MODE1/MODE2_FORM1/MODE2_FORM2 quando EDC/ECC regenerados
+    batem com os gravados (ou seja, podem ser descartados e recriados), senão RAW."""
+    require_numpy()
+    types = np.zeros(len(sectors), dtype=np.uint8)
+    if not len(sectors):
+        return types
+    sync = (sectors[:, 0:12] == np.frombuffer(SYNC, dtype=np.uint8)).all(axis=1)
+    mode = sectors[:, 0x0F]
+
+    candidates = np.flatnonzero(sync & (mode == 1) & (sectors[:, 0x814:0x81C] == 0).all(axis=1))
+    if len(candidates):
+        block = sectors[candidates]
+        ok = edc(block[:, 0:0x810]) == stored_edc(block, 0x810)
+        ok &= (ecc(block) == block[:, 0x81C:0x930]).all(axis=1)
+        types[candidates[ok]] = MODE1
+
+    mode2 = sync & (mode == 2) & (sectors[:, 0x10:0x14] == sectors[:, 0x14:0x18]).all(axis=1)
+    form2 = (sectors[:, 0x12] & 0x20) != 0
+    candidates = np.flatnonzero(mode2 & ~form2)
+    if len(candidates):
+        block = sectors[candidates]
+        ok = edc(block[:, 0x10:0x818]) == stored_edc(block, 0x818)
+        ok &= (ecc(block, zero_address=True) == block[:, 0x81C:0x930]).all(axis=1)
+        types[candidates[ok]] = MODE2_FORM1
+    candidates = np.flatnonzero(mode2 & form2)
+    if len(candidates):
+        block = sectors[candidates]
+        ok = edc(block[:, 0x10:0x92C]) == stored_edc(block, 0x92C)
+        types[candidates[ok]] = MODE2_FORM2
+    return types
+
+def regenerate(sectors, sector_type):
+    """Recria sync, EDC e ECC (in place) de setores do mesmo tipo cujo conteúdo útil já está preenchido."""
+    require_numpy()
+    sectors[:, 0:12] = np.frombuffer(SYNC, dtype=np.uint8)
+    if sector_type == MODE1:
+        sectors[:, 0x0F] = 1
+        sectors[:, 0x814:0x81C] = 0
+        sectors[:, 0x810:0x814] = edc(sectors[:, 0:0x810]).astype("<u4").view(np.uint8).reshape(-1, 4)
+        sectors[:, 0x81C:0x930] = ecc(sectors)
+    elif sector_type == MODE2_FORM1:
+        sectors[:, 0x0F] = 2
+        sectors[:, 0x818:0x81C] = edc(sectors[:, 0x10:0x818]).astype("<u4").view(np.uint8).reshape(-1, 4)
+        sectors[:, 0x81C:0x930] = ecc(sectors, zero_address=True)
+    elif sector_type == MODE2_FORM2:
+        sectors[:, 0x0F] = 2
+        sectors[:, 0x92C:0x930] = edc(sectors[:, 0x10:0x92C]).astype("<u4").view(np.uint8).reshape(-1, 4)
+    return sectors
+
+# -----------------------------
+# Um setor por vez, sem NumPy
+_scalar_tables = None
+
+def _build_scalar_tables():
+    global _scalar_tables
+    if _scalar_tables is None:
+        edc_lut, ecc_f, ecc_b = [0] * 256, [0] * 256, [0] * 256
+        for i in range(256):
+            value = i
+            for _ in range(8):
+                value = (value >> 1) ^ (0xD8018001 if value & 1 else 0)
+            edc_lut[i] = value
+            j = ((i << 1) ^ (0x11D if i & 0x80 else 0)) & 0xFF
+            ecc_f[i] = j
+            ecc_b[i ^ j] = i
+        _scalar_tables = (edc_lut, ecc_f, ecc_b)
+    return _scalar_tables
+
+def _edc_bytes(data):
+    edc_lut = _build_scalar_tables()[0]
+    value = 0
+    for byte in data:
+        value = (value >> 8) ^ edc_lut[(value ^ byte) & 0xFF]
+    return value
+
+def _parity(src, major_count, minor_count, major_mult, minor_inc):
+    _, ecc_f, ecc_b = _build_scalar_tables()
+    size = major_count * minor_count
+    out = bytearray(major_count * 2)
+    for major in range(major_count):
+        index = (major >> 1) * major_mult + (major & 1)
+        ecc_a = ecc_x = 0
+        for _ in range(minor_count):
+            value = src[index]
+            index += minor_inc
+            if index >= size:
+                index -= size
+            ecc_a = ecc_f[ecc_a ^ value]
+            ecc_x ^= value
+        ecc_a = ecc_b[ecc_f[ecc_a] ^ ecc_x]
+        out[major] = ecc_a
+        out[major + major_count] = ecc_a ^ ecc_x
+    return out
+
+def _ecc_bytes(sector, zero_address=False):
+    src = bytearray(sector[0x0C:0x81C])
+    if zero_address:
+        src[0:4] = bytes(4)
+    p_parity = _parity(src, 86, 24, 2, 86)
+    return p_parity + _parity(src + p_parity, 52, 43, 86, 88)
+
+def regenerate_sector(sector, sector_type):
+    """`regenerate` de um único setor (bytearray de 2352 bytes, alterado in place), sem NumPy."""
+    sector[0:12] = SYNC
+    if sector_type == MODE1:
+        sector[0x0F] = 1
+        sector[0x814:0x81C] = bytes(8)
+        struct.pack_into("<I", sector, 0x810, _edc_bytes(sector[0:0x810]))
+        sector[0x81C:0x930] = _ecc_bytes(sector)
+    elif sector_type == MODE2_FORM1:
+        sector[0x0F] = 2
+        struct.pack_into("<I", sector, 0x818, _edc_bytes(sector[0x10:0x818]))
+        sector[0x81C:0x930] = _ecc_bytes(sector, zero_address=True)
+    elif sector_type == MODE2_FORM2:
+        sector[0x0F] = 2
+        struct.pack_into("<I", sector, 0x92C, _edc_bytes(sector[0x10:0x92C]))
+    return sector
@@ -0,0 +1,325 @@
+"""Codificação ECM (Error Code Modeler) de imagens 2352 bytes/setor.
+
+Setores Mode 1 e Mode 2 Form 1/2 cujo EDC/ECC pode ser recalculado têm
+sync, EDC e ECC descartados; na decodificação eles são regenerados e a imagem
+volta idêntica bit a bit. O formato dos registros segue o ECM original:
+
+    b"ECM\\0", registros (tipo + contagem), fim (contagem 0xFFFFFFFF),
+    EDC de 32 bits (little-endian) da imagem inteira.
+
+Tipo 0 = bytes literais, 1 = setor Mode 1 (endereço + 2048 bytes),
+2 = Mode 2 Form 1 (0x804 bytes a partir do subcabeçalho) e 3 = Mode 2 Form 2
+(0x918 bytes). Nos tipos 2 e 3 o sync/cabeçalho de 16 bytes vai como literal.
+Classificação e regeneração são vetorizadas em lotes de setores (`ps1_ecc`).
+"""
+import io
+import os
+import struct
+
+from ps1_ecc import (
+    RAW, MODE1, MODE2_FORM1, MODE2_FORM2,
+    as_sectors, classify, regenerate, edc, edc_tables, require_numpy,
+)
+from ps1_container import ChunkWriter, ChunkReader
+from ps1_sectors import SECTOR_SIZE
+
+MAGIC = b"ECM\x00"
+BATCH_SECTORS = 4096
+END_COUNT = 0xFFFFFFFF
+
+# Bytes guardados por setor de cada tipo (os demais são recriados)
+PAYLOAD_SIZES = {MODE1: 3 + 0x800, MODE2_FORM1: 0x804, MODE2_FORM2: 0x918}
+
+def _type_count(sector_type, count):
+    """Codifica (tipo, contagem) no formato de tamanho variável do ECM."""
+    count = (count - 1) & 0xFFFFFFFF
+    out = bytearray([(0x80 if count >= 32 else 0) | ((count & 31) << 2) | sector_type])
+    count >>= 5
+    while count:
+        out.append((0x80 if count >= 128 else 0) | (count & 127))
+        count >>= 7
+    return bytes(out)
+
+def _read_type_count(stream):
+    byte = stream.read(1)
+    if not byte:
+        raise ValueError("ECM truncado")
+    c = byte[0]
+    sector_type, count, bits = c & 3, (c >> 2) & 0x1F, 5
+    while c & 0x80:
+        byte = stream.read(1)
+        if not byte:
+            raise ValueError("ECM truncado")
+        c = byte[0]
+        count |= (c & 0x7F) << bits
+        bits += 7
+    return sector_type, count
+
+# -----------------------------
+# EDC de um fluxo inteiro, calculado por setor e combinado
+class StreamEdc:
+    """EDC de um fluxo arbitrário: blocos de 2352 bytes são calculados em lote e
+    combinados usando a linearidade do CRC (EDC(A||B) = desloca(EDC(A)) ^ EDC(B))."""
+
+    _shift_tables = None
+
+    def __init__(self):
+        self.value = 0
+        self._carry = b""
+
+    @classmethod
+    def _shift(cls):
+        # Tabelas que aplicam "2352 bytes zero" a um EDC, byte a byte
+        if cls._shift_tables is None:
+            np = require_numpy()
+            t0, t1, t2, t3 = edc_tables()
+            crc = (np.arange(256, dtype=np.uint32)[None, :] << (np.arange(4, dtype=np.uint32)[:, None] * 8)).ravel()
+            for _ in range(SECTOR_SIZE // 4):
+                crc = t3[crc & 0xFF] ^ t2[(crc >> 8) & 0xFF] ^ t1[(crc >> 16) & 0xFF] ^ t0[crc >> 24]
+            cls._shift_tables = [int(x) for x in crc]
+        return cls._shift_tables
+
+    def update(self, data):
+        data = self._carry + bytes(data)
+        full = len(data) // SECTOR_SIZE * SECTOR_SIZE
+        if full:
+            shift = self._shift()
+            value = self.value
+            for block_edc in edc(as_sectors(data[:full])).tolist():
+                value = (shift[value & 0xFF] ^ shift[256 + ((value >> 8) & 0xFF)]
+                         ^ shift[512 + ((value >> 16) & 0xFF)] ^ shift[768 + (value >> 24)] ^ block_edc)
+            self.value = value
+        self._carry = data[full:]
+
+    def digest(self):
+        t0 = edc_tables()[0].tolist()
+        value = self.value
+        for byte in self._carry:
+            value = (value >> 8) ^ t0[(value ^ byte) & 0xFF]
+        return value
+
+# -----------------------------
+# Codificação
+class EcmEncoder:
+    """Objeto tipo arquivo: recebe a imagem via `write` e grava o ECM em `out`."""
+
+    def __init__(self, out):
+        require_numpy()
+        self._out = out
+        self._buffer = bytearray()
+        self._edc = StreamEdc()
+        self._out.write(MAGIC)
+
+    def write(self, data):
+        self._buffer += data
+        self._edc.update(data)
+        batch_bytes = BATCH_SECTORS * SECTOR_SIZE
+        while len(self._buffer) >= batch_bytes:
+            self._encode(bytes(self._buffer[:batch_bytes]))
+            del self._buffer[:batch_bytes]
+        return len(data)
+
+    def _encode(self, data):
+        np = require_numpy()
+        sectors = as_sectors(data)
+        types = classify(sectors)
+        # Conteúdo codificado de todos os setores de cada tipo, montado de uma vez
+        encoded = {}
+        mode1 = sectors[types == MODE1]
+        if len(mode1):
+            encoded[MODE1] = np.concatenate([mode1[:, 0x0C:0x0F], mode1[:, 0x10:0x810]], axis=1)
+        for sector_type in (MODE2_FORM1, MODE2_FORM2):
+            selected = sectors[types == sector_type]
+            if len(selected):
+                # Cada setor: literal de 16 bytes (sync + cabeçalho) e um registro de 1 setor
+                header, record = _type_count(RAW, 16), _type_count(sector_type, 1)
+                payload_end = 0x14 + PAYLOAD_SIZES[sector_type]
+                position = len(header) + 16 + len(record)
+                rows = np.empty((len(selected), position + PAYLOAD_SIZES[sector_type]), dtype=np.uint8)
+                rows[:, 0:len(header)] = np.frombuffer(header, dtype=np.uint8)
+                rows[:, len(header):len(header) + 16] = selected[:, 0:16]
+                rows[:, position - len(record):position] = np.frombuffer(record, dtype=np.uint8)
+                rows[:, position:] = selected[:, 0x14:payload_end]
+                encoded[sector_type] = rows
+        # Posição de cada setor entre os do seu tipo
+        rank = np.zeros(len(types), dtype=np.int64)
+        for sector_type in encoded:
+            mask = types == sector_type
+            rank[mask] = np.arange(np.count_nonzero(mask))
+
+        # Trechos contíguos do mesmo tipo
+        boundaries = np.flatnonzero(np.diff(types)) + 1
+        starts = np.concatenate([[0], boundaries]).tolist()
+        ends = np.concatenate([boundaries, [len(types)]]).tolist()
+        for start, end in zip(starts, ends):
+            sector_type = int(types[start])
+            if sector_type == RAW:
+                self._out.write(_type_count(RAW, (end - start) * SECTOR_SIZE))
+                self._out.write(sectors[start:end].tobytes())
+                continue
+            if sector_type == MODE1:
+                self._out.write(_type_count(MODE1, end - start))
+            first = int(rank[start])
+            self._out.write(encoded[sector_type][first:first + end - start].tobytes())
+
+    def close(self):
+        full = len(self._buffer) // SECTOR_SIZE * SECTOR_SIZE
+        if full:
+            self._encode(bytes(self._buffer[:full]))
+        tail = bytes(self._buffer[full:])
+        if tail:
+            self._out.write(_type_count(RAW, len(tail)))
+            self._out.write(tail)
+        self._buffer.clear()
+        self._out.write(_type_count(RAW, 0))
+        self._out.write(struct.pack("<I", self._edc.digest()))
+
+# -----------------------------
+# Decodificação
+def _rebuild(sector_type, rows):
+    """Setores decodificados (como bytes por linha) a partir dos conteúdos guardados."""
+    np = require_numpy()
+    sectors = np.zeros((len(rows), SECTOR_SIZE), dtype=np.uint8)
+    if sector_type == MODE1:
+        sectors[:, 0x0C:0x0F] = rows[:, 0:3]
+        sectors[:, 0x10:0x810] = rows[:, 3:]
+        return regenerate(sectors, MODE1)
+    sectors[:, 0x14:0x14 + rows.shape[1]] = rows
+    sectors[:, 0x10:0x14] = sectors[:, 0x14:0x18]
+    return regenerate(sectors, sector_type)[:, 0x10:]
+
+def decode_ecm(stream, out, on_progress=None):
+    """Decodifica o ECM lido de `stream` para `out`; valida o EDC final.
+
+    Registros de setor consecutivos (mesmo intercalados com literais curtos,
+    como nos setores Mode 2) são acumulados e regenerados juntos, em lote.
+    `on_progress(bytes)` é chamado com o total de bytes já gravados.
+    """
+    np = require_numpy()
+    if stream.read(4) != MAGIC:
+        raise ValueError("Arquivo não é ECM")
+    check = StreamEdc()
+    written = 0
+    pending = []  # (tipo, conteúdo) em ordem; tipo RAW = bytes literais
+    pending_sectors = 0
+
+    def flush():
+        nonlocal written, pending_sectors
+        rebuilt = {}
+        for sector_type in PAYLOAD_SIZES:
+            payloads = [payload for item_type, payload in pending if item_type == sector_type]
+            if payloads:
+                rebuilt[sector_type] = iter(_rebuild(sector_type, np.concatenate(payloads)))
+        parts = []
+        for item_type, payload in pending:
+            if item_type == RAW:
+                parts.append(payload)
+            else:
+                parts.extend(next(rebuilt[item_type]).tobytes() for _ in range(len(payload)))
+        data = b"".join(parts)
+        out.write(data)
+        check.update(data)
+        written += len(data)
+        pending.clear()
+        pending_sectors = 0
+        if on_progress:
+            on_progress(written)
+
+    while True:
+        sector_type, count = _read_type_count(stream)
+        if count == END_COUNT:
+            break
+        count += 1
+        if sector_type == RAW:
+            while count:
+                data = stream.read(min(count, 1024 * 1024))
+                if not data:
+                    raise ValueError("ECM truncado")
+                pending.append((RAW, data))
+                count -= len(data)
+                if len(data) > SECTOR_SIZE:
+                    flush()
+            continue
+        payload_size = PAYLOAD_SIZES[sector_type]
+        while count:
+            batch = min(count, BATCH_SECTORS)
+            payload = stream.read(batch * payload_size)
+            if len(payload) != batch * payload_size:
+                raise ValueError("ECM truncado")
+            pending.append((sector_type, np.frombuffer(payload, dtype=np.uint8).reshape(batch, payload_size)))
+            pending_sectors += batch
+            count -= batch
+            if pending_sectors >= BATCH_SECTORS:
+                flush()
+    flush()
+    stored = stream.read(4)
+    if len(stored) != 4 or struct.unpack("<I", stored)[0] != check.digest():
+        raise ValueError("EDC da imagem decodificada não confere")
+    return written
+
+# -----------------------------
+# Saída empacotada (ECM e/ou contêiner comprimido)
+def packed_name(base_name, output_format="img", compression=None):
+    """Nome do arquivo de imagem de saída: jogo.img, jogo.img.ecm, jogo.img.ecm.ps1z..."""
+    name = f"{base_name}.img"
+    if output_format == "ecm":
+        name += ".ecm"
+    if compression:
+        name += ".ps1z"
+    return name
+
+class PackedWriter:
+    """Encadeia ECM e contêiner comprimido sobre o arquivo de saída."""
+
+    def __init__(self, file_obj, output_format="img", compression=None, workers=None):
+        self._layers = []
+        sink = file_obj
+        if compression:
+            options = {"workers": workers} if workers else {}
+            sink = ChunkWriter(sink, compression, **options)
+            self._layers.append(sink)
+        if output_format == "ecm":
+            sink = EcmEncoder(sink)
+            self._layers.append(sink)
+        elif output_format != "img":
+            raise ValueError(f"Formato de saída desconhecido: {output_format}")
+        self._sink = sink
+
+    def write(self, data):
+        return self._sink.write(data)
+
+    def close(self):
+        # Fecha de fora para dentro: ECM primeiro, depois o contêiner
+        for layer in reversed(self._layers):
+            layer.close()
+
+def unpack_file(packed_path, output_folder, on_progress=None):
+    """Restaura a .img original de um .img.ecm, .img.ps1z ou .img.ecm.ps1z; retorna o caminho gerado."""
+    name = os.path.basename(packed_path)
+    if name.endswith(".ps1z"):
+        stream = io.BufferedReader(ChunkReader(packed_path), 1024 * 1024)
+    else:
+        stream = open(packed_path, 'rb')
+    if name.endswith(".ps1z"):
+        name = name[:-len(".ps1z")]
+    is_ecm = name.endswith(".ecm")
+    if is_ecm:
+        name = name[:-len(".ecm")]
+    output_path = os.path.join(output_folder, name)
+    try:
+        with open(output_path, 'wb') as out:
+            if is_ecm:
+                decode_ecm(stream, out, on_progress)
+            else:
+                written = 0
+                while True:
+                    data = stream.read(1024 * 1024)
+                    if not data:
+                        break
+                    out.write(data)
+                    written += len(data)
+                    if on_progress:
+                        on_progress(written)
+    finally:
+        stream.close()
+    return output_path
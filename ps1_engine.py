@@ -0,0 +1,413 @@
+"""Motor de conversão BIN/CUE -> IMG/CCD/SUB.
+
+Este módulo não depende de Tk, PIL ou pygame e não tem efeitos colaterais ao
+ser importado, podendo ser usado tanto pela GUI quanto pela linha de comando.
+"""
+import os
+from functools import partial
+from pathlib import Path
+
+from ps1_archive import ArchiveDisc, ArchiveError, is_archive
+from ps1_cue import CueError, load_cue_sheet
+from ps1_ecm import PackedWriter, packed_name
+from ps1_io import BUFFER_SIZE, BackendUnsupported, SparseWriter, copy_into, read_chunks, write_all
+from ps1_metrics import NULL_DISC, PHASE_PARSE
+from ps1_progress import PHASE_CCD, PHASE_DONE, PHASE_IMAGE, PHASE_SUB, PROGRESS_INTERVAL, ProgressEvent, RateMeter, Throttle
+from ps1_sectors import SECTOR_SIZE, ImageLayout, SectorCapture, SectorIndex, gap_sectors, track_start_lbas
+from ps1_subchannel import SUB_SIZE, generate_sub as generate_subchannel
+from ps1_verify import MultiHash, build_report
+
+RESUME_CHUNK = 1024 * 1024  # Granularidade da retomada de um .img parcial
+GAP_BATCH = 1024  # Setores de PREGAP/POSTGAP sintetizados por vez
+
+# -----------------------------
+# Função para parsear o arquivo .cue
+def parse_cue_file(cue_file):
+    """Lê o arquivo .cue e retorna uma lista de arquivos .bin e informações de faixas.
+
+    Mantida por compatibilidade; o código novo deve usar `ps1_cue.load_cue_sheet`.
+    """
+    sheet, error = _load_sheet(cue_file)
+    if error:
+        return [], [], error
+    tracks = [{
+        'number': track.number,
+        'type': track.mode,
+        'file': sheet.file_of(track).name,
+        'indexes': [{'number': index.number, 'timestamp': index.timestamp, 'total_frames': index.frames}
+                    for index in track.indexes],
+    } for track in sheet.tracks]
+    return sheet.bin_files, tracks, ""
+
+def _load_sheet(cue_file):
+    """Carrega o `CueSheet` (do cache, se possível) e retorna (sheet, mensagem de erro)."""
+    try:
+        return load_cue_sheet(cue_file), ""
+    except FileNotFoundError:
+        return None, "Erro: Arquivo .cue não encontrado."
+    except CueError as e:
+        return None, f"Erro: Arquivo .cue inválido: {e}"
+    except Exception as e:
+        return None, f"Erro ao parsear o arquivo .cue: {e}"
+
+# -----------------------------
+# Função para validar arquivos .bin e .cue
+def validate_bin_cue(bin_file, cue_file):
+    """Valida se os arquivos .bin e .cue são compatíveis e se os .bin referenciados existem."""
+    if not bin_file or not cue_file:
+        return False, "Selecione pelo menos um arquivo .bin e .cue."
+    
+    if is_archive(cue_file):
+        return _validate_archive(cue_file)
+    
+    bin_base = os.path.splitext(os.path.basename(bin_file))[0]
+    cue_base = os.path.splitext(os.path.basename(cue_file))[0]
+    if bin_base != cue_base:
+        return False, "Os arquivos .bin e .cue devem ter o mesmo nome base."
+    
+    sheet, error = _load_sheet(cue_file)
+    if error:
+        return False, error
+    
+    if not sheet.files:
+        return False, "Nenhum arquivo .bin encontrado no .cue."
+    
+    cue_dir = Path(os.path.dirname(cue_file))
+    for bin_name in sheet.bin_files:
+        bin_path = cue_dir / bin_name
+        if not bin_path.exists():
+            return False, f"O arquivo .bin referenciado no .cue ('{bin_name}') não foi encontrado."
+    
+    return True, ""
+
+def _validate_archive(archive_file):
+    """Valida um arquivo compactado: um único .cue e todos os .bin referenciados presentes."""
+    try:
+        with ArchiveDisc(archive_file) as archive:
+            if not archive.sheet.files:
+                return False, "Nenhum arquivo .bin encontrado no .cue."
+            for bin_name in archive.sheet.bin_files:
+                if not archive.has(bin_name):
+                    return False, f"O arquivo .bin referenciado no .cue ('{bin_name}') não foi encontrado em {os.path.basename(archive_file)}."
+    except FileNotFoundError:
+        return False, "Erro: Arquivo compactado não encontrado."
+    except (ArchiveError, CueError) as e:
+        return False, f"Erro: Arquivo compactado inválido: {e}"
+    except Exception as e:
+        return False, f"Erro ao ler o arquivo compactado: {e}"
+    return True, ""
+
+# -----------------------------
+# Função para gerar o .ccd
+CCD_TRACK_MODES = {"AUDIO": 0, "MODE1/2352": 1, "MODE2/2352": 2}
+
+def write_ccd(output_ccd, sector_index):
+    """Grava o .ccd com a TOC calculada pelo índice de setores (LBAs absolutos e lead-out)."""
+    toc = sector_index.toc()
+    tracks = sector_index.sheet.tracks
+    # Modo do pregap da faixa 1 (o mesmo da faixa): 0 áudio, 1 Mode 1, 2 Mode 2
+    pregap_mode = CCD_TRACK_MODES.get(sector_index.track_mode(tracks[0]), 2) if tracks else 2
+    with open(output_ccd, 'w', encoding='utf-8') as ccd_file:
+        ccd_file.write("[CloneCD]\n")
+        ccd_file.write("Version=3\n")
+        ccd_file.write("[Disc]\n")
+        ccd_file.write(f"TocEntries={len(toc)}\n")
+        ccd_file.write("Sessions=1\n")
+        ccd_file.write("DataTracksScrambled=0\n")
+        ccd_file.write("CDTextLength=0\n")
+        ccd_file.write("[Session 1]\n")
+        ccd_file.write(f"PreGapMode={pregap_mode}\n")
+        ccd_file.write("PreGapSubC=0\n")
+        
+        for number, entry in enumerate(toc):
+            ccd_file.write(f"[Entry {number}]\n")
+            ccd_file.write(f"Session=1\n")
+            ccd_file.write(f"Point=0x{entry.point:02x}\n")
+            ccd_file.write(f"ADR=0x01\n")
+            ccd_file.write(f"Control=0x{entry.control:02x}\n")
+            ccd_file.write(f"TrackNo=0\n")
+            ccd_file.write(f"AMin=0\n")
+            ccd_file.write(f"ASec=0\n")
+            ccd_file.write(f"AFrame=0\n")
+            ccd_file.write(f"ALBA=-150\n")
+            ccd_file.write(f"Zero=0\n")
+            ccd_file.write(f"PMin={entry.pmin}\n")
+            ccd_file.write(f"PSec={entry.psec}\n")
+            ccd_file.write(f"PFrame={entry.pframe}\n")
+            ccd_file.write(f"PLBA={entry.plba}\n")
+        
+        for track in tracks:
+            ccd_file.write(f"[TRACK {track.number}]\n")
+            ccd_file.write(f"MODE={CCD_TRACK_MODES.get(sector_index.track_mode(track), 2)}\n")
+            for number, lba in sector_index.index_lbas(track):
+                ccd_file.write(f"INDEX {number}={lba}\n")
+
+# -----------------------------
+# Função para converter .bin/.cue para .img, .ccd e, se disponível, .sub
+def convert_to_img_ccd_sub(bin_file, cue_file, output_folder, copy_backend=None, verify=False, dat_index=None, on_verified=None,
+                           resume=False, generate_sub=False, output_format="img", compression=None, compress_workers=None,
+                           pipeline=None, metrics=None, sparse=False):
+    """Converte o arquivo .bin/.cue para .img, .ccd e, se existir, copia .sub.
+
+    `copy_backend` escolhe o backend de cópia de `ps1_io` (None = o mais rápido disponível)
+    e `pipeline` (`ps1_io.PipelineOptions`) ajusta a leitura/escrita em buffer.
+    Com `verify` (ou um `dat_index`), calcula CRC32/MD5/SHA-1 de cada .bin e do
+    .img durante a própria cópia, confere com o DAT e entrega o relatório a
+    `on_verified(report)`.
+    Com `resume`, um .img parcial de uma execução interrompida é continuado a
+    partir do último bloco completo (ignorado quando há verificação, que
+    precisa ler o disco inteiro).
+    Com `generate_sub`, discos sem .sub recebem um .sub sintético (canais P/Q).
+    Com `output_format="ecm"` e/ou `compression` ("store", "zlib", "lzma",
+    "zstd"), a imagem é gravada como .img.ecm / .img[.ecm].ps1z em vez de .img
+    (sem retomada: o arquivo é sempre regravado por inteiro).
+    `cue_file` também pode ser um arquivo compactado (.zip, .tar.gz, .7z) com
+    o .cue e os .bin: eles são descompactados em fluxo direto para a saída, sem
+    arquivos temporários (e sem retomada).
+    Com `metrics` (`ps1_metrics.Metrics`), registra tempo, bytes, blocos e
+    erros de cada fase do disco.
+    Com `sparse`, o .img é pré-alocado e os blocos zerados (preenchimento,
+    pregaps) viram buracos no arquivo; a mensagem final informa o espaço
+    economizado (sem retomada; não se aplica a .ecm/.ps1z).
+    """
+    archive = None
+    recorder = metrics.disc(cue_file) if metrics else NULL_DISC
+    try:
+        cue_dir = Path(os.path.dirname(cue_file))
+        if is_archive(cue_file):
+            with recorder.phase(PHASE_PARSE):
+                archive = ArchiveDisc(cue_file)
+            base_name = archive.base_name
+        else:
+            base_name = os.path.splitext(os.path.basename(cue_file))[0]
+        packed = output_format != "img" or bool(compression)
+        output_img = Path(output_folder) / packed_name(base_name, output_format, compression)
+        output_ccd = Path(output_folder) / f"{base_name}.ccd"
+        output_sub = Path(output_folder) / f"{base_name}.sub"
+        
+        # Parseia o .cue (reaproveita o resultado da validação, se houver)
+        if archive:
+            sheet = archive.sheet
+        else:
+            with recorder.phase(PHASE_PARSE) as stats:
+                sheet, error = _load_sheet(cue_file)
+            if error:
+                stats.fail()
+                return False, error
+            stats.add(os.path.getsize(cue_file))
+        bin_files = sheet.bin_files
+        
+        # Concatena .bin em .img, com os setores de PREGAP/POSTGAP do .cue no lugar deles
+        file_size = archive.size if archive else (lambda bin_name: os.path.getsize(cue_dir / bin_name))
+        layout = ImageLayout(sheet, [file_size(bin_name) for bin_name in bin_files])
+        total_size = layout.total_size
+        verify = verify or dat_index is not None
+        image_hash = MultiHash() if verify else None
+        track_hashes = [(bin_name, MultiHash()) for bin_name in bin_files] if verify else []
+        # Sem os .bin no disco, a TOC é montada com os setores capturados durante a cópia
+        capture = SectorCapture(track_start_lbas(sheet, [file_size(f.name) for f in sheet.files])) if archive else None
+        
+        sparse = sparse and not packed
+        resume_from = 0
+        if resume and not verify and not packed and not archive and not sparse and output_img.exists():
+            resume_from = min(output_img.stat().st_size // RESUME_CHUNK * RESUME_CHUNK, total_size)
+        
+        with recorder.phase(PHASE_IMAGE) as stats, open(output_img, 'r+b' if resume_from else 'wb') as img_file:
+            img_file.truncate(resume_from)
+            img_file.seek(resume_from)
+            copied_size = resume_from
+            skip = resume_from
+            writer = PackedWriter(img_file, output_format, compression, compress_workers) if packed else None
+            sparse_writer = SparseWriter(img_file.fileno(), total_size) if sparse else None
+            # Destino dos setores de gap: o mesmo da cópia (a cópia direta grava pelo descritor)
+            if writer or sparse_writer or archive:
+                write_gap = (writer or sparse_writer or img_file).write
+            else:
+                write_gap = partial(write_all, img_file.fileno())
+            stream = stream_file = None  # Fluxo aberto do .bin compactado atual
+            try:
+                for span in layout.spans:
+                    if skip >= span.size:
+                        skip -= span.size
+                        continue
+                    offset, skip = skip, 0
+                    sinks = [capture.update] if capture else []
+                    if verify:
+                        sinks.append(image_hash.update)
+                    if span.is_gap:
+                        copier = _write_gap(span, offset, write_gap, sinks)
+                    else:
+                        bin_path = cue_dir / bin_files[span.file_index]
+                        if verify:
+                            sinks.append(track_hashes[span.file_index][1].update)
+                        if archive:
+                            if stream_file != span.file_index:
+                                if stream:
+                                    stream.close()
+                                stream, stream_file = archive.open(bin_files[span.file_index]), span.file_index
+                            copier = _write_stream(stream, writer or sparse_writer or img_file, sinks, length=span.size)
+                        elif writer:
+                            copier = _write_packed(bin_path, writer, sinks, pipeline, span.offset, span.size)
+                        else:
+                            copier = copy_into(bin_path, img_file.fileno(), copy_backend, sinks, span.offset + offset, pipeline,
+                                               sparse_writer, span.size - offset)
+                    for copied in copier:
+                        stats.add(copied)
+                        copied_size += copied
+                        yield ProgressEvent(PHASE_IMAGE, base_name, copied_size / total_size * 50.0, copied_size, total_size,
+                                            f"Convertendo {output_img.name}")
+            finally:
+                if stream:
+                    stream.close()
+            if writer:
+                writer.close()
+            if sparse_writer:
+                sparse_writer.close()
+        saved_note = ""
+        if sparse_writer and sparse_writer.saved:
+            saved_note = f" ({sparse_writer.saved / (1024 * 1024):.1f} MB economizados com blocos zerados esparsos)"
+        
+        if verify:
+            report = build_report(cue_file, [(name, h.result()) for name, h in track_hashes], image_hash.result(), dat_index)
+            if on_verified:
+                on_verified(report)
+        
+        def open_index():
+            if archive:
+                return SectorIndex.from_captured(sheet, [file_size(f.name) for f in sheet.files], capture.sectors)
+            return SectorIndex(sheet, cue_dir)
+        
+        # Gera o .ccd
+        yield ProgressEvent(PHASE_CCD, base_name, 50.0, action=f"Gerando {base_name}.ccd")
+        with recorder.phase(PHASE_CCD) as stats, open_index() as sector_index:
+            write_ccd(output_ccd, sector_index)
+            stats.add(output_ccd.stat().st_size)
+        
+        # Copia o .sub, se existir (ou gera um sintético, se pedido)
+        if archive:
+            sub_name = os.path.splitext(os.path.basename(archive.cue_member))[0] + ".sub"
+            has_sub = archive.has(sub_name)
+        else:
+            sub_file = cue_dir / f"{base_name}.sub"
+            has_sub = sub_file.exists()
+        if has_sub:
+            yield ProgressEvent(PHASE_SUB, base_name, 75.0, action=f"Copiando {base_name}.sub")
+            with recorder.phase(PHASE_SUB) as stats, open(output_sub, 'wb') as sub_out:
+                if archive:
+                    with archive.open(sub_name) as stream:
+                        for copied in _write_stream(stream, sub_out):
+                            stats.add(copied)
+                else:
+                    for copied in copy_into(sub_file, sub_out.fileno(), copy_backend, pipeline=pipeline):
+                        stats.add(copied)
+            return True, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd}, {output_sub}{saved_note}"
+        elif generate_sub:
+            with recorder.phase(PHASE_SUB) as stats, open_index() as sector_index:
+                total_sectors = max(sector_index.total_sectors, 1)
+                done = 0
+                yield ProgressEvent(PHASE_SUB, base_name, 75.0, 0, total_sectors * SUB_SIZE, f"Gerando {base_name}.sub")
+                for sectors in generate_subchannel(sector_index, output_sub):
+                    stats.add(sectors * SUB_SIZE)
+                    done += sectors
+                    yield ProgressEvent(PHASE_SUB, base_name, 75.0 + done / total_sectors * 25.0, done * SUB_SIZE,
+                                        total_sectors * SUB_SIZE, f"Gerando {base_name}.sub")
+            return True, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd}, {output_sub} (.sub sintético){saved_note}"
+        else:
+            return True, f"Conversão concluída! Arquivos gerados: {output_img}, {output_ccd} (nenhum .sub encontrado){saved_note}"
+    
+    except PermissionError:
+        return False, "Erro: Permissão negada ao escrever arquivos na pasta de saída."
+    except FileNotFoundError:
+        return False, "Erro: Arquivo .bin ou .cue não encontrado."
+    except (ArchiveError, CueError) as e:
+        return False, f"Erro: Arquivo compactado inválido: {e}"
+    except BackendUnsupported as e:
+        return False, f"Erro: {e}."
+    except Exception as e:
+        return False, f"Erro durante a conversão: {e}"
+    finally:
+        if archive:
+            archive.close()
+
+def _write_packed(src_path, writer, sinks=None, pipeline=None, offset=0, length=None):
+    """Lê `src_path` (a partir de `offset`, `length` bytes) em blocos e grava no `PackedWriter`;
+    gerador que produz os bytes copiados."""
+    with open(src_path, 'rb') as src:
+        size = os.fstat(src.fileno()).st_size - offset
+        for data in read_chunks(src.fileno(), offset, size if length is None else min(size, length), pipeline):
+            for sink in sinks or ():
+                sink(data)
+            writer.write(data)
+            yield len(data)
+
+def _write_stream(stream, target, sinks=None, buffer_size=BUFFER_SIZE, length=None):
+    """Copia um fluxo (ex.: um membro de .zip) para `target.write` usando um único
+    buffer reaproveitado; gerador que produz os bytes copiados.
+
+    Com `length`, copia só esses bytes e deixa o fluxo posicionado logo depois.
+    """
+    buffer = memoryview(bytearray(buffer_size))
+    remaining = length
+    while remaining is None or remaining > 0:
+        count = stream.readinto(buffer if remaining is None else buffer[:min(buffer_size, remaining)])
+        if not count:
+            break
+        chunk = buffer[:count]
+        for sink in sinks or ():
+            sink(chunk)
+        target.write(chunk)
+        if remaining is not None:
+            remaining -= count
+        yield count
+
+def _write_gap(span, offset, write, sinks=None):
+    """Grava os setores sintetizados de um PREGAP/POSTGAP (`ImageSpan`) a partir de `offset` bytes;
+    gerador que produz os bytes gravados."""
+    first = offset // SECTOR_SIZE
+    for start in range(first, span.sectors, GAP_BATCH):
+        data = memoryview(gap_sectors(span.mode, span.lba + start, min(GAP_BATCH, span.sectors - start)))
+        if start == first:
+            data = data[offset - first * SECTOR_SIZE:]
+        for sink in sinks or ():
+            sink(data)
+        write(data)
+        yield len(data)
+
+# -----------------------------
+# Funções auxiliares para clientes (GUI/CLI)
+def find_bin_for_cue(cue_file):
+    """Retorna o caminho do .bin com o mesmo nome base do .cue (para arquivos
+    compactados, o próprio arquivo, que contém os .bin)."""
+    if is_archive(cue_file):
+        return cue_file
+    cue_base = os.path.splitext(os.path.basename(cue_file))[0]
+    return os.path.join(os.path.dirname(cue_file), f"{cue_base}.bin")
+
+def convert_pair(bin_file, cue_file, output_folder, on_progress=None, progress_interval=PROGRESS_INTERVAL, **options):
+    """Executa a conversão até o fim e retorna (sucesso, mensagem).
+
+    `on_progress(event)` recebe `ProgressEvent`s com taxa e ETA, no máximo um
+    a cada `progress_interval` segundos (o mais recente), e por último um
+    evento `PHASE_DONE` com o resultado. `options` são repassadas para
+    `convert_to_img_ccd_sub`; com `metrics`, o resultado também é registrado nas métricas do disco.
+    """
+    conversion = convert_to_img_ccd_sub(bin_file, cue_file, output_folder, **options)
+    metrics = options.get("metrics")
+    throttle = meter = None
+    if on_progress:
+        throttle = Throttle(on_progress, progress_interval)
+        meter = RateMeter()
+    while True:
+        try:
+            event = next(conversion)
+        except StopIteration as stop:
+            result = stop.value
+            break
+        if throttle:
+            throttle(meter.update(event))
+    if metrics:
+        metrics.disc(cue_file).finish(result)
+    if throttle:
+        disc = os.path.splitext(os.path.basename(cue_file))[0]
+        throttle(ProgressEvent(PHASE_DONE, disc, 100.0, result=result))
+    return result
@@ -0,0 +1,236 @@
+"""Verificação de integridade setor a setor e mapa de erros de dumps suspeitos.
+
+Para cada setor das faixas de dados com setores crus (MODE1/2352, MODE2/2352)
+confere, segundo o layout do .cue: sync, endereço MSF do cabeçalho, byte de
+modo, subheader (Mode 2), EDC e, onde existe (Mode 1 e Mode 2 Form 1), ECC.
+Os setores são lidos e verificados em lotes grandes com NumPy (`ps1_ecc`), e
+os lotes de todas as faixas são distribuídos por um pool de threads (as
+operações do NumPy liberam o GIL), então até um disco de uma faixa só usa
+todos os núcleos.
+
+O resultado é um mapa compacto: faixas de LBAs ruins consecutivos com o mesmo
+conjunto de falhas, `[lba, quantidade, falhas]`.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ps1_archive import ArchiveDisc, is_archive
+from ps1_cue import load_cue_sheet
+from ps1_ecc import stored_edc, ecc, edc, require_numpy
+from ps1_sectors import DATA_MODES, LBA_OFFSET, SECTOR_SIZE, SYNC, ImageLayout, msf_bcd
+
+CHECK_BATCH = 4096  # setores por lote (~9,6 MB)
+CHECK_WORKERS = os.cpu_count() or 1
+
+# Falhas de um setor (bits combináveis)
+BAD_SYNC = 0x01
+BAD_HEADER = 0x02  # endereço MSF diferente do esperado pela posição no disco
+BAD_MODE = 0x04
+BAD_SUBHEADER = 0x08  # as duas cópias do subheader Mode 2 diferem
+BAD_EDC = 0x10
+BAD_ECC = 0x20
+ERROR_NAMES = {
+    BAD_SYNC: "sync", BAD_HEADER: "header", BAD_MODE: "mode",
+    BAD_SUBHEADER: "subheader", BAD_EDC: "edc", BAD_ECC: "ecc",
+}
+
+def describe_flags(flags):
+    """Nomes das falhas de um valor de `flags` (ex.: "edc+ecc")."""
+    return "+".join(name for bit, name in ERROR_NAMES.items() if flags & bit)
+
+# -----------------------------
+# Layout: quais setores verificar
+def data_ranges(sheet, file_sizes):
+    """Intervalos de setores de dados a verificar.
+
+    Retorna [(índice do FILE, primeiro setor no FILE, quantidade, LBA, endereço
+    MSF do primeiro setor, modo)]. Os LBAs são os da imagem
+    (`ps1_sectors.ImageLayout`, com os PREGAP/POSTGAP do .cue), os mesmos da
+    TOC e do .sub, e o endereço esperado é o LBA mais o lead-in.
+    """
+    ranges = []
+    for span in ImageLayout(sheet, file_sizes).spans:
+        mode = DATA_MODES.get(span.mode.upper())
+        if mode and not span.is_gap and span.sectors > 0:
+            ranges.append((span.file_index, span.offset // SECTOR_SIZE, span.sectors, span.lba, span.lba + LBA_OFFSET, mode))
+    return ranges
+
+# -----------------------------
+# Verificação vetorizada de um lote
+def check_batch(sectors, first_address, mode):
+    """Falhas (uint8, uma por setor) de um lote (n x 2352) cujo primeiro setor tem o endereço MSF
+    absoluto `first_address` (em frames) e deveria ser do `mode` dado (1 ou 2)."""
+    np = require_numpy()
+    n = len(sectors)
+    flags = np.zeros(n, dtype=np.uint8)
+    if not n:
+        return flags
+    flags[~(sectors[:, 0:12] == np.frombuffer(SYNC, dtype=np.uint8)).all(axis=1)] |= BAD_SYNC
+    minute, second, frame = msf_bcd(np.arange(first_address, first_address + n))
+    flags[(sectors[:, 12] != minute) | (sectors[:, 13] != second) | (sectors[:, 14] != frame)] |= BAD_HEADER
+    flags[sectors[:, 15] != mode] |= BAD_MODE
+
+    if mode == 1:
+        flags[edc(sectors[:, 0:0x810]) != stored_edc(sectors, 0x810)] |= BAD_EDC
+        flags[(ecc(sectors) != sectors[:, 0x81C:0x930]).any(axis=1)] |= BAD_ECC
+        return flags
+
+    flags[(sectors[:, 0x10:0x14] != sectors[:, 0x14:0x18]).any(axis=1)] |= BAD_SUBHEADER
+    form2 = (sectors[:, 0x12] & 0x20) != 0
+    form1 = np.flatnonzero(~form2)
+    if len(form1):
+        block = sectors[form1]
+        flags[form1[edc(block[:, 0x10:0x818]) != stored_edc(block, 0x818)]] |= BAD_EDC
+        flags[form1[(ecc(block, zero_address=True) != block[:, 0x81C:0x930]).any(axis=1)]] |= BAD_ECC
+    form2 = np.flatnonzero(form2)
+    if len(form2):
+        # No Form 2 o EDC é opcional: zero significa "sem EDC"
+        block = sectors[form2]
+        stored = stored_edc(block, 0x92C)
+        flags[form2[(stored != 0) & (edc(block[:, 0x10:0x92C]) != stored)]] |= BAD_EDC
+    return flags
+
+def error_runs(flags, first_lba):
+    """Mapa compacto de um lote: [[lba, quantidade, falhas]] para cada sequência de setores com as mesmas falhas."""
+    np = require_numpy()
+    bad = np.flatnonzero(flags)
+    if not len(bad):
+        return []
+    # Uma sequência nova começa onde o LBA pula ou as falhas mudam
+    breaks = np.flatnonzero((np.diff(bad) != 1) | (np.diff(flags[bad].astype(np.int16)) != 0)) + 1
+    runs = []
+    for run in np.split(bad, breaks):
+        runs.append([first_lba + int(run[0]), len(run), int(flags[run[0]])])
+    return runs
+
+def _merge_runs(runs):
+    merged = []
+    for run in sorted(runs):
+        if merged and merged[-1][0] + merged[-1][1] == run[0] and merged[-1][2] == run[2]:
+            merged[-1][1] += run[1]
+        else:
+            merged.append(list(run))
+    return merged
+
+# -----------------------------
+# Verificação de um disco
+def _check_file_batch(path, first_sector, count, lba, address, mode, buffers):
+    """Lê um lote de `path` com preadv num buffer reaproveitado da thread e retorna (setores lidos, sequências)."""
+    np = require_numpy()
+    buffer = getattr(buffers, "array", None)
+    if buffer is None or len(buffer) < count * SECTOR_SIZE:
+        buffer = buffers.array = np.empty(max(count, CHECK_BATCH) * SECTOR_SIZE, dtype=np.uint8)
+    with open(path, 'rb') as f:
+        view = memoryview(buffer)[:count * SECTOR_SIZE]
+        if hasattr(os, "preadv"):
+            read = os.preadv(f.fileno(), [view], first_sector * SECTOR_SIZE)
+        else:
+            f.seek(first_sector * SECTOR_SIZE)
+            read = f.readinto(view)
+        view.release()
+    sectors = buffer[:read // SECTOR_SIZE * SECTOR_SIZE].reshape(-1, SECTOR_SIZE)
+    return len(sectors), error_runs(check_batch(sectors, address, mode), lba)
+
+def check_disc(cue_file, workers=CHECK_WORKERS, on_progress=None, batch=CHECK_BATCH):
+    """Verifica todos os setores de dados de um disco (.cue ou arquivo compactado).
+
+    `on_progress(done, total)` recebe setores verificados/total. Retorna o
+    relatório (dict) com o mapa de erros em "errors" ([[lba, quantidade, falhas]]).
+    """
+    require_numpy("verificar setores")
+    if is_archive(cue_file):
+        return _check_archive(cue_file, on_progress, batch)
+    sheet = load_cue_sheet(cue_file)
+    cue_dir = Path(os.path.dirname(cue_file))
+    paths = [cue_dir / cue_entry.name for cue_entry in sheet.files]
+    ranges = data_ranges(sheet, [os.path.getsize(path) for path in paths])
+    jobs = []
+    for file_index, first, count, lba, address, mode in ranges:
+        for offset in range(0, count, batch):
+            size = min(batch, count - offset)
+            jobs.append((paths[file_index], first + offset, size, lba + offset, address + offset, mode))
+    total = sum(job[2] for job in jobs)
+    lock = threading.Lock()
+    buffers = threading.local()
+    done = 0
+
+    def run(job):
+        nonlocal done
+        checked, runs = _check_file_batch(*job, buffers)
+        if on_progress:
+            with lock:
+                done += job[2]
+                on_progress(done, total)
+        return checked, runs
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(run, jobs))
+    return _build_report(cue_file, sheet, ranges, results)
+
+def _check_archive(archive_file, on_progress, batch):
+    """Verificação de um disco compactado: os .bin são lidos em fluxo, sequencialmente."""
+    np = require_numpy()
+    with ArchiveDisc(archive_file) as archive:
+        sheet = archive.sheet
+        ranges = data_ranges(sheet, [archive.size(cue_entry.name) for cue_entry in sheet.files])
+        total = sum(entry[2] for entry in ranges)
+        done = 0
+        results = []
+        by_file = {}
+        for entry in ranges:
+            by_file.setdefault(entry[0], []).append(entry)
+        for file_index, entries in sorted(by_file.items()):
+            with archive.open(sheet.files[file_index].name) as stream:
+                position = 0  # setor atual no FILE
+                for _, first, count, lba, address, mode in entries:
+                    if first > position:
+                        _skip(stream, (first - position) * SECTOR_SIZE)
+                        position = first
+                    for offset in range(0, count, batch):
+                        size = min(batch, count - offset)
+                        data = stream.read(size * SECTOR_SIZE)
+                        sectors = np.frombuffer(data, dtype=np.uint8, count=len(data) // SECTOR_SIZE * SECTOR_SIZE)
+                        sectors = sectors.reshape(-1, SECTOR_SIZE)
+                        results.append((len(sectors), error_runs(check_batch(sectors, address + offset, mode), lba + offset)))
+                        position += size
+                        done += size
+                        if on_progress:
+                            on_progress(done, total)
+    return _build_report(archive_file, sheet, ranges, results)
+
+def _skip(stream, length):
+    while length > 0:
+        data = stream.read(min(length, 1024 * 1024))
+        if not data:
+            break
+        length -= len(data)
+
+def _build_report(cue_file, sheet, ranges, results):
+    expected = sum(entry[2] for entry in ranges)
+    checked = sum(count for count, _ in results)
+    errors = _merge_runs([run for _, runs in results for run in runs])
+    bad = sum(run[1] for run in errors)
+    summary = {}
+    for _, count, flags in errors:
+        for bit, name in ERROR_NAMES.items():
+            if flags & bit:
+                summary[name] = summary.get(name, 0) + count
+    return {
+        "cue": str(cue_file),
+        "data_tracks": sum(1 for track in sheet.tracks if track.mode.upper() in DATA_MODES),
+        "sectors_checked": checked,
+        "sectors_missing": expected - checked,
+        "bad_sectors": bad,
+        "status": "ok" if not bad and checked == expected else "damaged",
+        "summary": summary,
+        "errors": errors,
+    }
+
+def write_error_map(reports, map_path):
+    """Grava os relatórios num JSON compacto, com a tabela de bits das falhas."""
+    with open(map_path, 'w', encoding='utf-8') as f:
+        json.dump({"flags": {name: bit for bit, name in ERROR_NAMES.items()}, "discs": reports}, f,
+                  ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,490 @@
+"""Backends de cópia usados para montar o .img e copiar o .sub.
+
+Cada backend copia um intervalo de um descritor de origem para a posição atual
+do descritor de destino. `copy_into` tenta os backends do mais rápido para o
+mais lento (reflink, copy_file_range, sendfile, leitura/escrita em buffer) e
+passa para o próximo quando o sistema de arquivos ou o SO não suporta o atual.
+
+O backend em buffer usa um pipeline: uma thread lê com `preadv` em buffers
+pré-alocados (alinhados à página, reaproveitados bloco a bloco) enquanto o
+chamador grava e calcula hashes, então leitura e escrita se sobrepõem. Ver
+`PipelineOptions` para tamanho/quantidade de buffers, dicas `posix_fadvise` e
+O_DIRECT.
+
+`SparseWriter` grava a saída pré-alocada e com os blocos zerados como buracos.
+`write_atomic` grava arquivos pequenos (manifesto, índice, métricas) sem
+nunca deixá-los pela metade.
+"""
+import ctypes
+import ctypes.util
+import errno
+import mmap
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB por chamada ao kernel
+BUFFER_SIZE = 4 * 1024 * 1024  # 4 MB por buffer do pipeline
+PIPELINE_BUFFERS = 3  # um sendo lido, um sendo gravado, um de folga
+DIRECT_ALIGNMENT = 4096
+FICLONERANGE = 0x4020940D  # _IOW(0x94, 13, struct file_clone_range)
+
+# Erros que indicam "backend não suportado aqui", e não falha de E/S
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP,
+    errno.EBADF, errno.ETXTBSY, errno.ENOTTY, errno.EPERM,
+}
+
+class BackendUnsupported(Exception):
+    """O backend não pode ser usado para esta cópia; tente o próximo."""
+
+def _unsupported(e):
+    return isinstance(e, OSError) and e.errno in _UNSUPPORTED_ERRNOS
+
+# -----------------------------
+# Backends: gerador(src_fd, dst_fd, offset, length) -> bytes copiados por passo
+def _copy_reflink(src_fd, dst_fd, offset, length):
+    """Clona os blocos (btrfs/XFS) com FICLONERANGE, sem copiar dados."""
+    if fcntl is None:
+        raise BackendUnsupported("fcntl indisponível")
+    dst_offset = os.lseek(dst_fd, 0, os.SEEK_CUR)
+    try:
+        block_size = os.fstat(dst_fd).st_blksize or 4096
+        # O kernel exige offsets alinhados ao bloco; o tamanho só pode ser
+        # desalinhado quando a faixa termina no fim do arquivo de origem
+        src_end = os.fstat(src_fd).st_size
+        if dst_offset % block_size or offset % block_size or (length % block_size and offset + length != src_end):
+            raise BackendUnsupported("offsets não alinhados ao bloco")
+        fcntl.ioctl(dst_fd, FICLONERANGE, struct.pack("qQQQ", src_fd, offset, length, dst_offset))
+    except OSError as e:
+        if _unsupported(e):
+            raise BackendUnsupported(str(e)) from e
+        raise
+    os.lseek(dst_fd, dst_offset + length, os.SEEK_SET)
+    yield length
+
+def _copy_file_range(src_fd, dst_fd, offset, length):
+    """Cópia dentro do kernel (e server-side em NFS/SMB) com copy_file_range."""
+    if not hasattr(os, "copy_file_range"):
+        raise BackendUnsupported("copy_file_range indisponível")
+    end = offset + length
+    while offset < end:
+        try:
+            copied = os.copy_file_range(src_fd, dst_fd, min(CHUNK_SIZE, end - offset), offset)
+        except OSError as e:
+            if _unsupported(e):
+                raise BackendUnsupported(str(e)) from e
+            raise
+        if not copied:
+            break
+        offset += copied
+        yield copied
+
+def _copy_sendfile(src_fd, dst_fd, offset, length):
+    """Cópia dentro do kernel com sendfile (Linux aceita arquivo como destino)."""
+    if not hasattr(os, "sendfile"):
+        raise BackendUnsupported("sendfile indisponível")
+    end = offset + length
+    while offset < end:
+        try:
+            copied = os.sendfile(dst_fd, src_fd, offset, min(CHUNK_SIZE, end - offset))
+        except OSError as e:
+            if _unsupported(e) or e.errno == errno.ENOTSOCK:
+                raise BackendUnsupported(str(e)) from e
+            raise
+        if not copied:
+            break
+        offset += copied
+        yield copied
+
+# -----------------------------
+# Pipeline de leitura em buffers reaproveitados
+@dataclass(slots=True)
+class PipelineOptions:
+    """Ajustes do pipeline do backend em buffer.
+
+    `buffers=1` desliga a sobreposição (lê, grava, lê...). `fadvise` avisa o
+    kernel que a leitura é sequencial e descarta do page cache o que já foi
+    copiado, para que lotes grandes não expulsem o resto do cache. `direct`
+    lê a origem com O_DIRECT (ignorado quando o sistema de arquivos ou o
+    offset não permitem).
+    """
+    buffer_size: int = BUFFER_SIZE
+    buffers: int = PIPELINE_BUFFERS
+    fadvise: bool = False
+    direct: bool = False
+
+DEFAULT_PIPELINE = PipelineOptions()
+
+def _fadvise(fd, offset, length, advice):
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError:
+            pass  # Só uma dica; alguns sistemas de arquivos não aceitam
+
+def _set_direct(fd, enabled):
+    """Liga/desliga O_DIRECT no descritor; retorna se o estado pedido foi aplicado."""
+    if fcntl is None or not hasattr(os, "O_DIRECT"):
+        return False
+    try:
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, (flags | os.O_DIRECT) if enabled else (flags & ~os.O_DIRECT))
+    except OSError:
+        return False
+    return True
+
+def _read_at(fd, view, offset):
+    if hasattr(os, "preadv"):
+        return os.preadv(fd, [view], offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    data = os.read(fd, len(view))
+    view[:len(data)] = data
+    return len(data)
+
+def read_chunks(src_fd, offset, length, pipeline=None):
+    """Lê `length` bytes de `src_fd` a partir de `offset` numa thread separada.
+
+    Gerador que produz memoryviews dos buffers do pipeline, na ordem. Cada view
+    só é válida até o próximo passo do gerador (o buffer volta a ser lido),
+    então quem precisar guardar os dados deve copiá-los.
+    """
+    pipeline = pipeline or DEFAULT_PIPELINE
+    buffer_size = max(DIRECT_ALIGNMENT, pipeline.buffer_size // DIRECT_ALIGNMENT * DIRECT_ALIGNMENT)
+    # O_DIRECT exige buffer, offset e tamanho alinhados; mmap anônimo já é alinhado à página
+    direct = pipeline.direct and offset % DIRECT_ALIGNMENT == 0 and _set_direct(src_fd, True)
+    buffers = [mmap.mmap(-1, buffer_size) for _ in range(max(1, pipeline.buffers))]
+    views = [memoryview(buffer) for buffer in buffers]
+    free = queue.Queue()
+    filled = queue.Queue()
+    stop = threading.Event()
+    for view in views:
+        free.put(view)
+    if pipeline.fadvise and hasattr(os, "POSIX_FADV_SEQUENTIAL"):
+        _fadvise(src_fd, offset, length, os.POSIX_FADV_SEQUENTIAL)
+
+    def reader():
+        nonlocal direct
+        position, end = offset, offset + length
+        try:
+            while position < end:
+                view = free.get()
+                if stop.is_set():
+                    return
+                size = min(buffer_size, end - position)
+                if direct:
+                    # Lê o bloco alinhado inteiro; o que passar do fim do arquivo volta curto
+                    size = -(-size // DIRECT_ALIGNMENT) * DIRECT_ALIGNMENT
+                try:
+                    count = _read_at(src_fd, view[:size], position)
+                except OSError as e:
+                    if not direct or e.errno != errno.EINVAL:
+                        raise
+                    # O sistema de arquivos aceitou o flag mas não a leitura direta
+                    direct = False
+                    _set_direct(src_fd, False)
+                    count = _read_at(src_fd, view[:min(buffer_size, end - position)], position)
+                count = min(count, end - position)
+                if count <= 0:
+                    break
+                filled.put((view, count))
+                position += count
+            filled.put(None)
+        except BaseException as e:
+            filled.put(e)
+
+    thread = threading.Thread(target=reader, name="ps1-io-reader", daemon=True)
+    thread.start()
+    position = offset
+    try:
+        while True:
+            item = filled.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            view, count = item
+            chunk = view[:count]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+            if pipeline.fadvise and hasattr(os, "POSIX_FADV_DONTNEED"):
+                _fadvise(src_fd, position, count, os.POSIX_FADV_DONTNEED)
+            position += count
+            free.put(view)
+    finally:
+        stop.set()
+        free.put(None)
+        thread.join()
+        if pipeline.direct:
+            _set_direct(src_fd, False)
+        for view, buffer in zip(views, buffers):
+            view.release()
+            try:
+                buffer.close()
+            except BufferError:
+                pass  # Alguma view ainda exportada; o buffer é liberado pelo coletor
+
+def write_all(fd, view):
+    """Grava `view` inteiro na posição atual de `fd`, repetindo as escritas parciais."""
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def _copy_buffered(src_fd, dst_fd, offset, length, sinks=(), pipeline=None, sparse=None):
+    """Loop de leitura/escrita em buffer; funciona em qualquer lugar.
+
+    A leitura roda em paralelo (`read_chunks`); cada bloco lido também é
+    entregue a `sinks` (ex.: hashes calculados durante a cópia). Com `sparse`
+    (`SparseWriter`), a gravação passa por ele, que pula os blocos zerados.
+    """
+    fadvise = pipeline is not None and pipeline.fadvise and hasattr(os, "POSIX_FADV_DONTNEED")
+    dst_start = os.lseek(dst_fd, 0, os.SEEK_CUR) if fadvise else 0
+    written_total = 0
+    for chunk in read_chunks(src_fd, offset, length, pipeline):
+        for sink in sinks or ():
+            sink(chunk)
+        if sparse is not None:
+            sparse.write(chunk)
+        else:
+            write_all(dst_fd, chunk)
+        if fadvise and written_total:
+            # Páginas ainda sujas são mantidas pelo kernel; as já gravadas saem do cache
+            _fadvise(dst_fd, dst_start, written_total, os.POSIX_FADV_DONTNEED)
+        written_total += len(chunk)
+        yield len(chunk)
+
+BACKENDS = {
+    "reflink": _copy_reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _copy_sendfile,
+    "buffered": _copy_buffered,
+}
+AUTO_ORDER = ["reflink", "copy_file_range", "sendfile", "buffered"]
+
+# -----------------------------
+# Saída esparsa e pré-alocada
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+
+def _load_fallocate():
+    """`fallocate(2)` da libc (Linux), que o módulo os não expõe com flags; None se indisponível."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fallocate = libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+_fallocate = _load_fallocate()
+
+def _punch_hole(fd, offset, length):
+    if _fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE, offset, length) != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+
+def _zero_blocks(view, block_size):
+    """Lista de bools (um por bloco de `block_size`) indicando os blocos inteiramente zerados."""
+    try:
+        import numpy as np  # Só a saída esparsa usa; importado aqui para não pesar no import do módulo
+    except ImportError:  # Sem NumPy, os blocos zerados são detectados um a um
+        np = None
+    count = len(view) // block_size
+    if np is not None and block_size % 8 == 0:
+        words = np.frombuffer(view, dtype=np.uint64, count=count * block_size // 8)
+        return (~words.reshape(count, block_size // 8).any(axis=1)).tolist()
+    zero = bytes(block_size)
+    return [view[i * block_size:(i + 1) * block_size].tobytes() == zero for i in range(count)]
+
+class SparseWriter:
+    """Grava um arquivo de tamanho conhecido pré-alocado, com os blocos zerados como buracos.
+
+    O tamanho final é reservado com `fallocate(FALLOC_FL_KEEP_SIZE)` (menos
+    fragmentação) sem mudar o tamanho aparente do arquivo, que continua
+    mostrando até onde a gravação chegou (a retomada de `ps1_engine` depende
+    disso).
+    Cada bloco do sistema de arquivos inteiramente zerado é pulado com `lseek`
+    em vez de gravado e, como a pré-alocação já reservou esses blocos, é
+    liberado no `close()` com FALLOC_FL_PUNCH_HOLE. Onde não dá para abrir
+    buracos depois de reservar (fora do Linux), não há pré-alocação, só os
+    buracos. Lido de volta, o arquivo é idêntico ao gravado normalmente.
+    """
+
+    def __init__(self, fd, size, block_size=None):
+        self.fd = fd
+        self.size = size
+        self.block_size = block_size or os.fstat(fd).st_blksize or 4096
+        self.hole_bytes = 0
+        self.saved = 0
+        self._holes = []  # (offset, tamanho), já fundidos
+        self._pending = b""  # Início de bloco ainda incompleto
+        self._position = os.lseek(fd, 0, os.SEEK_CUR)
+        self.preallocated = False
+        if _fallocate is not None and size > self._position:
+            # Sistema de arquivos sem suporte: segue sem pré-alocar
+            self.preallocated = _fallocate(fd, FALLOC_FL_KEEP_SIZE, self._position, size - self._position) == 0
+
+    def write(self, data):
+        view = memoryview(data).cast("B")
+        count = len(view)
+        if self._pending:
+            # Completa o bloco iniciado na chamada anterior
+            needed = self.block_size - len(self._pending)
+            self._pending += view[:needed].tobytes()
+            view = view[needed:]
+            if len(self._pending) < self.block_size:
+                return count
+            block, self._pending = self._pending, b""
+            self._write_blocks(memoryview(block))
+        # Alinha ao bloco do arquivo: o início desalinhado é gravado como está
+        misaligned = -self._position % self.block_size
+        if misaligned and view:
+            head = view[:misaligned]
+            write_all(self.fd, head)
+            self._position += len(head)
+            view = view[len(head):]
+        whole = len(view) // self.block_size * self.block_size
+        if whole:
+            self._write_blocks(view[:whole])
+        if len(view) > whole:
+            self._pending = view[whole:].tobytes()
+        return count
+
+    def _write_blocks(self, view):
+        """Grava `view` (múltiplo do bloco, na posição alinhada atual) pulando os blocos zerados."""
+        block_size = self.block_size
+        zeros = _zero_blocks(view, block_size)
+        start = 0
+        while start < len(zeros):
+            end = start
+            while end < len(zeros) and zeros[end] == zeros[start]:
+                end += 1
+            run = view[start * block_size:end * block_size]
+            if zeros[start]:
+                self._add_hole(self._position, len(run))
+                os.lseek(self.fd, len(run), os.SEEK_CUR)
+            else:
+                write_all(self.fd, run)
+            self._position += len(run)
+            start = end
+
+    def _add_hole(self, offset, length):
+        self.hole_bytes += length
+        if self._holes and sum(self._holes[-1]) == offset:
+            self._holes[-1] = (self._holes[-1][0], self._holes[-1][1] + length)
+        else:
+            self._holes.append((offset, length))
+
+    def close(self):
+        """Grava o fim pendente, ajusta o tamanho, libera os blocos reservados dos buracos e
+        calcula `saved` (bytes não ocupados em disco)."""
+        if self._pending:
+            write_all(self.fd, memoryview(self._pending))
+            self._position += len(self._pending)
+            self._pending = b""
+        # Um arquivo que termina em buraco ficaria curto sem o truncate
+        if os.fstat(self.fd).st_size < self._position:
+            os.ftruncate(self.fd, self._position)
+        if self.preallocated:
+            for offset, length in self._holes:
+                try:
+                    _punch_hole(self.fd, offset, length)
+                except OSError:
+                    break  # Sem suporte a buracos: os blocos ficam só reservados
+        stat = os.fstat(self.fd)
+        if hasattr(stat, "st_blocks"):
+            self.saved = max(0, stat.st_size - stat.st_blocks * 512)
+        self._holes = []
+
+# -----------------------------
+# Gravação atômica
+def write_atomic(path, text):
+    """Grava `text` (UTF-8) em `path` por um temporário na mesma pasta e `os.replace`.
+
+    Quem lê `path` vê o conteúdo antigo ou o novo, nunca um pela metade. O
+    temporário tem nome único, então dois processos gravando o mesmo arquivo
+    não sobrescrevem o temporário um do outro (vence o último `replace`).
+    """
+    path = os.fspath(path)
+    f = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=f".{os.path.basename(path)}.", suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(text)
+        # O temporário nasce com permissão 0600; mantém a do arquivo substituído
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(f.name, mode)
+        os.replace(f.name, path)
+    except BaseException:
+        try:
+            os.unlink(f.name)
+        except OSError:
+            pass
+        raise
+
+# -----------------------------
+# API pública
+def copy_into(src_path, dst_fd, backend=None, sinks=None, offset=0, pipeline=None, sparse=None, length=None):
+    """Copia `src_path` (a partir de `offset` e, com `length`, só esses bytes) para a posição atual de `dst_fd`.
+
+    Gerador que produz a quantidade de bytes copiada a cada passo, para que o
+    chamador possa reportar progresso. Com `backend=None` (ou "auto") os
+    backends são tentados em ordem de velocidade; um backend que falha no meio
+    da cópia é substituído pelo próximo a partir do ponto em que parou.
+
+    Se `sinks` for dado, cada bloco copiado é passado a cada sink; como os dados
+    precisam passar pelo Python, só o backend em buffer é usado nesse caso
+    (o mesmo vale para `sparse`, um `SparseWriter` sobre `dst_fd`).
+    `pipeline` (`PipelineOptions`) ajusta o backend em buffer. Um backend
+    escolhido explicitamente que não funciona neste sistema de arquivos gera
+    `BackendUnsupported` com o nome dele.
+    """
+    order = AUTO_ORDER if backend in (None, "auto") else [backend]
+    if any(name not in BACKENDS for name in order):
+        raise ValueError(f"Backend de cópia desconhecido: {backend}")
+    if sinks or sparse is not None:
+        order = ["buffered"]
+    with open(src_path, 'rb') as src:
+        src_fd = src.fileno()
+        total = os.fstat(src_fd).st_size
+        if length is not None:
+            total = min(total, offset + length)
+        base = os.lseek(dst_fd, 0, os.SEEK_CUR) - offset
+        done = offset
+        for name in order:
+            if done >= total:
+                break
+            try:
+                if sinks or sparse is not None or name == "buffered":
+                    steps = _copy_buffered(src_fd, dst_fd, done, total - done, sinks, pipeline, sparse)
+                else:
+                    steps = BACKENDS[name](src_fd, dst_fd, done, total - done)
+                for copied in steps:
+                    done += copied
+                    yield copied
+            except BackendUnsupported as e:
+                if name == order[-1]:
+                    raise BackendUnsupported(f"o backend de cópia '{name}' não é suportado aqui ({e}); "
+                                             f"use 'auto' para escolher um compatível") from e
+                # O próximo backend continua exatamente de onde este parou
+                os.lseek(dst_fd, base + done, os.SEEK_SET)
+                continue
+        if done < total:
+            raise OSError(errno.EIO, f"Cópia incompleta de {src_path}: {done}/{total} bytes")
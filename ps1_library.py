@@ -0,0 +1,205 @@
+"""Varredura de coleções de discos e índice persistente da biblioteca.
+
+`LibraryIndex.scan` percorre as pastas em paralelo (cada pasta é uma tarefa no
+pool, então compartilhamentos de rede com milhares de pastas não são
+listados uma a uma) e valida os pares CUE/BIN também em paralelo. O resultado
+fica num JSON (por padrão no cache do usuário, já que a biblioteca pode estar
+num compartilhamento só de leitura) com status, tamanho e número de faixas de
+cada disco; numa nova
+varredura, discos cuja impressão digital não mudou não são validados de novo.
+GUI e CLI filtram e selecionam direto do índice, e as falhas ficam num
+relatório em vez de uma janela de aviso por disco.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from ps1_archive import ArchiveDisc, is_archive
+from ps1_cue import load_cue_sheet
+from ps1_engine import find_bin_for_cue, validate_bin_cue
+from ps1_io import write_atomic
+from ps1_manifest import source_fingerprint
+
+LIBRARY_NAME = "ps1_library.json"
+LIBRARY_VERSION = 1
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # E/S de metadados: mais threads que CPUs
+
+# -----------------------------
+# Varredura de pastas
+def _list_folder(folder):
+    """Retorna (candidatos, subpastas) de uma pasta; links simbólicos para pastas não são seguidos."""
+    candidates, folders = [], []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.name.lower().endswith(".cue") or is_archive(entry.name):
+                        candidates.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass  # Pasta sem permissão ou removida durante a varredura
+    return candidates, folders
+
+def find_discs(roots, workers=SCAN_WORKERS, include_archives=True):
+    """Percorre `roots` recursivamente em paralelo e retorna os .cue (e arquivos compactados) encontrados."""
+    found = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {executor.submit(_list_folder, os.path.abspath(root)) for root in roots}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidates, folders = future.result()
+                found.extend(path for path in candidates if include_archives or not is_archive(path))
+                pending.update(executor.submit(_list_folder, folder) for folder in folders)
+    return sorted(found)
+
+# -----------------------------
+# Validação de um disco
+def describe_disc(cue_file):
+    """Valida um .cue (ou arquivo compactado) e retorna a entrada do índice."""
+    entry = {"path": cue_file, "name": os.path.basename(cue_file), "status": "ok", "message": "",
+             "size": 0, "tracks": 0, "files": 0, "scanned": time.time()}
+    is_valid, error_msg = validate_bin_cue(find_bin_for_cue(cue_file), cue_file)
+    if not is_valid:
+        entry.update(status="error", message=error_msg)
+        return entry
+    try:
+        if is_archive(cue_file):
+            with ArchiveDisc(cue_file) as archive:
+                sheet = archive.sheet
+                entry["size"] = sum(archive.size(name) for name in sheet.bin_files)
+        else:
+            sheet = load_cue_sheet(cue_file)
+            cue_dir = os.path.dirname(cue_file)
+            entry["size"] = sum(os.path.getsize(os.path.join(cue_dir, name)) for name in sheet.bin_files)
+        entry["tracks"] = len(sheet.tracks)
+        entry["files"] = len(sheet.files)
+    except Exception as e:
+        entry.update(status="error", message=f"Erro ao ler o disco: {e}")
+    return entry
+
+# -----------------------------
+# Índice persistente
+def index_folder():
+    """Pasta gravável do usuário onde ficam os índices (o cache do sistema)."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "ps1_conv"
+
+class LibraryIndex:
+    """Índice JSON da biblioteca de discos; seguro para uso por várias threads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.save_error = None  # OSError da última gravação que falhou
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == LIBRARY_VERSION:
+                self._entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass  # Índice ausente ou corrompido: começa do zero
+
+    @classmethod
+    def for_folder(cls, folder):
+        """Índice da biblioteca em `folder`: o `ps1_library.json` dela, se já existir, ou um
+        arquivo próprio dessa pasta em `index_folder()`."""
+        local = Path(folder) / LIBRARY_NAME
+        if local.exists():
+            return cls(local)
+        key = hashlib.sha1(os.path.abspath(folder).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+        return cls(index_folder() / f"ps1_library-{key}.json")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self):
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda entry: entry["path"])
+
+    def scan(self, roots, workers=SCAN_WORKERS, on_progress=None, include_archives=True):
+        """Varre `roots`, atualiza e grava o índice e retorna as entradas com falha.
+
+        `on_progress(done, total, path)` é chamado a cada disco validado. Entradas
+        de discos que não existem mais sob `roots` são removidas. Se o índice não
+        puder ser gravado, a varredura não se perde: o índice em memória fica
+        atualizado e o erro fica em `save_error`.
+        """
+        found = find_discs(roots, workers, include_archives)
+        lock = threading.Lock()
+        done = 0
+
+        def check(cue_file):
+            nonlocal done
+            fingerprint = source_fingerprint(cue_file)
+            with self._lock:
+                previous = self._entries.get(cue_file)
+            if previous is not None and fingerprint is not None and previous.get("fingerprint") == fingerprint:
+                entry = previous
+            else:
+                entry = describe_disc(cue_file)
+                entry["fingerprint"] = fingerprint
+            with lock:
+                done += 1
+                if on_progress:
+                    on_progress(done, len(found), cue_file)
+            return entry
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            scanned = list(executor.map(check, found))
+
+        prefixes = tuple(os.path.join(os.path.abspath(root), "") for root in roots)
+        with self._lock:
+            for path in [path for path in self._entries if path.startswith(prefixes)]:
+                del self._entries[path]
+            for entry in scanned:
+                self._entries[entry["path"]] = entry
+            try:
+                self._save()
+                self.save_error = None
+            except OSError as e:
+                self.save_error = e
+        return [entry for entry in scanned if entry["status"] != "ok"]
+
+    def select(self, patterns=None, status="ok"):
+        """Entradas com o `status` dado (None = todos) cujo nome ou caminho casa com algum dos
+        `patterns` (globs, sem diferenciar maiúsculas; vazio = todos)."""
+        patterns = [pattern.lower() for pattern in patterns or ()]
+        selected = []
+        for entry in self.entries():
+            if status is not None and entry["status"] != status:
+                continue
+            if patterns:
+                name, path = entry["name"].lower(), entry["path"].lower()
+                if not any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(path, p) for p in patterns):
+                    continue
+            selected.append(entry)
+        return selected
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, json.dumps({"version": LIBRARY_VERSION, "entries": self._entries}, ensure_ascii=False, indent=1))
+
+def write_failure_report(failures, report_path):
+    """Grava as falhas da varredura em JSON (.json) ou texto, uma por linha."""
+    with open(report_path, 'w', encoding='utf-8') as f:
+        if str(report_path).lower().endswith(".json"):
+            json.dump([{"path": entry["path"], "message": entry["message"]} for entry in failures], f, ensure_ascii=False, indent=2)
+        else:
+            for entry in failures:
+                f.write(f"{entry['path']}\t{entry['message']}\n")
@@ -0,0 +1,166 @@
+"""Manifesto de conversões para execuções incrementais e retomáveis.
+
+Guarda, na pasta de saída, a "impressão digital" de cada disco convertido
+(caminhos, tamanhos e mtimes do .cue e dos .bin, e opcionalmente um CRC32 do
+conteúdo). Ao rodar o lote de novo, discos sem alterações são pulados e
+conversões interrompidas são retomadas. As opções que mudam os arquivos
+gerados (`OUTPUT_OPTIONS`) também ficam registradas: mudar qualquer uma delas
+reconverte o disco do zero.
+
+O arquivo não é regravado a cada disco: as alterações se acumulam e são
+gravadas a cada `SAVE_EVERY` alterações ou `SAVE_INTERVAL` segundos, e no
+`flush()` do fim do lote.
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from ps1_archive import archive_base_name, is_archive
+from ps1_cue import load_cue_sheet
+from ps1_ecm import packed_name
+from ps1_io import write_atomic
+
+MANIFEST_NAME = "ps1_conv_manifest.json"
+MANIFEST_VERSION = 1
+SAVE_EVERY = 64  # Alterações acumuladas antes de regravar o manifesto
+SAVE_INTERVAL = 5.0  # Segundos máximos entre uma alteração e a gravação (verificado a cada alteração)
+
+# Opções de conversão que mudam os arquivos gerados, com seus valores padrão
+OUTPUT_OPTIONS = {"output_format": "img", "compression": None, "generate_sub": False, "sparse": False}
+
+def output_options(options):
+    """Valores de `OUTPUT_OPTIONS` em `options` (opções do lote), com os padrões preenchidos."""
+    return {name: options.get(name) or default for name, default in OUTPUT_OPTIONS.items()}
+
+def _file_crc32(path, chunk_size=1024 * 1024):
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return f"{crc & 0xFFFFFFFF:08x}"
+
+def source_fingerprint(cue_file, hash_contents=False):
+    """Impressão digital do .cue, dos .bin e do .sub de origem (None se o .cue for inválido).
+
+    Para discos compactados, a impressão digital é a do próprio arquivo compactado.
+    """
+    if is_archive(cue_file):
+        return _fingerprint_files([Path(cue_file)], hash_contents) if os.path.exists(cue_file) else None
+    try:
+        sheet = load_cue_sheet(cue_file)
+    except (OSError, ValueError):
+        return None
+    cue_dir = Path(os.path.dirname(cue_file))
+    sources = [Path(cue_file)] + [cue_dir / name for name in sheet.bin_files]
+    sub_file = Path(cue_file).with_suffix(".sub")
+    if sub_file.exists():
+        sources.append(sub_file)
+    try:
+        return _fingerprint_files(sources, hash_contents)
+    except OSError:
+        return None  # .bin ausente
+
+def _fingerprint_files(sources, hash_contents):
+    files = {}
+    for path in sources:
+        stat = path.stat()
+        entry = [stat.st_size, stat.st_mtime_ns]
+        if hash_contents:
+            entry.append(_file_crc32(path))
+        files[str(path.resolve())] = entry
+    return files
+
+class Manifest:
+    """Manifesto JSON da pasta de saída; seguro para uso por várias threads."""
+
+    def __init__(self, path, hash_contents=False):
+        self.path = Path(path)
+        self.hash_contents = hash_contents
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._pending = 0  # Alterações ainda não gravadas
+        self._saved_at = None  # Nada gravado ainda: a primeira alteração é gravada na hora
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self._entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass  # Manifesto ausente ou corrompido: começa do zero
+
+    @classmethod
+    def for_folder(cls, output_folder, hash_contents=False):
+        return cls(Path(output_folder) / MANIFEST_NAME, hash_contents)
+
+    def fingerprint(self, cue_file):
+        """Impressão digital das origens de `cue_file` (ver `source_fingerprint`)."""
+        return source_fingerprint(cue_file, self.hash_contents)
+
+    @staticmethod
+    def _outputs_ok(entry, output_files=None):
+        outputs = entry.get("outputs", {})
+        for path, size in outputs.items():
+            if not os.path.exists(path) or os.path.getsize(path) != size:
+                return False
+        # A imagem esperada (primeiro item) precisa ter sido gerada, senão o formato de saída mudou
+        if output_files and str(output_files[0]) not in outputs:
+            return False
+        return bool(outputs)
+
+    def status(self, cue_file, fingerprint, output_files=None, options=None):
+        """Retorna "done" (atualizado), "partial" (interrompido, pode retomar) ou None.
+
+        `output_files` (de `output_files_for`) faz discos convertidos em outro
+        formato de saída serem convertidos de novo, e `options` (de
+        `output_options`) faz o mesmo quando as opções da conversão mudaram;
+        nesse caso nem uma conversão interrompida é retomada.
+        """
+        with self._lock:
+            entry = self._entries.get(str(Path(cue_file).resolve()))
+        if not entry or fingerprint is None or entry.get("fingerprint") != fingerprint:
+            return None
+        if options is not None and entry.get("options", OUTPUT_OPTIONS) != options:
+            return None
+        if entry.get("state") == "done":
+            return "done" if self._outputs_ok(entry, output_files) else None
+        return "partial"
+
+    def mark_started(self, cue_file, fingerprint, options=None):
+        self._update(cue_file, {"state": "started", "fingerprint": fingerprint, "options": options or OUTPUT_OPTIONS,
+                                "outputs": {}})
+
+    def mark_done(self, cue_file, fingerprint, output_files, options=None):
+        outputs = {str(path): os.path.getsize(path) for path in output_files if os.path.exists(path)}
+        self._update(cue_file, {"state": "done", "fingerprint": fingerprint, "options": options or OUTPUT_OPTIONS,
+                                "outputs": outputs})
+
+    def _update(self, cue_file, entry):
+        with self._lock:
+            self._entries[str(Path(cue_file).resolve())] = entry
+            self._pending += 1
+            if (self._pending >= SAVE_EVERY or self._saved_at is None
+                    or time.monotonic() - self._saved_at >= SAVE_INTERVAL):
+                self._save()
+
+    def flush(self):
+        """Grava as alterações pendentes; chamado ao fim do lote, mesmo se ele falhar."""
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    def _save(self):
+        write_atomic(self.path, json.dumps({"version": MANIFEST_VERSION, "entries": self._entries}, separators=(",", ":")))
+        self._pending = 0
+        self._saved_at = time.monotonic()
+
+def output_files_for(cue_file, output_folder, output_format="img", compression=None):
+    """Arquivos que a conversão de `cue_file` gera em `output_folder` (a imagem primeiro)."""
+    base_name = archive_base_name(cue_file) if is_archive(cue_file) else os.path.splitext(os.path.basename(cue_file))[0]
+    image = Path(output_folder) / packed_name(base_name, output_format, compression)
+    return [image] + [Path(output_folder) / f"{base_name}{ext}" for ext in (".ccd", ".sub")]
@@ -0,0 +1,189 @@
+"""Métricas por disco e por fase da conversão, exportáveis em JSON e no formato textfile do Prometheus.
+
+O motor registra, para cada fase (leitura do .cue, cópia para o .img, .ccd e
+.sub), o tempo de parede, os bytes, a quantidade de blocos copiados (cada bloco
+corresponde a uma chamada de cópia/leitura) e os erros. Sem um `Metrics`, o
+motor usa um registrador nulo cujas operações não fazem nada, então o custo
+com as métricas desligadas é uma chamada vazia por bloco.
+
+Uso:
+    metrics = Metrics()
+    run_batch(pairs, output_folder, metrics=metrics)
+    metrics.write_json("metricas.json")
+    metrics.write_prometheus("/var/lib/node_exporter/ps1.prom")
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from ps1_io import write_atomic
+from ps1_progress import PHASE_CCD, PHASE_IMAGE, PHASE_SUB
+
+PHASE_PARSE = "parse"
+PHASES = (PHASE_PARSE, PHASE_IMAGE, PHASE_CCD, PHASE_SUB)
+
+# -----------------------------
+# Registro de um disco
+@dataclass(slots=True)
+class PhaseStats:
+    """Totais de uma fase: tempo de parede (s), bytes, blocos e erros."""
+    seconds: float = 0.0
+    bytes: int = 0
+    chunks: int = 0
+    errors: int = 0
+
+    def add(self, count):
+        self.bytes += count
+        self.chunks += 1
+
+    def fail(self):
+        self.errors += 1
+
+@dataclass(slots=True)
+class DiscMetrics:
+    """Métricas de um disco; `ok` fica None até o resultado ser registrado."""
+    path: str
+    name: str
+    phases: dict = field(default_factory=dict)
+    ok: bool | None = None
+    message: str = ""
+    seconds: float = 0.0
+
+    @contextmanager
+    def phase(self, name):
+        """Mede o tempo de parede do bloco `with` e entrega o `PhaseStats` da fase.
+
+        Uma exceção dentro do bloco conta como erro da fase e é propagada.
+        """
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        started = time.perf_counter()
+        try:
+            yield stats
+        except BaseException:
+            stats.fail()
+            raise
+        finally:
+            stats.seconds += time.perf_counter() - started
+
+    def finish(self, result):
+        self.ok, self.message = result
+        self.seconds = sum(stats.seconds for stats in self.phases.values())
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, count):
+        pass
+
+    def fail(self):
+        pass
+
+class _NullDisc:
+    """Registrador usado quando as métricas estão desligadas."""
+    __slots__ = ()
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def finish(self, result):
+        pass
+
+NULL_DISC = _NullDisc()
+
+# -----------------------------
+# Coleção de métricas de uma execução
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Metrics:
+    """Métricas de todos os discos de uma execução; seguro para uso por várias threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._discs = {}
+        self.started = time.time()
+
+    def disc(self, cue_file):
+        """`DiscMetrics` do disco `cue_file` (criado na primeira chamada)."""
+        key = str(cue_file)
+        with self._lock:
+            disc = self._discs.get(key)
+            if disc is None:
+                disc = self._discs[key] = DiscMetrics(key, os.path.basename(key))
+            return disc
+
+    def discs(self):
+        with self._lock:
+            return list(self._discs.values())
+
+    def totals(self):
+        """Soma de cada fase em todos os discos."""
+        totals = {}
+        for disc in self.discs():
+            for name, stats in disc.phases.items():
+                total = totals.setdefault(name, PhaseStats())
+                total.seconds += stats.seconds
+                total.bytes += stats.bytes
+                total.chunks += stats.chunks
+                total.errors += stats.errors
+        return totals
+
+    def to_dict(self):
+        discs = self.discs()
+        return {
+            "started": self.started,
+            "finished": time.time(),
+            "discs_ok": sum(1 for disc in discs if disc.ok),
+            "discs_failed": sum(1 for disc in discs if disc.ok is False),
+            "phases": {name: asdict(stats) for name, stats in self.totals().items()},
+            "discs": [asdict(disc) for disc in discs],
+        }
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def prometheus_text(self):
+        """Métricas no formato de exposição de texto do Prometheus."""
+        discs = self.discs()
+        totals = self.totals()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        metric("ps1_phase_seconds_total", "counter", "Tempo de parede por fase, somado em todos os discos.",
+               [({"phase": name}, f"{stats.seconds:.6f}") for name, stats in totals.items()])
+        metric("ps1_phase_bytes_total", "counter", "Bytes processados por fase.",
+               [({"phase": name}, stats.bytes) for name, stats in totals.items()])
+        metric("ps1_phase_chunks_total", "counter", "Blocos (chamadas de cópia/leitura) por fase.",
+               [({"phase": name}, stats.chunks) for name, stats in totals.items()])
+        metric("ps1_phase_errors_total", "counter", "Erros por fase.",
+               [({"phase": name}, stats.errors) for name, stats in totals.items()])
+        metric("ps1_discs_total", "counter", "Discos convertidos, por resultado.",
+               [({"status": "ok"}, sum(1 for disc in discs if disc.ok)),
+                ({"status": "error"}, sum(1 for disc in discs if disc.ok is False))])
+        metric("ps1_disc_phase_seconds", "gauge", "Tempo de parede de cada fase de cada disco.",
+               [({"disc": disc.name, "phase": name}, f"{stats.seconds:.6f}")
+                for disc in discs for name, stats in disc.phases.items()])
+        metric("ps1_last_run_timestamp_seconds", "gauge", "Início da última execução (epoch).",
+               [({}, f"{self.started:.3f}")])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        write_atomic(path, self.prometheus_text())
@@ -0,0 +1,156 @@
+"""Eventos de progresso tipados, agregados e limitados na origem.
+
+O motor produz um `ProgressEvent` por bloco copiado (fase, bytes feitos/total).
+`convert_pair` calcula taxa e ETA e passa os eventos por um `Throttle`, que
+entrega no máximo um evento por intervalo e descarta os intermediários: quem
+consome (GUI ou CLI) só recebe o estado mais recente. Mudanças de fase e o
+resultado de cada disco nunca são descartados.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+PROGRESS_INTERVAL = 0.1  # No máximo 10 atualizações por segundo
+
+# Fases da conversão de um disco
+PHASE_IMAGE = "image"
+PHASE_CCD = "ccd"
+PHASE_SUB = "sub"
+PHASE_DONE = "done"
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+# -----------------------------
+# Eventos
+@dataclass(slots=True)
+class ProgressEvent:
+    """Estado de um disco: fase, bytes da fase, taxa (bytes/s), ETA (s) e, no fim, o resultado."""
+    phase: str
+    disc: str = ""
+    percent: float = 0.0
+    bytes_done: int = 0
+    bytes_total: int = 0
+    action: str = ""  # ex.: "Convertendo jogo.img"
+    rate: float = 0.0
+    eta: float | None = None
+    result: tuple | None = None  # (sucesso, mensagem), só na fase PHASE_DONE
+
+    @property
+    def message(self):
+        if self.result is not None:
+            return self.result[1]
+        if self.bytes_total:
+            return f"{self.action}... {self.bytes_done / self.bytes_total * 100:.1f}%"
+        return f"{self.action}..."
+
+    def describe(self):
+        """Mensagem com taxa e ETA, para exibição."""
+        if self.result is not None or not self.rate:
+            return self.message
+        return f"{self.message} {self.rate / (1024 * 1024):.1f} MB/s, ETA {format_eta(self.eta)}"
+
+@dataclass(slots=True)
+class BatchProgress:
+    """Estado agregado de um lote; `current` é o último evento de disco recebido."""
+    discs_total: int
+    discs_done: int = 0
+    percent: float = 0.0
+    bytes_done: int = 0
+    rate: float = 0.0
+    eta: float | None = None
+    index: int = 0  # posição (a partir de 1) do disco de `current`
+    current: ProgressEvent | None = None
+    finished: bool = False
+
+    @property
+    def phase(self):
+        return self.current.phase if self.current else None
+
+    @property
+    def result(self):
+        return self.current.result if self.current else None
+
+    @property
+    def message(self):
+        return f"[{self.index}/{self.discs_total}] {self.current.message}" if self.current else ""
+
+    def describe(self):
+        if not self.rate or self.finished:
+            return self.message
+        return (f"{self.message} | {self.discs_done}/{self.discs_total} discos, "
+                f"{self.rate / (1024 * 1024):.1f} MB/s, ETA {format_eta(self.eta)}")
+
+# -----------------------------
+# Taxa, limitação e estado mais recente
+class RateMeter:
+    """Taxa e ETA da fase atual de um disco, calculadas sobre os bytes desde o início da fase."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._phase = None
+        self._start = (0.0, 0)
+
+    def update(self, event):
+        now = self._clock()
+        if event.phase != self._phase:
+            self._phase = event.phase
+            self._start = (now, event.bytes_done)
+        elapsed = now - self._start[0]
+        if elapsed > 0 and event.bytes_total:
+            event.rate = (event.bytes_done - self._start[1]) / elapsed
+            if event.rate > 0:
+                event.eta = (event.bytes_total - event.bytes_done) / event.rate
+        return event
+
+class Throttle:
+    """Repasse a `callback` no máximo um evento por `interval` segundos, sempre o mais recente.
+
+    Eventos com resultado (e, com `phase_changes`, os que mudam de fase) passam
+    na hora; os demais dentro do intervalo são descartados.
+    """
+
+    def __init__(self, callback, interval=PROGRESS_INTERVAL, phase_changes=True, clock=time.monotonic):
+        self._callback = callback
+        self._interval = interval
+        self._phase_changes = phase_changes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last = None
+        self._phase = None
+
+    def __call__(self, event):
+        now = self._clock()
+        with self._lock:
+            urgent = event.result is not None or (self._phase_changes and event.phase != self._phase)
+            self._phase = event.phase
+            if not urgent and self._last is not None and now - self._last < self._interval:
+                return
+            self._last = now
+        self._callback(event)
+
+class LatestValue:
+    """Guarda só o valor mais recente publicado por outra thread (para a GUI consultar periodicamente)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = 0
+        self._seen = 0
+
+    def publish(self, value):
+        with self._lock:
+            self._value = value
+            self._version += 1
+
+    def take(self):
+        """Retorna o valor mais recente, ou None se nada mudou desde a última chamada."""
+        with self._lock:
+            if self._version == self._seen:
+                return None
+            self._seen = self._version
+            return self._value
@@ -0,0 +1,314 @@
+"""Índice de setores sobre os .bin mapeados em memória e geração da TOC.
+
+O disco tem um único modelo de endereços, `ImageLayout`: os .bin na ordem do
+CUE sheet, com os setores de PREGAP/POSTGAP (que o .cue declara mas os .bin
+não trazem) inseridos no lugar deles. É exatamente o conteúdo do .img, então
+o LBA de um setor no .img, na TOC do .ccd, no subcanal Q do .sub e no
+cabeçalho dos setores de dados (verificado por `ps1_integrity`) é o mesmo.
+
+Cada .bin é mapeado com mmap (somente leitura), e qualquer setor pode ser
+consultado pelo LBA sem copiar dados; os setores de gap são sintetizados
+(`gap_sectors`).
+
+Quando os .bin não estão no disco (ex.: dentro de um .zip), `SectorCapture`
+guarda, durante a cópia em fluxo, só os setores que a TOC precisa, e
+`SectorIndex.from_captured` monta o índice a partir deles.
+"""
+import mmap
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+
+from ps1_cue import frames_to_msf
+
+SECTOR_SIZE = 2352
+LBA_OFFSET = 150  # 2 segundos de lead-in: MSF 00:02:00 == LBA 0
+SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+
+# Valores de Control (TOC/subcanal Q)
+CONTROL_AUDIO = 0x00
+CONTROL_DATA = 0x04
+
+# Tipo de disco no ponto A0 (PSec)
+DISC_TYPE_CDDA_CDROM = 0x00
+DISC_TYPE_CDXA = 0x20
+
+# Faixas de dados com setores crus e o byte de modo do cabeçalho; nas demais (áudio), o gap é silêncio
+DATA_MODES = {"MODE1/2352": 1, "MODE2/2352": 2, "CDI/2352": 2}
+
+def bcd(values):
+    """BCD de `values` (int ou array do NumPy) entre 0 e 99."""
+    return ((values // 10) << 4) | (values % 10)
+
+def msf_bcd(frames):
+    """(minuto, segundo, frame) em BCD do endereço `frames` (int ou array do NumPy)."""
+    return bcd(frames // (60 * 75)), bcd((frames // 75) % 60), bcd(frames % 75)
+
+# -----------------------------
+# Layout da imagem
+@dataclass(slots=True)
+class ImageSpan:
+    """Trecho contíguo da imagem: setores de um FILE ou, com `file_index` None, de um PREGAP/POSTGAP."""
+    lba: int  # LBA do primeiro setor
+    sectors: int
+    mode: str  # Modo da faixa no .cue (define o conteúdo dos setores de gap)
+    file_index: int | None = None
+    offset: int = 0  # Offset em bytes no FILE
+    size: int = 0  # Bytes na imagem (só difere de sectors * 2352 no resto de um FILE que não completa um setor)
+
+    @property
+    def is_gap(self):
+        return self.file_index is None
+
+class ImageLayout:
+    """Disposição dos setores no .img: os FILEs na ordem do .cue, com os PREGAP/POSTGAP de cada faixa."""
+
+    def __init__(self, sheet, file_sizes):
+        self.sheet = sheet
+        self.spans = []
+        self._file_spans = [[] for _ in file_sizes]
+        self._file_lbas = []  # LBA onde começa cada FILE
+        lba = 0
+        for file_index, size in enumerate(file_sizes):
+            self._file_lbas.append(lba)
+            count = size // SECTOR_SIZE
+            tracks = sheet.files[file_index].tracks
+            position = 0  # Setor atual no FILE
+            for number, track in enumerate(tracks):
+                end = count if number + 1 == len(tracks) else min(max(tracks[number + 1].first_frame, position), count)
+                lba = self._add_gap(lba, track.pregap, track.mode)
+                if end > position:
+                    span = ImageSpan(lba, end - position, track.mode, file_index, position * SECTOR_SIZE, (end - position) * SECTOR_SIZE)
+                    self.spans.append(span)
+                    self._file_spans[file_index].append(span)
+                    lba += end - position
+                    position = end
+                lba = self._add_gap(lba, track.postgap, track.mode)
+            if not tracks and count:  # FILE sem faixas: copiado como está
+                span = ImageSpan(lba, count, "AUDIO", file_index, 0, count * SECTOR_SIZE)
+                self.spans.append(span)
+                self._file_spans[file_index].append(span)
+                lba += count
+            if size % SECTOR_SIZE:
+                # Resto que não completa um setor: copiado depois do último gap do FILE, fora da contagem de LBAs
+                self.spans.append(ImageSpan(lba, 0, "AUDIO", file_index, count * SECTOR_SIZE, size % SECTOR_SIZE))
+        self._sector_spans = [span for span in self.spans if span.sectors]
+        self._lbas = [span.lba for span in self._sector_spans]
+        self.total_sectors = lba
+        self.total_size = sum(span.size for span in self.spans)
+
+    def _add_gap(self, lba, sectors, mode):
+        if sectors > 0:
+            self.spans.append(ImageSpan(lba, sectors, mode, size=sectors * SECTOR_SIZE))
+        return lba + max(sectors, 0)
+
+    def span_at(self, lba):
+        """Trecho que contém o setor `lba`."""
+        if not 0 <= lba < self.total_sectors:
+            raise IndexError(f"LBA fora do disco: {lba}")
+        return self._sector_spans[bisect_right(self._lbas, lba) - 1]
+
+    def lba(self, file_index, sector):
+        """LBA na imagem do setor `sector` (contado do início) do FILE `file_index`."""
+        spans = self._file_spans[file_index]
+        position = bisect_right([span.offset // SECTOR_SIZE for span in spans], sector) - 1
+        if position < 0:
+            return self._file_lbas[file_index] + sector
+        span = spans[position]
+        return span.lba + sector - span.offset // SECTOR_SIZE
+
+    def track_lba(self, track, index_number=1):
+        """LBA absoluto de um INDEX da faixa (por padrão, INDEX 01), ou None se ela não o tiver."""
+        index = track.index(index_number)
+        if index is None:
+            return None
+        return self.lba(track.file_index, index.frames)
+
+    def index_lbas(self, track):
+        """[(número do INDEX, LBA)] da faixa; um PREGAP sem INDEX 00 no .cue vira o INDEX 00."""
+        indexes = [(index.number, self.lba(track.file_index, index.frames)) for index in track.indexes]
+        if track.pregap > 0 and track.index(0) is None:
+            indexes.insert(0, (0, indexes[0][1] - track.pregap))
+        return indexes
+
+def gap_sectors(mode, lba, count):
+    """Bytes de `count` setores de PREGAP/POSTGAP a partir de `lba`.
+
+    Em faixas de dados são setores vazios com sync, cabeçalho (endereço do
+    setor) e EDC/ECC, em Mode 2 como Form 2; nas de áudio, silêncio. Com
+    NumPy os setores são gerados em lote; sem ele, um a um, com o mesmo
+    resultado.
+    """
+    mode_byte = DATA_MODES.get(mode.upper())
+    if mode_byte is None:
+        return bytes(count * SECTOR_SIZE)
+    import ps1_ecc  # Aqui e não no topo: ps1_ecc importa este módulo
+    sector_type = ps1_ecc.MODE1 if mode_byte == 1 else ps1_ecc.MODE2_FORM2
+    try:
+        np = ps1_ecc.require_numpy()
+    except RuntimeError:
+        sectors = []
+        for address in range(lba + LBA_OFFSET, lba + LBA_OFFSET + count):
+            sector = bytearray(SECTOR_SIZE)
+            sector[12:15] = msf_bcd(address)
+            if mode_byte == 2:
+                sector[0x12] = sector[0x16] = 0x20  # Subheader: submode Form 2
+            sectors.append(ps1_ecc.regenerate_sector(sector, sector_type))
+        return b"".join(sectors)
+    sectors = np.zeros((count, SECTOR_SIZE), dtype=np.uint8)
+    sectors[:, 12], sectors[:, 13], sectors[:, 14] = msf_bcd(np.arange(lba, lba + count) + LBA_OFFSET)
+    if mode_byte == 2:
+        sectors[:, 0x12] = sectors[:, 0x16] = 0x20
+    return ps1_ecc.regenerate(sectors, sector_type).tobytes()
+
+# -----------------------------
+# Índice de setores
+class SectorIndex:
+    """Mapeia LBAs absolutos (`ImageLayout`) para os setores dos .bin mapeados em memória."""
+
+    def __init__(self, sheet, cue_dir):
+        self.sheet = sheet
+        self._maps = []
+        self._captured = None
+        sizes = []
+        try:
+            for cue_file in sheet.files:
+                path = Path(cue_dir) / cue_file.name
+                size = os.path.getsize(path)
+                mapped = None
+                if size:
+                    with open(path, 'rb') as f:
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps.append(mapped)
+                sizes.append(size)
+        except Exception:
+            self.close()
+            raise
+        self.layout = ImageLayout(sheet, sizes)
+        self.total_sectors = self.layout.total_sectors
+
+    @classmethod
+    def from_captured(cls, sheet, file_sizes, captured):
+        """Índice sem acesso aos .bin: tamanhos de cada FILE e os setores de `SectorCapture`.
+
+        Só os setores capturados podem ser consultados (os do INDEX 01 de cada faixa).
+        """
+        index = cls.__new__(cls)
+        index.sheet = sheet
+        index._maps = []
+        index._captured = captured
+        index.layout = ImageLayout(sheet, file_sizes)
+        index.total_sectors = index.layout.total_sectors
+        return index
+
+    def close(self):
+        for mapped in self._maps:
+            if mapped is not None:
+                mapped.close()
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------
+    # Consultas por setor
+    def sector(self, lba):
+        """memoryview dos 2352 bytes do setor `lba` (sem cópia, exceto nos gaps, que são sintetizados)."""
+        span = self.layout.span_at(lba)
+        if self._captured is not None:
+            if lba not in self._captured:
+                raise IndexError(f"Setor não capturado: {lba}")
+            return memoryview(self._captured[lba])
+        if span.is_gap:
+            return memoryview(gap_sectors(span.mode, lba, 1))
+        offset = span.offset + (lba - span.lba) * SECTOR_SIZE
+        return memoryview(self._maps[span.file_index])[offset:offset + SECTOR_SIZE]
+
+    def detect_mode(self, lba):
+        """Detecta o modo do setor pelo sync/cabeçalho: "MODE1/2352", "MODE2/2352" ou "AUDIO"."""
+        sector = self.sector(lba)
+        if sector[0:12] != SYNC:
+            return "AUDIO"
+        mode = sector[15]
+        return {1: "MODE1/2352", 2: "MODE2/2352"}.get(mode, "AUDIO")
+
+    # -----------------------------
+    # Faixas
+    def track_lba(self, track, index_number=1):
+        """LBA absoluto de um INDEX da faixa (por padrão, INDEX 01)."""
+        return self.layout.track_lba(track, index_number)
+
+    def index_lbas(self, track):
+        """[(número do INDEX, LBA)] da faixa, com o PREGAP como INDEX 00 (ver `ImageLayout.index_lbas`)."""
+        return self.layout.index_lbas(track)
+
+    def track_mode(self, track):
+        """Modo da faixa detectado nos dados, com o modo do .cue como reserva."""
+        lba = self.track_lba(track)
+        if lba is not None and lba < self.total_sectors:
+            return self.detect_mode(lba)
+        return track.mode
+
+    def toc(self):
+        """Monta as entradas da TOC (sessão única), incluindo os pontos A0, A1 e A2."""
+        tracks = self.sheet.tracks
+        modes = [self.track_mode(track) for track in tracks]
+        entries = []
+        if tracks:
+            has_mode2 = any(mode.startswith("MODE2") for mode in modes)
+            first_control = CONTROL_AUDIO if modes[0] == "AUDIO" else CONTROL_DATA
+            last_control = CONTROL_AUDIO if modes[-1] == "AUDIO" else CONTROL_DATA
+            disc_type = DISC_TYPE_CDXA if has_mode2 else DISC_TYPE_CDDA_CDROM
+            entries.append(TocEntry(0xA0, first_control, pmsf=(tracks[0].number, disc_type, 0)))
+            entries.append(TocEntry(0xA1, last_control, pmsf=(tracks[-1].number, 0, 0)))
+            entries.append(TocEntry(0xA2, last_control, plba=self.total_sectors))
+        for track, mode in zip(tracks, modes):
+            control = CONTROL_AUDIO if mode == "AUDIO" else CONTROL_DATA
+            entries.append(TocEntry(track.number, control, plba=self.track_lba(track), mode=mode))
+        return entries
+
+def track_start_lbas(sheet, file_sizes):
+    """LBA do INDEX 01 de cada faixa (os setores que a TOC precisa ler)."""
+    layout = ImageLayout(sheet, file_sizes)
+    return [layout.track_lba(track) for track in sheet.tracks if track.index(1)]
+
+class SectorCapture:
+    """Sink de cópia que guarda setores escolhidos (por LBA) da imagem que passa por ele."""
+
+    def __init__(self, lbas):
+        self.sectors = {}
+        self._wanted = sorted(set(lbas))
+        self._position = 0
+
+    def update(self, data):
+        start = self._position
+        end = start + len(data)
+        self._position = end
+        # Setores que se sobrepõem ao bloco [start, end)
+        first = bisect_left(self._wanted, start // SECTOR_SIZE)
+        for lba in self._wanted[first:]:
+            sector_start = lba * SECTOR_SIZE
+            if sector_start >= end:
+                break
+            piece = data[max(sector_start, start) - start:min(sector_start + SECTOR_SIZE, end) - start]
+            self.sectors[lba] = self.sectors.get(lba, b"") + bytes(piece)
+
+class TocEntry:
+    """Entrada de TOC no formato usado pelo .ccd."""
+
+    __slots__ = ("point", "control", "pmin", "psec", "pframe", "plba", "mode")
+
+    def __init__(self, point, control, plba=None, pmsf=None, mode=None):
+        self.point = point
+        self.control = control
+        self.mode = mode
+        if pmsf is not None:
+            self.pmin, self.psec, self.pframe = pmsf
+            self.plba = (self.pmin * 60 + self.psec) * 75 + self.pframe - LBA_OFFSET
+        else:
+            self.plba = plba
+            self.pmin, self.psec, self.pframe = frames_to_msf(plba + LBA_OFFSET)
@@ -0,0 +1,67 @@
+"""Geração de .sub sintético (subcanais P e Q) quando a origem não tem .sub.
+
+O arquivo segue o layout do CloneCD: 96 bytes por setor, com os canais
+desintercalados (12 bytes de P, 12 de Q e 72 de R-W, zerados). Os setores são
+calculados em lotes com NumPy e gravados em blocos, então o uso de memória é
+limitado pelo tamanho do lote e não pelo tamanho do disco.
+"""
+from ps1_ecc import require_numpy
+from ps1_sectors import CONTROL_AUDIO, CONTROL_DATA, LBA_OFFSET, bcd, msf_bcd
+
+SUB_SIZE = 96
+BATCH_SECTORS = 32768  # ~3 MB de .sub por lote
+
+def _crc16_table():
+    np = require_numpy()
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table[byte] = crc & 0xFFFF
+    return table
+
+def _segments(sector_index):
+    """Tabela de trechos (LBA inicial, faixa, índice, control, LBA do INDEX 01), em ordem de LBA."""
+    rows = []
+    for track in sector_index.sheet.tracks:
+        control = CONTROL_AUDIO if sector_index.track_mode(track) == "AUDIO" else CONTROL_DATA
+        start = sector_index.track_lba(track)
+        for number, lba in sector_index.index_lbas(track):
+            rows.append((lba, track.number, number, control, start))
+    rows.sort()
+    np = require_numpy()
+    return np.array(rows, dtype=np.int64).reshape(-1, 5)
+
+def generate_sub(sector_index, output_sub, batch_sectors=BATCH_SECTORS):
+    """Gera o .sub do disco inteiro; gerador que produz o número de setores prontos a cada lote."""
+    np = require_numpy("gerar o .sub sintético")
+    segments = _segments(sector_index)
+    crc_table = _crc16_table()
+    total = sector_index.total_sectors
+    with open(output_sub, 'wb') as sub_file:
+        for first in range(0, total, batch_sectors):
+            lbas = np.arange(first, min(first + batch_sectors, total), dtype=np.int64)
+            seg = segments[np.maximum(np.searchsorted(segments[:, 0], lbas, side="right") - 1, 0)]
+            track_no, index_no, control, track_start = seg[:, 1], seg[:, 2], seg[:, 3], seg[:, 4]
+
+            sub = np.zeros((len(lbas), SUB_SIZE), dtype=np.uint8)
+            # Canal P: ligado nas pausas (entre INDEX 00 e INDEX 01)
+            sub[index_no == 0, 0:12] = 0xFF
+
+            # Canal Q, modo 1 (posição): control/ADR, faixa, índice, tempo relativo, zero, tempo absoluto, CRC
+            q = sub[:, 12:24]
+            q[:, 0] = (control << 4) | 1
+            q[:, 1] = bcd(track_no)
+            q[:, 2] = bcd(index_no)
+            q[:, 3], q[:, 4], q[:, 5] = msf_bcd(np.abs(lbas - track_start))  # Na pausa o tempo relativo conta para baixo
+            q[:, 7], q[:, 8], q[:, 9] = msf_bcd(lbas + LBA_OFFSET)
+            crc = np.zeros(len(lbas), dtype=np.uint16)
+            for column in range(10):
+                crc = ((crc << 8) & 0xFFFF) ^ crc_table[((crc >> 8) ^ q[:, column]) & 0xFF]
+            crc = ~crc
+            q[:, 10] = crc >> 8
+            q[:, 11] = crc & 0xFF
+
+            sub_file.write(sub.tobytes())
+            yield len(lbas)
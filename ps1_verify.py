@@ -0,0 +1,113 @@
+"""Hashes calculados durante a conversão e verificação contra DATs Redump/No-Intro.
+
+Os hashes (CRC32, MD5, SHA-1) são alimentados pelos mesmos blocos que a
+conversão já lê, então verificar não custa nenhuma leitura extra.
+"""
+import hashlib
+import json
+import zlib
+import xml.etree.ElementTree as ET
+
+# -----------------------------
+# Hash múltiplo em streaming
+class MultiHash:
+    """Calcula tamanho, CRC32, MD5 e SHA-1 de uma só vez."""
+
+    __slots__ = ("size", "_crc", "_md5", "_sha1")
+
+    def __init__(self):
+        self.size = 0
+        self._crc = 0
+        self._md5 = hashlib.md5()
+        self._sha1 = hashlib.sha1()
+
+    def update(self, data):
+        self.size += len(data)
+        self._crc = zlib.crc32(data, self._crc)
+        self._md5.update(data)
+        self._sha1.update(data)
+
+    def result(self):
+        return {
+            "size": self.size,
+            "crc32": f"{self._crc & 0xFFFFFFFF:08x}",
+            "md5": self._md5.hexdigest(),
+            "sha1": self._sha1.hexdigest(),
+        }
+
+# -----------------------------
+# Índice de DAT
+class DatIndex:
+    """Índice em memória de um DAT (formato XML Logiqx) chaveado por (tamanho, CRC32)."""
+
+    def __init__(self):
+        self._roms = {}
+
+    @classmethod
+    def load(cls, dat_path):
+        index = cls()
+        for _, element in ET.iterparse(dat_path, events=("end",)):
+            if element.tag == "game" or element.tag == "machine":
+                game = element.get("name", "")
+                for rom in element.iter("rom"):
+                    index.add(game, rom.attrib)
+                element.clear()
+        return index
+
+    def add(self, game, rom):
+        try:
+            key = (int(rom["size"]), rom["crc"].lower())
+        except (KeyError, ValueError):
+            return
+        entry = {
+            "game": game,
+            "rom": rom.get("name", ""),
+            "md5": rom.get("md5", "").lower(),
+            "sha1": rom.get("sha1", "").lower(),
+        }
+        self._roms.setdefault(key, []).append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._roms.values())
+
+    def lookup(self, hashes):
+        """Retorna (status, entrada) para um resultado de `MultiHash.result()`.
+
+        status: "verified" (tamanho, CRC e MD5/SHA-1 batem), "mismatch" (só
+        tamanho e CRC batem) ou "unknown" (não está no DAT).
+        """
+        candidates = self._roms.get((hashes["size"], hashes["crc32"]), [])
+        for entry in candidates:
+            if (not entry["md5"] or entry["md5"] == hashes["md5"]) and (not entry["sha1"] or entry["sha1"] == hashes["sha1"]):
+                return "verified", entry
+        if candidates:
+            return "mismatch", candidates[0]
+        return "unknown", None
+
+# -----------------------------
+# Relatório
+def build_report(cue_file, track_hashes, image_hashes, dat_index=None):
+    """Monta o relatório de verificação de um disco.
+
+    `track_hashes` é uma lista de (nome do .bin, resultado de `MultiHash.result()`).
+    """
+    def entry(name, hashes):
+        item = {"file": name, **hashes}
+        if dat_index is not None:
+            status, match = dat_index.lookup(hashes)
+            item["status"] = status
+            if match:
+                item["game"], item["rom"] = match["game"], match["rom"]
+        return item
+
+    tracks = [entry(name, hashes) for name, hashes in track_hashes]
+    report = {"cue": str(cue_file), "tracks": tracks, "image": image_hashes}
+    if dat_index is not None:
+        statuses = {track["status"] for track in tracks}
+        report["status"] = "verified" if statuses == {"verified"} else ("mismatch" if "mismatch" in statuses else "unknown")
+    return report
+
+def write_report(reports, report_path):
+    """Grava a lista de relatórios em JSON."""
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,92 @@
+"""Discos dentro de arquivos compactados (`ps1_archive`): a conversão gera o mesmo que a partir da pasta."""
+import os
+import shutil
+import subprocess
+import tarfile
+import zipfile
+
+import pytest
+
+from ps1_engine import convert_pair, validate_bin_cue
+from ps1_sectors import SECTOR_SIZE
+from test_sectors import make_disc
+
+SEVEN_ZIP = next((name for name in ("7z", "7za", "7zz") if shutil.which(name)), None)
+
+def pack(folder, archive, prefix="jogo/"):
+    """Compacta os arquivos de `folder` em `archive` (.zip, .tar.gz ou .7z), dentro da pasta `prefix`."""
+    names = sorted(os.listdir(folder))
+    if archive.name.endswith(".zip"):
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as f:
+            for name in names:
+                f.write(folder / name, prefix + name)
+    elif archive.name.endswith(".tar.gz"):
+        with tarfile.open(archive, 'w:gz') as f:
+            for name in names:
+                f.add(folder / name, prefix + name)
+    else:
+        staging = archive.parent / "7z"
+        shutil.copytree(folder, staging / prefix)
+        subprocess.run([SEVEN_ZIP, "a", "-bd", str(archive), prefix.rstrip("/")], cwd=staging, check=True,
+                       stdout=subprocess.DEVNULL)
+    return archive
+
+def convert(source, folder):
+    os.makedirs(folder)
+    ok, message = convert_pair(str(source), str(source), str(folder))
+    assert ok, message
+    return {name: (folder / name).read_bytes() for name in os.listdir(folder)}
+
+@pytest.fixture
+def disc(tmp_path):
+    cue = make_disc(tmp_path / "origem", tail=b"\x01" * 100)
+    os.makedirs(tmp_path / "pasta")
+    ok, message = convert_pair(str(tmp_path / "origem" / "disco.bin"), cue, str(tmp_path / "pasta"))
+    assert ok, message
+    return tmp_path / "origem", {name: (tmp_path / "pasta" / name).read_bytes() for name in ("disco.img", "disco.ccd")}
+
+@pytest.mark.parametrize("suffix", [
+    ".zip", ".tar.gz",
+    pytest.param(".7z", marks=pytest.mark.skipif(SEVEN_ZIP is None, reason="7-Zip não instalado")),
+])
+def test_archive_converts_like_the_folder(tmp_path, disc, suffix):
+    folder, expected = disc
+    archive = pack(folder, tmp_path / f"disco{suffix}")
+    outputs = convert(archive, tmp_path / "saida")
+    assert outputs["disco.img"] == expected["disco.img"]
+    assert outputs["disco.ccd"] == expected["disco.ccd"]
+
+def test_multi_file_archive(tmp_path):
+    make_disc(tmp_path / "origem", multi_file=True)
+    ok, message = convert_pair(str(tmp_path / "origem" / "disco (Track 01).bin"), str(tmp_path / "origem" / "disco.cue"),
+                               str(tmp_path / "origem"))
+    assert ok, message
+    expected = (tmp_path / "origem" / "disco.img").read_bytes()
+    os.remove(tmp_path / "origem" / "disco.img")
+    os.remove(tmp_path / "origem" / "disco.ccd")
+    outputs = convert(pack(tmp_path / "origem", tmp_path / "disco.zip", prefix=""), tmp_path / "saida")
+    assert outputs["disco.img"] == expected
+
+def test_archive_without_the_bin(tmp_path, disc):
+    folder, _ = disc
+    os.remove(folder / "disco.bin")
+    archive = pack(folder, tmp_path / "disco.zip")
+    ok, message = validate_bin_cue(str(archive), str(archive))
+    assert not ok
+    assert "'disco.bin'" in message and "disco.zip" in message
+    os.makedirs(tmp_path / "saida")
+    assert not convert_pair(str(archive), str(archive), str(tmp_path / "saida"))[0]
+
+def test_integrity_check_of_an_archive_matches_the_folder(tmp_path, disc):
+    pytest.importorskip("numpy")
+    from ps1_integrity import BAD_ECC, BAD_EDC, check_disc
+    folder, _ = disc
+    with open(folder / "disco.bin", 'r+b') as f:
+        f.seek(80 * SECTOR_SIZE + 0x200)  # Faixa 3: LBA 305
+        f.write(b"\xff")
+    archive = pack(folder, tmp_path / "disco.tar.gz")
+    on_disk = check_disc(str(folder / "disco.cue"), batch=8)
+    packed = check_disc(str(archive), batch=8)
+    assert packed["errors"] == on_disk["errors"] == [[305, 1, BAD_EDC | BAD_ECC]]
+    assert {key: value for key, value in packed.items() if key != "cue"} == \
+           {key: value for key, value in on_disk.items() if key != "cue"}
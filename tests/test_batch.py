@@ -0,0 +1,47 @@
+"""Lote (`ps1_batch.run_batch`): discos que gerariam os mesmos arquivos de saída."""
+import os
+
+from ps1_batch import run_batch
+from test_manifest import FakeConverter
+from test_sectors import make_disc
+
+def make_discs(tmp_path, names):
+    """Um disco por pasta: `names` é [(pasta, nome)]; retorna os pares (bin, cue)."""
+    pairs = []
+    for folder, name in names:
+        cue = make_disc(tmp_path / folder, name, tracks=[("AUDIO", 5, 0, 0)])
+        pairs.append((os.path.splitext(cue)[0] + ".bin", cue))
+    return pairs
+
+def test_same_name_in_different_folders_converts_only_the_first(tmp_path):
+    pairs = make_discs(tmp_path, [("a", "jogo"), ("b", "outro"), ("c", "jogo"), ("d", "jogo")])
+    (tmp_path / "saida").mkdir()
+    convert = FakeConverter()
+    events = []
+    results = run_batch(pairs, str(tmp_path / "saida"), workers=4, convert=convert, on_progress=events.append,
+                        progress_interval=0)
+    assert sorted(convert.calls) == [("jogo.cue", None), ("outro.cue", None)]
+    assert [ok for ok, _ in results] == [True, True, False, False]
+    for ok, msg in results[2:]:
+        assert msg.startswith("Saída duplicada: jogo.cue geraria os mesmos arquivos que ")
+        assert pairs[0][1] in msg
+    # Os discos recusados são informados como concluídos no progresso do lote
+    refused = [event.current.result for event in events[:-1] if event.current.result and not event.current.result[0]]
+    assert refused == results[2:]
+    assert events[-1].finished
+
+def test_duplicates_follow_the_output_format(tmp_path):
+    pairs = make_discs(tmp_path, [("a", "jogo"), ("b", "jogo")])
+    (tmp_path / "saida").mkdir()
+    convert = FakeConverter()
+    results = run_batch(pairs, str(tmp_path / "saida"), convert=convert, output_format="ecm")
+    assert [ok for ok, _ in results] == [True, False]
+    assert convert.calls == [("jogo.cue", None)]
+
+def test_distinct_names_all_convert(tmp_path):
+    pairs = make_discs(tmp_path, [("a", "jogo"), ("a", "jogo 2"), ("b", "Jogo")])
+    (tmp_path / "saida").mkdir()
+    convert = FakeConverter()
+    results = run_batch(pairs, str(tmp_path / "saida"), workers=3, convert=convert)
+    assert all(ok for ok, _ in results)
+    assert len(convert.calls) == 3
@@ -0,0 +1,65 @@
+"""Contêiner .ps1z: leitura aleatória (`ChunkReader.read_at`) e sequencial."""
+import io
+import os
+import random
+
+import pytest
+
+from ps1_container import ChunkReader, ChunkWriter, zstandard
+
+CODECS = ["store", "zlib", "lzma",
+          pytest.param("zstd", marks=pytest.mark.skipif(zstandard is None, reason="zstandard não instalado"))]
+CHUNK_SIZE = 1000
+
+def write_container(path, data, codec):
+    with open(path, 'wb') as f, ChunkWriter(f, codec, chunk_size=CHUNK_SIZE, workers=3) as writer:
+        for start in range(0, len(data), 333):
+            writer.write(data[start:start + 333])
+
+@pytest.fixture
+def data():
+    # Metade aleatória, metade repetitiva, terminando no meio de um bloco
+    return os.urandom(5500) + bytes(range(256)) * 20 + b"fim"
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_read_at(tmp_path, data, codec):
+    path = tmp_path / "imagem.ps1z"
+    write_container(path, data, codec)
+    rng = random.Random(0)
+    reader = ChunkReader(path)
+    try:
+        assert reader.size == len(data)
+        assert reader.codec == codec
+        cases = [(0, len(data)), (0, 0), (999, 2), (1000, 1000), (CHUNK_SIZE * 3 - 1, CHUNK_SIZE + 2),
+                 (len(data) - 5, 100), (len(data), 10), (len(data) + 50, 10)]
+        cases += [(rng.randrange(len(data)), rng.randrange(1, 3000)) for _ in range(50)]
+        for offset, size in cases:
+            assert reader.read_at(offset, size) == data[offset:offset + size], (offset, size)
+    finally:
+        reader.close()
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_sequential_read(tmp_path, data, codec):
+    path = tmp_path / "imagem.ps1z"
+    write_container(path, data, codec)
+    with io.BufferedReader(ChunkReader(path), 777) as stream:
+        parts = []
+        while chunk := stream.read(450):
+            parts.append(chunk)
+    assert b"".join(parts) == data
+
+def test_empty_container(tmp_path):
+    path = tmp_path / "vazio.ps1z"
+    write_container(path, b"", "zlib")
+    reader = ChunkReader(path)
+    try:
+        assert reader.size == 0
+        assert reader.read_at(0, 10) == b""
+    finally:
+        reader.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "outro.ps1z"
+    path.write_bytes(b"nada disso" * 10)
+    with pytest.raises(ValueError):
+        ChunkReader(path)
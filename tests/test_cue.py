@@ -0,0 +1,108 @@
+"""Parser de CUE sheet (`ps1_cue`): vários FILE, INDEX 00, gaps, FLAGS, erros e o cache."""
+import os
+
+import pytest
+
+import ps1_cue
+from ps1_cue import CueError, format_msf, load_cue_sheet, msf_to_frames, parse_cue_sheet, parse_cue_text
+
+MULTI_FILE_CUE = """REM GENRE Game
+FILE "Jogo (Track 01).bin" BINARY
+  TRACK 01 MODE2/2352
+    INDEX 01 00:00:00
+FILE "Jogo (Track 02).bin" BINARY
+  TRACK 02 AUDIO
+    FLAGS DCP
+    INDEX 00 00:00:00
+    INDEX 01 00:02:00
+  TRACK 03 AUDIO
+    PREGAP 00:01:00
+    INDEX 01 03:10:05
+    POSTGAP 00:00:30
+FILE faixa4.wav WAVE
+  TRACK 04 AUDIO
+    INDEX 01 00:00:00
+"""
+
+def test_msf_conversion():
+    assert msf_to_frames(3, 10, 5) == (3 * 60 + 10) * 75 + 5
+    assert format_msf(msf_to_frames(3, 10, 5)) == "03:10:05"
+
+def test_multi_file_sheet():
+    sheet = parse_cue_text(MULTI_FILE_CUE, "jogo.cue")
+    assert sheet.path == "jogo.cue"
+    assert sheet.bin_files == ["Jogo (Track 01).bin", "Jogo (Track 02).bin", "faixa4.wav"]
+    assert [cue_file.filetype for cue_file in sheet.files] == ["BINARY", "BINARY", "WAVE"]
+    assert [track.number for track in sheet.tracks] == [1, 2, 3, 4]
+    assert [track.file_index for track in sheet.tracks] == [0, 1, 1, 2]
+    assert [[track.number for track in cue_file.tracks] for cue_file in sheet.files] == [[1], [2, 3], [4]]
+    assert sheet.file_of(sheet.tracks[2]).name == "Jogo (Track 02).bin"
+    assert sheet.tracks[0].mode == "MODE2/2352" and not sheet.tracks[0].is_audio and sheet.tracks[1].is_audio
+
+def test_index_00_gaps_and_flags():
+    sheet = parse_cue_text(MULTI_FILE_CUE)
+    track = sheet.tracks[1]
+    assert [(index.number, index.frames) for index in track.indexes] == [(0, 0), (1, 150)]
+    assert track.index(0).frames == 0 and track.index(2) is None
+    assert track.first_frame == 0  # Os dados da faixa começam no INDEX 00...
+    assert track.start == 150  # ...mas ela começa de fato no INDEX 01
+    assert track.flags == ("DCP",)
+    assert track.index(1).timestamp == "00:02:00"
+    gapped = sheet.tracks[2]
+    assert (gapped.pregap, gapped.postgap) == (75, 30)
+    assert gapped.first_frame == gapped.start == msf_to_frames(3, 10, 5)
+    assert sheet.tracks[0].sector_size == 2352
+
+@pytest.mark.parametrize("text, message", [
+    ('TRACK 01 AUDIO\n  INDEX 01 00:00:00\n', "TRACK antes de FILE"),
+    ('FILE "a.bin" BINARY\n  INDEX 01 00:00:00\n', "INDEX inválido"),
+    ('FILE "a.bin" BINARY\n  TRACK 01 AUDIO\n    INDEX 01 00:60:00\n', "tempo MSF inválido"),
+    ('FILE "a.bin" BINARY\n  TRACK 01 AUDIO\n    INDEX 00 00:00:00\n', "sem INDEX 01"),
+    ('FILE "a.bin" BINARY\n  TRACK 02 AUDIO\n    INDEX 01 00:00:00\n  TRACK 01 AUDIO\n    INDEX 01 00:01:00\n',
+     "fora de ordem"),
+    ('FILE "a.bin" BINARY\n  TRACK 01 AUDIO\n    INDEX 01 00:02:00\n  TRACK 02 AUDIO\n    INDEX 01 00:01:00\n',
+     "índices da faixa 2"),
+    ('FILE "a.bin" BINARY\n  TRACK 01 AUDIO\n    PREGAP 2 segundos\n', "PREGAP inválido"),
+])
+def test_invalid_sheets(text, message):
+    with pytest.raises(CueError, match=message):
+        parse_cue_text(text)
+
+def test_file_encodings(tmp_path):
+    text = 'FILE "Canção.bin" BINARY\r\n  TRACK 01 AUDIO\r\n    INDEX 01 00:00:00\r\n'
+    (tmp_path / "utf8.cue").write_bytes(b"\xef\xbb\xbf" + text.encode("utf-8"))
+    (tmp_path / "latin1.cue").write_bytes(text.encode("latin-1"))
+    assert parse_cue_sheet(tmp_path / "utf8.cue").bin_files == ["Canção.bin"]
+    assert parse_cue_sheet(tmp_path / "latin1.cue").bin_files == ["Canção.bin"]
+
+def test_cache_reuses_sheet_until_the_file_changes(tmp_path, monkeypatch):
+    ps1_cue.clear_cache()
+    calls = []
+    parse = ps1_cue.parse_cue_sheet
+    monkeypatch.setattr(ps1_cue, "parse_cue_sheet", lambda path: calls.append(path) or parse(path))
+    cue = tmp_path / "jogo.cue"
+    cue.write_text(MULTI_FILE_CUE, encoding="utf-8")
+    first = load_cue_sheet(cue)
+    assert load_cue_sheet(cue) is first
+    assert len(calls) == 1
+    # Conteúdo novo (outro tamanho e mtime): lido de novo
+    cue.write_text(MULTI_FILE_CUE.replace("REM GENRE Game\n", ""), encoding="utf-8")
+    os.utime(cue, ns=(0, os.stat(cue).st_mtime_ns + 1_000_000_000))
+    second = load_cue_sheet(cue)
+    assert second is not first and len(calls) == 2
+    assert [track.number for track in second.tracks] == [1, 2, 3, 4]
+    ps1_cue.clear_cache()
+    assert load_cue_sheet(cue) is not second and len(calls) == 3
+
+def test_cache_is_bounded(tmp_path, monkeypatch):
+    ps1_cue.clear_cache()
+    monkeypatch.setattr(ps1_cue, "CACHE_SIZE", 2)
+    paths = []
+    for number in range(3):
+        path = tmp_path / f"disco{number}.cue"
+        path.write_text(MULTI_FILE_CUE, encoding="utf-8")
+        paths.append(path)
+    sheets = [load_cue_sheet(path) for path in paths]
+    assert load_cue_sheet(paths[2]) is sheets[2]
+    assert load_cue_sheet(paths[0]) is not sheets[0]  # O mais antigo saiu do cache
+    ps1_cue.clear_cache()
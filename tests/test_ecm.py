@@ -0,0 +1,80 @@
+"""Ida e volta bit a bit do ECM e do contêiner .ps1z (`PackedWriter` -> `unpack_file`)."""
+import io
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ps1_ecm
+from ps1_container import zstandard
+from ps1_ecc import MODE1, MODE2_FORM1, MODE2_FORM2, RAW
+from ps1_ecm import PackedWriter, decode_ecm, packed_name, unpack_file
+from test_ecc import make_sectors
+
+CODECS = [None, "store", "zlib", "lzma",
+          pytest.param("zstd", marks=pytest.mark.skipif(zstandard is None, reason="zstandard não instalado"))]
+
+def disc_image(tail=1000):
+    """Imagem com trechos de todos os tipos de setor, um setor danificado e um resto que não completa um setor."""
+    damaged = make_sectors(MODE1, 1, first_lba=30, seed=9)
+    damaged[0, 0x200] ^= 0x55
+    parts = [
+        make_sectors(MODE1, 20), make_sectors(MODE2_FORM1, 15, first_lba=20, seed=1), damaged,
+        make_sectors(MODE2_FORM2, 12, first_lba=31, seed=2), make_sectors(MODE2_FORM1, 3, first_lba=43, seed=3),
+        make_sectors(RAW, 10, seed=4),
+    ]
+    data = b"".join(part.tobytes() for part in parts)
+    return data + np.random.default_rng(5).integers(0, 256, tail, dtype=np.uint8).tobytes()
+
+def pack_and_unpack(tmp_path, data, output_format, compression, write_size=100000):
+    packed_path = tmp_path / packed_name("disco", output_format, compression)
+    with open(packed_path, 'wb') as f:
+        writer = PackedWriter(f, output_format, compression, workers=2)
+        for start in range(0, len(data), write_size):
+            writer.write(data[start:start + write_size])
+        writer.close()
+    output = tmp_path / "saida"
+    output.mkdir()
+    restored = unpack_file(str(packed_path), str(output))
+    with open(restored, 'rb') as f:
+        return packed_path, f.read()
+
+@pytest.mark.parametrize("compression", CODECS)
+@pytest.mark.parametrize("tail", [0, 1000])
+def test_ecm_round_trip(tmp_path, monkeypatch, compression, tail):
+    monkeypatch.setattr(ps1_ecm, "BATCH_SECTORS", 16)  # Força vários lotes e registros partidos
+    data = disc_image(tail)
+    packed_path, restored = pack_and_unpack(tmp_path, data, "ecm", compression, write_size=7777)
+    assert restored == data
+    if compression in (None, "zlib", "lzma"):
+        assert packed_path.stat().st_size < len(data)
+
+@pytest.mark.parametrize("compression", [codec for codec in CODECS if codec is not None])
+def test_compressed_image_round_trip(tmp_path, compression):
+    data = disc_image()
+    _, restored = pack_and_unpack(tmp_path, data, "img", compression)
+    assert restored == data
+
+def test_ecm_records():
+    out = io.BytesIO()
+    encoder = ps1_ecm.EcmEncoder(out)
+    encoder.write(make_sectors(MODE1, 2).tobytes())
+    encoder.close()
+    encoded = out.getvalue()
+    assert encoded[:4] == b"ECM\x00"
+    # Só o endereço e os 2048 bytes de dados de cada setor Mode 1 são guardados
+    assert len(encoded) == 4 + 1 + 2 * (3 + 0x800) + 5 + 4
+    assert encoded[-9:-4] == b"\xfc\xff\xff\xff\x3f"
+
+def test_ecm_detects_corruption():
+    data = disc_image()
+    out = io.BytesIO()
+    encoder = ps1_ecm.EcmEncoder(out)
+    encoder.write(data)
+    encoder.close()
+    encoded = bytearray(out.getvalue())
+    encoded[-1] ^= 0xFF
+    with pytest.raises(ValueError):
+        decode_ecm(io.BytesIO(bytes(encoded)), io.BytesIO())
+    with pytest.raises(ValueError):
+        decode_ecm(io.BytesIO(bytes(encoded[:len(encoded) // 2])), io.BytesIO())
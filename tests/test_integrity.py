@@ -0,0 +1,79 @@
+"""Verificação setor a setor (`ps1_integrity`): mapa de erros com os LBAs da imagem e o JSON gravado."""
+import json
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ps1_cue import load_cue_sheet
+from ps1_integrity import (BAD_ECC, BAD_EDC, BAD_HEADER, BAD_SUBHEADER, BAD_SYNC, ERROR_NAMES, check_disc, data_ranges,
+                           describe_flags, write_error_map)
+from ps1_sectors import LBA_OFFSET, SECTOR_SIZE
+from test_sectors import make_disc
+
+def corrupt(path, sector, offset, value=0xFF):
+    """Troca um byte do setor `sector` (posição no .bin) por `value`."""
+    with open(path, 'r+b') as f:
+        f.seek(sector * SECTOR_SIZE + offset)
+        f.write(bytes([value]))
+
+@pytest.fixture
+def disc(tmp_path):
+    cue = make_disc(tmp_path)
+    return cue, tmp_path / "disco.bin"
+
+def test_data_ranges_skip_audio_and_gaps(disc):
+    cue, bin_file = disc
+    ranges = data_ranges(load_cue_sheet(cue), [os.path.getsize(bin_file)])
+    # Faixa 3: setores 75.. do .bin, LBA 300 na imagem (depois dos 150 + 75 setores de PREGAP)
+    assert ranges == [(0, 0, 40, 0, LBA_OFFSET, 2), (0, 75, 25, 300, 300 + LBA_OFFSET, 2)]
+
+def test_clean_disc_is_ok(disc):
+    report = check_disc(disc[0], workers=2, batch=8)
+    assert report["status"] == "ok"
+    assert (report["sectors_checked"], report["sectors_missing"], report["bad_sectors"]) == (65, 0, 0)
+    assert report["data_tracks"] == 2
+    assert report["errors"] == [] and report["summary"] == {}
+
+def test_error_map_has_image_lbas(disc):
+    cue, bin_file = disc
+    for sector in (6, 7, 8):  # Atravessa o limite entre dois lotes de 8 setores
+        corrupt(bin_file, sector, 0x100)
+    corrupt(bin_file, 80, 0x200)  # Faixa 3: LBA 305
+    corrupt(bin_file, 20, 14)  # Frame do endereço MSF
+    corrupt(bin_file, 30, 0)  # Sync
+    corrupt(bin_file, 31, 0x12, 0x09)  # Só uma das cópias do subheader
+    progress = []
+    report = check_disc(cue, workers=3, batch=8, on_progress=lambda done, total: progress.append((done, total)))
+    assert report["status"] == "damaged"
+    assert report["errors"] == [
+        [6, 3, BAD_EDC | BAD_ECC],
+        [20, 1, BAD_HEADER],
+        [30, 1, BAD_SYNC],
+        [31, 1, BAD_SUBHEADER | BAD_EDC | BAD_ECC],
+        [305, 1, BAD_EDC | BAD_ECC],
+    ]
+    assert report["bad_sectors"] == 7
+    assert report["summary"] == {"edc": 5, "ecc": 5, "header": 1, "sync": 1, "subheader": 1}
+    assert progress[-1] == (65, 65)
+
+def test_mode1_disc(tmp_path):
+    cue = make_disc(tmp_path, tracks=[("MODE1/2352", 30, 0, 0), ("AUDIO", 10, 150, 0)])
+    corrupt(tmp_path / "disco.bin", 12, 0x20)
+    report = check_disc(cue, batch=8)
+    assert report["errors"] == [[12, 1, BAD_EDC | BAD_ECC]]
+    assert report["data_tracks"] == 1
+
+def test_write_error_map(disc, tmp_path):
+    cue, bin_file = disc
+    corrupt(bin_file, 80, 0x200)
+    reports = [check_disc(cue, batch=8)]
+    write_error_map(reports, tmp_path / "erros.json")
+    text = (tmp_path / "erros.json").read_text(encoding="utf-8")
+    assert "\n" not in text  # JSON compacto
+    data = json.loads(text)
+    assert data["flags"] == {name: bit for bit, name in ERROR_NAMES.items()}
+    assert data["discs"] == reports
+    assert data["discs"][0]["cue"] == cue
+    assert describe_flags(data["discs"][0]["errors"][0][2]) == "edc+ecc"
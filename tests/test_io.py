@@ -0,0 +1,131 @@
+"""`ps1_io`: troca automática de backend de cópia, erro de backend explícito sem suporte e saída esparsa."""
+import errno
+import os
+
+import pytest
+
+import ps1_io
+from ps1_engine import convert_pair
+from ps1_io import AUTO_ORDER, BACKENDS, BackendUnsupported, SparseWriter, copy_into
+from test_sectors import make_disc
+
+def source_file(tmp_path, size=300000):
+    path = tmp_path / "origem.bin"
+    path.write_bytes(os.urandom(size))
+    return path
+
+def copy(src, dst, **kwargs):
+    with open(dst, 'wb') as f:
+        f.write(b"cabecalho")
+        f.flush()  # A cópia grava direto no descritor, depois do que já está no arquivo
+        copied = sum(copy_into(str(src), f.fileno(), **kwargs))
+    return copied
+
+def unsupported(src_fd, dst_fd, offset, length):
+    raise BackendUnsupported("sem suporte neste teste")
+    yield  # pragma: no cover
+
+def fails_halfway(src_fd, dst_fd, offset, length):
+    """Copia metade e então diz que não é suportado (como um copy_file_range entre sistemas de arquivos)."""
+    half = length // 2
+    data = os.pread(src_fd, half, offset)
+    os.write(dst_fd, data)
+    yield len(data)
+    raise BackendUnsupported(os.strerror(errno.EXDEV))
+
+@pytest.mark.parametrize("backend", AUTO_ORDER)
+def test_each_backend_or_a_clear_error(tmp_path, backend):
+    src = source_file(tmp_path)
+    dst = tmp_path / "destino.img"
+    try:
+        copied = copy(src, dst, backend=backend, offset=1000, length=200000)
+    except BackendUnsupported as e:
+        assert f"'{backend}'" in str(e) and "auto" in str(e)
+        return
+    assert copied == 200000
+    assert dst.read_bytes() == b"cabecalho" + src.read_bytes()[1000:201000]
+
+def test_auto_falls_back_from_where_the_last_backend_stopped(tmp_path, monkeypatch):
+    monkeypatch.setitem(BACKENDS, "reflink", unsupported)
+    monkeypatch.setitem(BACKENDS, "copy_file_range", fails_halfway)
+    monkeypatch.setitem(BACKENDS, "sendfile", unsupported)
+    src = source_file(tmp_path)
+    dst = tmp_path / "destino.img"
+    assert copy(src, dst, offset=5, length=250001) == 250001
+    assert dst.read_bytes() == b"cabecalho" + src.read_bytes()[5:250006]
+
+def test_explicit_unsupported_backend_names_it(tmp_path, monkeypatch):
+    monkeypatch.setitem(BACKENDS, "reflink", unsupported)
+    src = source_file(tmp_path)
+    with pytest.raises(BackendUnsupported, match="o backend de cópia 'reflink' não é suportado aqui .*use 'auto'"):
+        copy(src, tmp_path / "destino.img", backend="reflink")
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError, match="desconhecido"):
+        copy(source_file(tmp_path), tmp_path / "destino.img", backend="teleporte")
+
+def test_sinks_force_the_buffered_backend(tmp_path, monkeypatch):
+    for name in ("reflink", "copy_file_range", "sendfile"):
+        monkeypatch.setitem(BACKENDS, name, unsupported)
+    src = source_file(tmp_path)
+    seen = []
+    assert copy(src, tmp_path / "destino.img", backend="reflink", sinks=[lambda data: seen.append(bytes(data))]) == 300000
+    assert b"".join(seen) == src.read_bytes()
+
+def test_engine_reports_unsupported_backend(tmp_path, monkeypatch):
+    monkeypatch.setitem(BACKENDS, "reflink", unsupported)
+    cue = make_disc(tmp_path / "origem", tracks=[("AUDIO", 20, 0, 0)])
+    (tmp_path / "saida").mkdir()
+    ok, message = convert_pair(str(tmp_path / "origem" / "disco.bin"), cue, str(tmp_path / "saida"), copy_backend="reflink")
+    assert not ok
+    assert message.startswith("Erro: o backend de cópia 'reflink' não é suportado aqui")
+
+def test_write_all_retries_short_writes(tmp_path, monkeypatch):
+    real_write = os.write
+    monkeypatch.setattr(ps1_io.os, "write", lambda fd, data: real_write(fd, bytes(data[:7])))
+    with open(tmp_path / "saida", 'wb') as f:
+        ps1_io.write_all(f.fileno(), memoryview(b"0123456789" * 5))
+    monkeypatch.undo()
+    assert (tmp_path / "saida").read_bytes() == b"0123456789" * 5
+
+# -----------------------------
+# Saída esparsa
+def sparse_data(block_size=4096):
+    """Blocos com dados e zerados alternados, terminando em buraco e num bloco incompleto."""
+    data = b"".join(os.urandom(block_size) if number % 3 == 0 else bytes(block_size) for number in range(10))
+    return data + bytes(block_size) + b"\x07" * 100
+
+def test_sparse_writer_keeps_the_size_at_what_was_written(tmp_path):
+    total = 1024 * 1024
+    with open(tmp_path / "saida.img", 'wb') as f:
+        writer = SparseWriter(f.fileno(), total, block_size=4096)
+        writer.write(os.urandom(3 * 4096))
+        # FALLOC_FL_KEEP_SIZE: a reserva não muda o tamanho aparente (a retomada usa esse tamanho)
+        assert os.fstat(f.fileno()).st_size == 3 * 4096
+        writer.write(b"\x01" * 100)  # Bloco incompleto: fica pendente até o close()
+        assert os.fstat(f.fileno()).st_size == 3 * 4096
+        writer.close()
+        assert os.fstat(f.fileno()).st_size == 3 * 4096 + 100
+
+def test_sparse_writer_reads_back_identical(tmp_path):
+    data = sparse_data()
+    with open(tmp_path / "saida.img", 'wb') as f:
+        f.write(b"cab")  # Começo desalinhado com o bloco
+        f.flush()
+        writer = SparseWriter(f.fileno(), len(data) + 3, block_size=4096)
+        for start in range(0, len(data), 1000):  # Escritas que não coincidem com os blocos
+            writer.write(data[start:start + 1000])
+        writer.close()
+    assert (tmp_path / "saida.img").read_bytes() == b"cab" + data
+    assert writer.hole_bytes > 0
+    assert writer.saved <= writer.hole_bytes
+
+def test_sparse_conversion_matches_the_normal_image(tmp_path):
+    cue = make_disc(tmp_path / "origem", tail=b"\x01" * 100)
+    bin_file = str(tmp_path / "origem" / "disco.bin")
+    for folder, sparse in (("normal", False), ("esparsa", True)):
+        (tmp_path / folder).mkdir()
+        ok, message = convert_pair(bin_file, cue, str(tmp_path / folder), sparse=sparse)
+        assert ok, message
+    for name in ("disco.img", "disco.ccd"):
+        assert (tmp_path / "esparsa" / name).read_bytes() == (tmp_path / "normal" / name).read_bytes()
@@ -0,0 +1,128 @@
+"""Manifesto de conversões (`ps1_manifest`) e o que `run_batch` pula ou retoma com ele."""
+import json
+import os
+
+import pytest
+
+import ps1_manifest
+from ps1_batch import run_batch
+from ps1_manifest import OUTPUT_OPTIONS, Manifest, output_files_for, output_options
+from test_sectors import make_disc
+
+@pytest.fixture
+def discs(tmp_path):
+    cues = [make_disc(tmp_path / "origem", name, tracks=[("AUDIO", 5, 0, 0)]) for name in ("a", "b", "c")]
+    return [(os.path.splitext(cue)[0] + ".bin", cue) for cue in cues]
+
+class FakeConverter:
+    """Substituto de `convert_pair` que grava .img/.ccd vazios e registra as chamadas."""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __call__(self, bin_file, cue_file, output_folder, on_progress=None, **options):
+        name = os.path.basename(cue_file)
+        self.calls.append((name, options.get("resume")))
+        if name in self.fail:
+            return False, "Erro durante a conversão: falhou"
+        for path in output_files_for(cue_file, output_folder, options.get("output_format", "img"), options.get("compression"))[:2]:
+            path.write_bytes(b"imagem")
+        return True, "ok"
+
+def run(discs, output, convert, **options):
+    output.mkdir(exist_ok=True)
+    manifest = Manifest.for_folder(output)
+    return run_batch(discs, str(output), workers=2, convert=convert, manifest=manifest, **options)
+
+# -----------------------------
+# Estados do manifesto
+def test_status_follows_fingerprint_outputs_and_options(tmp_path, discs):
+    _, cue = discs[0]
+    manifest = Manifest(tmp_path / "manifesto.json")
+    fingerprint = manifest.fingerprint(cue)
+    options = output_options({})
+    outputs = output_files_for(cue, tmp_path)
+    assert manifest.status(cue, fingerprint, outputs, options) is None
+    manifest.mark_started(cue, fingerprint, options)
+    assert manifest.status(cue, fingerprint, outputs, options) == "partial"
+    assert manifest.status(cue, fingerprint, outputs, output_options({"sparse": True})) is None
+    for path in outputs[:2]:
+        path.write_bytes(b"imagem")
+    manifest.mark_done(cue, fingerprint, outputs, options)
+    assert manifest.status(cue, fingerprint, outputs, options) == "done"
+    # Outras opções, outro formato, origem alterada ou saída alterada: converte de novo
+    assert manifest.status(cue, fingerprint, outputs, output_options({"generate_sub": True})) is None
+    assert manifest.status(cue, fingerprint, output_files_for(cue, tmp_path, "ecm"), options) is None
+    assert manifest.status(cue, dict(fingerprint, extra=[1, 2]), outputs, options) is None
+    outputs[0].write_bytes(b"outra imagem")
+    assert manifest.status(cue, fingerprint, outputs, options) is None
+
+def test_entries_without_options_count_as_defaults(tmp_path, discs):
+    _, cue = discs[0]
+    manifest = Manifest(tmp_path / "manifesto.json")
+    fingerprint = manifest.fingerprint(cue)
+    manifest.mark_started(cue, fingerprint)
+    manifest._entries[next(iter(manifest._entries))].pop("options")
+    assert manifest.status(cue, fingerprint, options=dict(OUTPUT_OPTIONS)) == "partial"
+    assert manifest.status(cue, fingerprint, options=output_options({"output_format": "ecm"})) is None
+
+def test_saves_are_coalesced_until_flush(tmp_path, discs, monkeypatch):
+    monkeypatch.setattr(ps1_manifest, "SAVE_INTERVAL", 3600.0)
+    monkeypatch.setattr(ps1_manifest, "SAVE_EVERY", 3)
+    path = tmp_path / "manifesto.json"
+    manifest = Manifest(path)
+    cues = [cue for _, cue in discs]
+    manifest.mark_started(cues[0], manifest.fingerprint(cues[0]))
+    assert len(json.loads(path.read_text())["entries"]) == 1  # A primeira alteração é gravada na hora
+    manifest.mark_started(cues[1], manifest.fingerprint(cues[1]))
+    manifest.mark_started(cues[2], manifest.fingerprint(cues[2]))
+    assert len(Manifest(path)._entries) == 1
+    manifest.mark_done(cues[0], manifest.fingerprint(cues[0]), [])  # 3 alterações pendentes: grava
+    assert len(Manifest(path)._entries) == 3
+    manifest.mark_done(cues[1], manifest.fingerprint(cues[1]), [])
+    assert Manifest(path)._entries[os.path.realpath(cues[1])]["state"] == "started"
+    manifest.flush()
+    assert Manifest(path)._entries[os.path.realpath(cues[1])]["state"] == "done"
+    assert "\n" not in path.read_text()  # JSON compacto
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+# -----------------------------
+# Lotes incrementais
+def test_unchanged_discs_are_skipped(tmp_path, discs):
+    convert = FakeConverter()
+    assert all(ok for ok, _ in run(discs, tmp_path / "saida", convert))
+    assert sorted(convert.calls) == [("a.cue", False), ("b.cue", False), ("c.cue", False)]
+    convert.calls.clear()
+    results = run(discs, tmp_path / "saida", convert)
+    assert convert.calls == []
+    assert all(ok and msg.startswith("Sem alterações") for ok, msg in results)
+
+def test_changed_options_or_verify_convert_again(tmp_path, discs):
+    convert = FakeConverter()
+    run(discs, tmp_path / "saida", convert)
+    convert.calls.clear()
+    run(discs, tmp_path / "saida", convert, generate_sub=True)
+    assert len(convert.calls) == 3
+    convert.calls.clear()
+    run(discs, tmp_path / "saida", convert, generate_sub=True)
+    assert convert.calls == []
+    run(discs, tmp_path / "saida", convert, generate_sub=True, verify=True)
+    assert len(convert.calls) == 3
+
+def test_changed_source_converts_again(tmp_path, discs):
+    convert = FakeConverter()
+    run(discs, tmp_path / "saida", convert)
+    convert.calls.clear()
+    with open(discs[1][0], 'ab') as f:
+        f.write(bytes(2352))
+    run(discs, tmp_path / "saida", convert)
+    assert convert.calls == [("b.cue", False)]
+
+def test_interrupted_disc_is_resumed(tmp_path, discs):
+    convert = FakeConverter(fail={"b.cue"})
+    results = run(discs, tmp_path / "saida", convert)
+    assert [ok for ok, _ in results] == [True, False, True]
+    convert = FakeConverter()
+    run(discs, tmp_path / "saida", convert)
+    assert convert.calls == [("b.cue", True)]
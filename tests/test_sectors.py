@@ -0,0 +1,184 @@
+"""Layout da imagem com PREGAP/POSTGAP (`ps1_sectors.ImageLayout`), INDEX/TOC e o .ccd gerado."""
+import os
+import random
+
+import pytest
+
+import ps1_ecc
+from ps1_cue import format_msf, load_cue_sheet, parse_cue_text
+from ps1_ecc import MODE1, MODE2_FORM1, regenerate_sector
+from ps1_engine import convert_pair, write_ccd
+from ps1_sectors import LBA_OFFSET, SECTOR_SIZE, SYNC, ImageLayout, SectorIndex, gap_sectors, msf_bcd
+
+# [(modo, setores no .bin, PREGAP, POSTGAP)]: dados, áudio com PREGAP e dados com PREGAP e POSTGAP
+PREGAP_TRACKS = [("MODE2/2352", 40, 0, 0), ("AUDIO", 35, 150, 0), ("MODE2/2352", 25, 75, 10)]
+
+PREGAP_CUE = """FILE "disco.bin" BINARY
+  TRACK 01 MODE2/2352
+    INDEX 01 00:00:00
+  TRACK 02 AUDIO
+    PREGAP 00:02:00
+    INDEX 01 00:00:40
+  TRACK 03 MODE2/2352
+    PREGAP 00:01:00
+    INDEX 01 00:01:00
+    POSTGAP 00:00:10
+"""
+
+def data_sector(lba, mode, seed):
+    """Setor Mode 1 ou Mode 2 Form 1 válido (EDC/ECC) com o endereço de `lba` no cabeçalho."""
+    sector = bytearray(SECTOR_SIZE)
+    sector[12:15] = msf_bcd(lba + LBA_OFFSET)
+    payload = random.Random(seed).randbytes(0x800)
+    if mode == "MODE1/2352":
+        sector[0x10:0x810] = payload
+        return bytes(regenerate_sector(sector, MODE1))
+    sector[0x10:0x18] = bytes([0, 0, 0x08, 0] * 2)
+    sector[0x18:0x818] = payload
+    return bytes(regenerate_sector(sector, MODE2_FORM1))
+
+def make_disc(folder, name="disco", tracks=PREGAP_TRACKS, multi_file=False, tail=b""):
+    """Grava `name`.cue e os .bin de um disco com as `tracks` [(modo, setores, PREGAP, POSTGAP)].
+
+    Os setores de dados levam no cabeçalho o endereço que terão na imagem (com
+    os gaps); `tail` é acrescentado ao último .bin. Retorna o caminho do .cue.
+    """
+    os.makedirs(folder, exist_ok=True)
+    lines, bins = [], []
+    lba = 0
+    for number, (mode, count, pregap, postgap) in enumerate(tracks, 1):
+        if multi_file or not bins:
+            bins.append((f"{name} (Track {number:02d}).bin" if multi_file else f"{name}.bin", bytearray()))
+            lines.append(f'FILE "{bins[-1][0]}" BINARY')
+        data = bins[-1][1]
+        lines.append(f"  TRACK {number:02d} {mode}")
+        if pregap:
+            lines.append(f"    PREGAP {format_msf(pregap)}")
+        lines.append(f"    INDEX 01 {format_msf(len(data) // SECTOR_SIZE)}")
+        if postgap:
+            lines.append(f"    POSTGAP {format_msf(postgap)}")
+        lba += pregap
+        for sector in range(lba, lba + count):
+            data += random.Random(sector).randbytes(SECTOR_SIZE) if mode == "AUDIO" else data_sector(sector, mode, sector)
+        lba += count + postgap
+    bins[-1][1].extend(tail)
+    for bin_name, data in bins:
+        with open(os.path.join(folder, bin_name), 'wb') as f:
+            f.write(data)
+    cue_path = os.path.join(folder, f"{name}.cue")
+    with open(cue_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return cue_path
+
+# -----------------------------
+# Layout
+def test_layout_inserts_pregap_and_postgap():
+    layout = ImageLayout(parse_cue_text(PREGAP_CUE), [100 * SECTOR_SIZE + 100])
+    assert [(span.lba, span.sectors, span.is_gap) for span in layout.spans if span.sectors] == [
+        (0, 40, False), (40, 150, True), (190, 35, False), (225, 75, True), (300, 25, False), (325, 10, True),
+    ]
+    # O resto que não completa um setor vai para depois do último gap, fora da contagem de LBAs
+    assert (layout.spans[-1].lba, layout.spans[-1].offset, layout.spans[-1].size) == (335, 100 * SECTOR_SIZE, 100)
+    assert layout.total_sectors == 335
+    assert layout.total_size == 335 * SECTOR_SIZE + 100
+    assert layout.lba(0, 39) == 39 and layout.lba(0, 40) == 190 and layout.lba(0, 75) == 300
+    assert layout.span_at(40).is_gap and layout.span_at(324).file_index == 0
+    with pytest.raises(IndexError):
+        layout.span_at(335)
+
+def test_layout_without_gaps_is_the_concatenated_bins():
+    sheet = parse_cue_text('FILE "a.bin" BINARY\n TRACK 01 MODE1/2352\n  INDEX 01 00:00:00\n'
+                           'FILE "b.bin" BINARY\n TRACK 02 AUDIO\n  INDEX 00 00:00:00\n  INDEX 01 00:02:00\n')
+    layout = ImageLayout(sheet, [40 * SECTOR_SIZE, 200 * SECTOR_SIZE])
+    assert [(span.lba, span.sectors, span.file_index) for span in layout.spans] == [(0, 40, 0), (40, 200, 1)]
+    assert layout.total_size == 240 * SECTOR_SIZE
+    # INDEX 00 dentro do .bin: a pausa já está nos dados e não é sintetizada
+    assert layout.index_lbas(sheet.tracks[1]) == [(0, 40), (1, 190)]
+
+def test_index_lbas_turn_pregap_into_index_00():
+    sheet = parse_cue_text(PREGAP_CUE)
+    layout = ImageLayout(sheet, [100 * SECTOR_SIZE])
+    assert [layout.index_lbas(track) for track in sheet.tracks] == [[(1, 0)], [(0, 40), (1, 190)], [(0, 225), (1, 300)]]
+    assert [layout.track_lba(track) for track in sheet.tracks] == [0, 190, 300]
+
+# -----------------------------
+# Setores de gap
+@pytest.mark.parametrize("mode", ["MODE1/2352", "MODE2/2352"])
+def test_data_gap_sectors_have_address_and_no_numpy_is_needed(monkeypatch, mode):
+    with_numpy = None
+    try:
+        ps1_ecc.require_numpy()
+        with_numpy = gap_sectors(mode, 225, 3)
+    except RuntimeError:
+        pass
+
+    def no_numpy(purpose="EDC/ECC"):
+        raise RuntimeError(f"NumPy é necessário para {purpose}")
+
+    monkeypatch.setattr(ps1_ecc, "require_numpy", no_numpy)
+    data = gap_sectors(mode, 225, 3)
+    assert len(data) == 3 * SECTOR_SIZE
+    for number in range(3):
+        sector = data[number * SECTOR_SIZE:(number + 1) * SECTOR_SIZE]
+        assert sector[0:12] == SYNC
+        assert tuple(sector[12:15]) == msf_bcd(225 + number + LBA_OFFSET)
+        assert sector[15] == (1 if mode == "MODE1/2352" else 2)
+    if with_numpy is not None:
+        assert data == with_numpy
+
+def test_audio_gap_sectors_are_silence():
+    assert gap_sectors("AUDIO", 40, 2) == bytes(2 * SECTOR_SIZE)
+
+# -----------------------------
+# TOC e .ccd
+def test_toc_uses_image_lbas(tmp_path):
+    cue = make_disc(tmp_path)
+    with SectorIndex(load_cue_sheet(cue), tmp_path) as index:
+        toc = index.toc()
+        assert [entry.point for entry in toc] == [0xA0, 0xA1, 0xA2, 1, 2, 3]
+        assert [entry.control for entry in toc[3:]] == [0x04, 0x00, 0x04]
+        assert [entry.plba for entry in toc[3:]] == [0, 190, 300]
+        assert (toc[2].plba, toc[2].pmin, toc[2].psec, toc[2].pframe) == (335, 0, 6, 35)
+        assert toc[0].psec == 0x20  # CD-XA (Mode 2)
+        # O setor do INDEX 01 da faixa 3 traz no cabeçalho o mesmo endereço da TOC
+        assert tuple(index.sector(300)[12:15]) == msf_bcd(300 + LBA_OFFSET)
+
+def test_write_ccd(tmp_path):
+    cue = make_disc(tmp_path)
+    with SectorIndex(load_cue_sheet(cue), tmp_path) as index:
+        write_ccd(tmp_path / "disco.ccd", index)
+    text = (tmp_path / "disco.ccd").read_text(encoding="utf-8")
+    assert "TocEntries=6\n" in text
+    assert "PreGapMode=2\n" in text
+    assert "Point=0xa2\nADR=0x01\nControl=0x04\nTrackNo=0\nAMin=0\nASec=0\nAFrame=0\nALBA=-150\nZero=0\n" \
+           "PMin=0\nPSec=6\nPFrame=35\nPLBA=335\n" in text
+    assert text.endswith("[TRACK 1]\nMODE=2\nINDEX 1=0\n"
+                         "[TRACK 2]\nMODE=0\nINDEX 0=40\nINDEX 1=190\n"
+                         "[TRACK 3]\nMODE=2\nINDEX 0=225\nINDEX 1=300\n")
+
+@pytest.mark.parametrize("first_mode, pregap_mode, control", [("MODE1/2352", 1, 0x04), ("AUDIO", 0, 0x00)])
+def test_write_ccd_pregap_mode_follows_first_track(tmp_path, first_mode, pregap_mode, control):
+    cue = make_disc(tmp_path, tracks=[(first_mode, 20, 0, 0), ("AUDIO", 10, 150, 0)])
+    with SectorIndex(load_cue_sheet(cue), tmp_path) as index:
+        write_ccd(tmp_path / "disco.ccd", index)
+    text = (tmp_path / "disco.ccd").read_text(encoding="utf-8")
+    assert f"PreGapMode={pregap_mode}\n" in text
+    assert f"Point=0xa0\nADR=0x01\nControl=0x{control:02x}\n" in text
+    assert f"[TRACK 1]\nMODE={pregap_mode}\n" in text
+
+def test_convert_data_pregap_without_numpy(tmp_path, monkeypatch):
+    def no_numpy(purpose="EDC/ECC"):
+        raise RuntimeError(f"NumPy é necessário para {purpose}")
+
+    monkeypatch.setattr(ps1_ecc, "require_numpy", no_numpy)
+    cue = make_disc(tmp_path / "origem", tail=b"\x01" * 100)
+    (tmp_path / "saida").mkdir()
+    ok, message = convert_pair(str(tmp_path / "origem" / "disco.bin"), cue, str(tmp_path / "saida"))
+    assert ok, message
+    image = (tmp_path / "saida" / "disco.img").read_bytes()
+    source = (tmp_path / "origem" / "disco.bin").read_bytes()
+    assert len(image) == 335 * SECTOR_SIZE + 100
+    assert image[:40 * SECTOR_SIZE] == source[:40 * SECTOR_SIZE]
+    assert image[225 * SECTOR_SIZE:300 * SECTOR_SIZE] == gap_sectors("MODE2/2352", 225, 75)
+    assert image[300 * SECTOR_SIZE:325 * SECTOR_SIZE] == source[75 * SECTOR_SIZE:100 * SECTOR_SIZE]
+    assert image[-100:] == b"\x01" * 100
@@ -0,0 +1,77 @@
+""".sub sintético (`ps1_subchannel`): canal P nas pausas e canal Q (posição, MSF em BCD e CRC)."""
+import pytest
+
+pytest.importorskip("numpy")
+
+from ps1_cue import load_cue_sheet
+from ps1_sectors import LBA_OFFSET, SectorIndex
+from ps1_subchannel import SUB_SIZE, generate_sub
+from test_sectors import make_disc
+
+def crc16(data):
+    """CRC-16/CCITT (polinômio 0x1021, valor inicial 0) invertido, como gravado no canal Q."""
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return crc ^ 0xFFFF
+
+def bcd(value):
+    return int(str(value), 16)
+
+def msf(frames):
+    return [bcd(frames // 4500), bcd(frames // 75 % 60), bcd(frames % 75)]
+
+@pytest.fixture
+def sub_data(tmp_path):
+    cue = make_disc(tmp_path)
+    with SectorIndex(load_cue_sheet(cue), tmp_path) as index:
+        for _ in generate_sub(index, tmp_path / "disco.sub", batch_sectors=64):
+            pass
+        total = index.total_sectors
+    data = (tmp_path / "disco.sub").read_bytes()
+    assert len(data) == total * SUB_SIZE
+    return data
+
+def channel_q(data, lba):
+    return data[lba * SUB_SIZE + 12:lba * SUB_SIZE + 24]
+
+@pytest.mark.parametrize("lba, control, track, index, relative", [
+    (0, 0x4, 1, 1, 0),  # Início da faixa de dados
+    (39, 0x4, 1, 1, 39),
+    (40, 0x0, 2, 0, 150),  # PREGAP da faixa 2: tempo relativo conta para baixo até o INDEX 01
+    (189, 0x0, 2, 0, 1),
+    (190, 0x0, 2, 1, 0),
+    (224, 0x0, 2, 1, 34),
+    (225, 0x4, 3, 0, 75),
+    (300, 0x4, 3, 1, 0),
+    (334, 0x4, 3, 1, 34),  # POSTGAP: continua na faixa 3
+])
+def test_channel_q(sub_data, lba, control, track, index, relative):
+    q = channel_q(sub_data, lba)
+    assert q[0] == (control << 4) | 1  # Control e ADR 1 (posição)
+    assert list(q[1:3]) == [bcd(track), bcd(index)]
+    assert list(q[3:6]) == msf(relative)
+    assert q[6] == 0
+    assert list(q[7:10]) == msf(lba + LBA_OFFSET)
+    assert int.from_bytes(q[10:12], "big") == crc16(q[0:10])
+
+def test_channel_p_marks_pauses_and_rw_is_empty(sub_data):
+    for lba in (0, 39, 40, 189, 190, 225, 299, 300):
+        sector = sub_data[lba * SUB_SIZE:(lba + 1) * SUB_SIZE]
+        in_pause = 40 <= lba < 190 or 225 <= lba < 300
+        assert sector[0:12] == (b"\xff" * 12 if in_pause else bytes(12))
+        assert sector[24:] == bytes(72)
+
+def test_absolute_time_crosses_minutes(tmp_path):
+    cue = make_disc(tmp_path, tracks=[("AUDIO", 4600, 0, 0)])
+    with SectorIndex(load_cue_sheet(cue), tmp_path) as index:
+        for _ in generate_sub(index, tmp_path / "disco.sub", batch_sectors=1000):
+            pass
+    data = (tmp_path / "disco.sub").read_bytes()
+    q = channel_q(data, 4400)
+    assert list(q[3:6]) == [0x00, 0x58, 0x50]  # 4400 frames = 00:58:50
+    assert list(q[7:10]) == [0x01, 0x00, 0x50]  # 4550 frames = 01:00:50
+    assert int.from_bytes(q[10:12], "big") == crc16(q[0:10])